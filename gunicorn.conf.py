@@ -0,0 +1,20 @@
+# gunicorn.conf.py
+# Picked up automatically by gunicorn when started from the project root (see start.sh).
+
+import os
+
+# SERVER_MODE=asgi: start.sh serves task_management.asgi, which needs uvicorn workers.
+# Each worker runs an event loop, so a few workers handle many concurrent async requests.
+if os.getenv('SERVER_MODE') == 'asgi':
+    worker_class = 'uvicorn_worker.UvicornWorker'
+
+
+def post_worker_init(worker):
+    # Run the overdue sweep in-process every OVERDUE_SWEEP_INTERVAL seconds (default 300; 0 disables)
+    from django.conf import settings
+    if settings.OVERDUE_SWEEP_INTERVAL > 0:
+        from tasks.overdue import OverdueSweepScheduler
+        OverdueSweepScheduler(
+            settings.OVERDUE_SWEEP_INTERVAL,
+            batch_size=settings.OVERDUE_SWEEP_BATCH_SIZE
+        ).start()
@@ -9,6 +9,15 @@ set -o errexit
 # Run database migrations
 python manage.py migrate --noinput
 
+# Catch up on tasks that expired while the app was down
+python manage.py mark_overdue_tasks
+
+# Create recurring task occurrences up to the horizon
+python manage.py generate_recurring_tasks
+
+# Drop realtime events older than the replay window
+python manage.py prune_task_events
+
 # Collect static files
 python manage.py collectstatic --noinput
 
@@ -31,6 +40,11 @@ python manage.py collectstatic --noinput
 # Optional: create superuser (only runs if user doesn’t exist)
 # echo "from django.contrib.auth import get_user_model; User = get_user_model(); User.objects.filter(username='admin').exists() or User.objects.create_superuser('admin', 'admin@example.com', 'adminpass')" | python manage.py shell
 
-# Start Gunicorn server
-gunicorn task_management.wsgi:application --bind 0.0.0.0:$PORT
+# Start Gunicorn server. SERVER_MODE=asgi serves the ASGI application with uvicorn workers
+# (worker class set in gunicorn.conf.py); the default stays on sync WSGI workers.
+if [ "$SERVER_MODE" = "asgi" ]; then
+    gunicorn task_management.asgi:application --bind 0.0.0.0:$PORT
+else
+    gunicorn task_management.wsgi:application --bind 0.0.0.0:$PORT
+fi
 
@@ -0,0 +1,21 @@
+# task_management/db.py
+# Connection pool statistics (settings.DB_POOL, Django's psycopg 3 pool).
+
+from django.db import connections
+
+
+def pool_stats():
+    # {alias: stats} for every pooled database. psycopg_pool's get_stats() gives the current size,
+    # idle connections and waiting requests plus counters since the pool opened (requests_num,
+    # requests_wait_ms, connections_lost, ...). in_use / utilization are derived from the first two.
+    stats = {}
+    for alias in connections:
+        pool = getattr(connections[alias], 'pool', None)
+        if pool is None:
+            continue
+        alias_stats = pool.get_stats()
+        in_use = alias_stats.get('pool_size', 0) - alias_stats.get('pool_available', 0)
+        alias_stats['in_use'] = in_use
+        alias_stats['utilization'] = round(in_use / pool.max_size, 3) if pool.max_size else 0.0
+        stats[alias] = alias_stats
+    return stats
@@ -0,0 +1,36 @@
+# task_management/ids.py
+# Time-ordered UUIDs (version 7, RFC 9562) for primary keys. uuid4 keys land at random places in
+# the primary key index, so every insert touches a random leaf page; uuid7 keys start with a
+# millisecond timestamp and are appended at the right-hand edge, like an auto-increment key.
+# They are still ordinary UUIDs, so <uuid:pk> URLs and existing uuid4 rows keep working.
+# (Python 3.14 has uuid.uuid7; this matches its layout.)
+
+import os
+import threading
+import time
+import uuid
+
+_lock = threading.Lock()
+_last_ms = 0
+_counter = 0
+
+
+def uuid7():
+    # 48-bit Unix time in ms | version 7 | 12-bit counter | variant | 62 random bits.
+    # The counter starts at a random value in the lower half each millisecond and counts up, so
+    # ids made by one process are strictly increasing even within a millisecond (bulk inserts).
+    global _last_ms, _counter
+    with _lock:
+        now_ms = time.time_ns() // 1_000_000
+        if now_ms > _last_ms:
+            _last_ms = now_ms
+            _counter = int.from_bytes(os.urandom(2)) & 0x7FF
+        else:
+            _counter += 1
+            if _counter > 0xFFF:
+                # Counter exhausted: borrow the next millisecond rather than lose ordering
+                _last_ms += 1
+                _counter = 0
+        timestamp, counter = _last_ms, _counter
+    rand_b = int.from_bytes(os.urandom(8)) & 0x3FFF_FFFF_FFFF_FFFF
+    return uuid.UUID(int=(timestamp & 0xFFFF_FFFF_FFFF) << 80 | 0x7 << 76 | counter << 64 | 0b10 << 62 | rand_b)
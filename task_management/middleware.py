@@ -0,0 +1,205 @@
+# task_management/middleware.py
+
+import json
+import logging
+import time
+from contextlib import ExitStack
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction, sync_to_async
+from django.conf import settings
+from django.db import connections
+from task_management import routers
+from task_management.db import pool_stats
+from whitenoise.middleware import WhiteNoiseMiddleware as BaseWhiteNoiseMiddleware
+
+logger = logging.getLogger('task_management.metrics')
+
+
+class ViewBudgetExceeded(Exception):
+    pass
+
+
+# Collects per-request query count and SQL time for every database connection
+class QueryRecorder:
+    def __init__(self):
+        self.count = 0
+        self.sql_time = 0.0
+
+    def __call__(self, execute, sql, params, many, context):
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.count += 1
+            self.sql_time += time.perf_counter() - start
+
+
+# Records query count, SQL time, template render time, fragment cache hits/misses, connection pool
+# usage and wall time for each request and logs
+# them as one JSON line tagged with the resolved URL name. Budgets per URL name come from
+# settings.VIEW_BUDGETS; exceeding one logs a warning, or raises when VIEW_BUDGETS_STRICT is on (tests).
+class RequestMetricsMiddleware:
+    # Sync and async capable, so async views under ASGI aren't pushed back onto a thread
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        recorder, start = self.start(request)
+        with self.recording(recorder):
+            response = self.get_response(request)
+        return self.finish(request, response, recorder, start)
+
+    async def __acall__(self, request):
+        recorder, start = self.start(request)
+        # The async ORM runs queries on the request's thread-sensitive executor thread, which owns
+        # its own connection objects, so the wrappers are installed and removed from that thread
+        stack = await sync_to_async(self.recording)(recorder)
+        try:
+            response = await self.get_response(request)
+        finally:
+            await sync_to_async(stack.close)()
+        return self.finish(request, response, recorder, start)
+
+    def start(self, request):
+        request._render_time = 0.0
+        request._fragment_hits = request._fragment_misses = 0
+        return QueryRecorder(), time.perf_counter()
+
+    def recording(self, recorder):
+        stack = ExitStack()
+        for connection in connections.all():
+            stack.enter_context(connection.execute_wrapper(recorder))
+        return stack
+
+    def finish(self, request, response, recorder, start):
+        wall_time = time.perf_counter() - start
+
+        match = getattr(request, 'resolver_match', None)
+        metrics = {
+            'view': match.url_name if match else None,
+            'method': request.method,
+            'path': request.path,
+            'status': response.status_code,
+            'queries': recorder.count,
+            'sql_ms': round(recorder.sql_time * 1000, 2),
+            'render_ms': round(request._render_time * 1000, 2),
+            'fragment_hits': request._fragment_hits,
+            'fragment_misses': request._fragment_misses,
+            'wall_ms': round(wall_time * 1000, 2),
+        }
+        # With DB_POOL on: connections checked out (this request's included) and requests queued for one
+        pools = pool_stats()
+        if pools:
+            metrics['db_pool'] = {
+                alias: {'in_use': stats['in_use'], 'waiting': stats.get('requests_waiting', 0)}
+                for alias, stats in pools.items()
+            }
+        logger.info(json.dumps(metrics))
+        self.check_budget(metrics)
+        return response
+
+    def process_template_response(self, request, response):
+        # Called right before the response is rendered; the post-render callback closes the timer
+        render_start = time.perf_counter()
+
+        def record_render_time(rendered_response):
+            request._render_time += time.perf_counter() - render_start
+
+        response.add_post_render_callback(record_render_time)
+        return response
+
+    def check_budget(self, metrics):
+        budget = getattr(settings, 'VIEW_BUDGETS', {}).get(metrics['view'])
+        if not budget:
+            return
+        exceeded = [
+            f"{key}={metrics[key]} (budget {limit})"
+            for key, limit in budget.items()
+            if key in metrics and metrics[key] > limit
+        ]
+        if not exceeded:
+            return
+        message = f"View '{metrics['view']}' exceeded its budget: {', '.join(exceeded)}"
+        if getattr(settings, 'VIEW_BUDGETS_STRICT', False):
+            raise ViewBudgetExceeded(message)
+        logger.warning(message)
+
+
+# WhiteNoise 6 middleware is sync-only; one sync middleware in the stack makes Django run every
+# async view through a thread again. Static files are still served synchronously (from memory or a
+# file handle), everything else is passed straight through.
+class WhiteNoiseMiddleware(BaseWhiteNoiseMiddleware):
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response=None, settings=settings):
+        super().__init__(get_response, settings=settings)
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        return super().__call__(request)
+
+    async def __acall__(self, request):
+        if self.autorefresh:
+            static_file = await sync_to_async(self.find_file)(request.path_info)
+        else:
+            static_file = self.files.get(request.path_info)
+        if static_file is not None:
+            return await sync_to_async(self.serve)(static_file, request)
+        return await self.get_response(request)
+
+
+# Marks GET/HEAD requests as eligible for replica reads (task_management/routers.py). Other methods
+# use the primary and set a short-lived cookie so the same browser keeps reading from the primary
+# for REPLICA_PIN_SECONDS, and sees its own writes even if the replicas lag.
+class ReplicaRoutingMiddleware:
+    sync_capable = True
+    async_capable = True
+    pin_cookie = 'db_pin'
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        token = routers.start_request(self.pinned(request))
+        try:
+            response = self.get_response(request)
+        finally:
+            routers.end_request(token)
+        return self.pin(request, response)
+
+    async def __acall__(self, request):
+        token = routers.start_request(self.pinned(request))
+        try:
+            response = await self.get_response(request)
+        finally:
+            routers.end_request(token)
+        return self.pin(request, response)
+
+    def pinned(self, request):
+        if request.method not in ('GET', 'HEAD', 'OPTIONS'):
+            return True
+        try:
+            return float(request.COOKIES.get(self.pin_cookie, 0)) > time.time()
+        except ValueError:
+            return False
+
+    def pin(self, request, response):
+        if request.method not in ('GET', 'HEAD', 'OPTIONS') and response.status_code < 500:
+            seconds = settings.REPLICA_PIN_SECONDS
+            response.set_cookie(self.pin_cookie, str(time.time() + seconds), max_age=seconds, httponly=True, samesite='Lax')
+        return response
@@ -0,0 +1,83 @@
+# task_management/routers.py
+# Read replicas (settings.DATABASE_REPLICAS). Reads go to a replica only inside a GET/HEAD request
+# that ReplicaRoutingMiddleware has marked eligible: not pinned to the primary by a recent POST from
+# the same browser, and not inside a transaction on the primary. Everything else (writes, POST
+# requests, management commands, background sweeps) uses the primary, so code that reads and then
+# writes never sees replication lag.
+
+import logging
+import random
+import time
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, connections
+
+logger = logging.getLogger('task_management.routers')
+
+# Replica alias -> time.monotonic() before which it is not tried again
+_unavailable_until = {}
+
+
+class ReadState:
+    def __init__(self, pinned):
+        self.pinned = pinned
+        self.alias = None  # chosen on the first read of the request
+
+
+_read_state = ContextVar('replica_read_state', default=None)
+
+
+def start_request(pinned):
+    return _read_state.set(ReadState(pinned))
+
+
+def end_request(token):
+    _read_state.reset(token)
+
+
+def replica_available(alias):
+    try:
+        connections[alias].ensure_connection()
+    except Exception:
+        # Any failure to connect (including an alias the current test may not use) means the primary
+        _unavailable_until[alias] = time.monotonic() + settings.REPLICA_RETRY_SECONDS
+        logger.warning("Replica '%s' is unavailable; reading from the primary for %ss.", alias, settings.REPLICA_RETRY_SECONDS)
+        return False
+    return True
+
+
+def choose_replica():
+    now = time.monotonic()
+    candidates = [alias for alias in settings.DATABASE_REPLICAS if _unavailable_until.get(alias, 0) <= now]
+    random.shuffle(candidates)
+    for alias in candidates:
+        if replica_available(alias):
+            return alias
+    return DEFAULT_DB_ALIAS
+
+
+def read_alias():
+    state = _read_state.get()
+    if state is None or state.pinned or connections[DEFAULT_DB_ALIAS].in_atomic_block:
+        return DEFAULT_DB_ALIAS
+    if state.alias is None:
+        # One replica per request, so all of a page's reads see the same snapshot
+        state.alias = choose_replica()
+    return state.alias
+
+
+class ReplicaRouter:
+    def db_for_read(self, model, **hints):
+        return read_alias()
+
+    def db_for_write(self, model, **hints):
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # Replicas hold the same data as the primary
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        # Replicas get their schema through replication
+        return db not in settings.DATABASE_REPLICAS
@@ -48,6 +48,8 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'task_management.middleware.RequestMetricsMiddleware', # First, so it sees every query and the full wall time
+    'task_management.middleware.ReplicaRoutingMiddleware', # Before anything that reads the database
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -87,12 +89,58 @@ WSGI_APPLICATION = 'task_management.wsgi.application'
 #     }
 # }
 
-DATABASES = {
-    'default': dj_database_url.config(
-        default=os.getenv('DATABASE_URL')
+# Connection reuse, configured from the environment:
+# - DB_POOL=1 (PostgreSQL with psycopg 3): Django's connection pool, one per worker process (a sync
+#   worker only ever holds one connection). DB_POOL_MIN_SIZE / DB_POOL_MAX_SIZE connections,
+#   DB_POOL_TIMEOUT seconds to wait for a free one, DB_POOL_MAX_IDLE seconds before extra idle
+#   connections close; each is checked before it is handed out (DB_CONN_HEALTH_CHECKS). This is the
+#   option for SERVER_MODE=asgi, where every request runs on a new thread and persistent connections
+#   would not be reused.
+# - Otherwise persistent connections: DB_CONN_MAX_AGE seconds per worker thread (0 closes after every
+#   request; the default is 60, or 0 under ASGI), checked before reuse unless DB_CONN_HEALTH_CHECKS=0.
+# - DB_DISABLE_SERVER_SIDE_CURSORS=1 behind a transaction-pooling PgBouncer (exports use iterator()).
+def database_settings(url, env=os.environ):
+    if not url:
+        return {}
+    pool = env.get('DB_POOL', '0') == '1'
+    default_max_age = '0' if env.get('SERVER_MODE') == 'asgi' else '60'
+    conn_max_age = env.get('DB_CONN_MAX_AGE', default_max_age)
+    database = dj_database_url.parse(
+        url,
+        # The pool replaces persistent connections; Django refuses both at once
+        conn_max_age=0 if pool else (None if conn_max_age == 'None' else int(conn_max_age)),
+        conn_health_checks=env.get('DB_CONN_HEALTH_CHECKS', '1') == '1',
+        disable_server_side_cursors=env.get('DB_DISABLE_SERVER_SIDE_CURSORS', '0') == '1',
     )
+    if pool and database['ENGINE'] == 'django.db.backends.postgresql':
+        # CONN_HEALTH_CHECKS also makes Django pass psycopg_pool's check_connection to the pool
+        database.setdefault('OPTIONS', {})['pool'] = {
+            'min_size': int(env.get('DB_POOL_MIN_SIZE', '2')),
+            'max_size': int(env.get('DB_POOL_MAX_SIZE', '10')),
+            'timeout': float(env.get('DB_POOL_TIMEOUT', '10')),
+            'max_idle': float(env.get('DB_POOL_MAX_IDLE', '300')),
+        }
+    return database
+
+
+DATABASES = {
+    'default': database_settings(os.getenv('DATABASE_URL'))
 }
 
+# Read replicas: DATABASE_REPLICA_URLS is a comma-separated list of URLs (aliases replica_1, ...).
+# GET/HEAD requests read from a healthy replica (task_management/routers.py); writes, transactions
+# and requests within REPLICA_PIN_SECONDS of the same browser's last POST use the primary. A replica
+# that fails to connect is skipped for REPLICA_RETRY_SECONDS. Locally, a second SQLite file works:
+# migrate the primary and copy the file.
+DATABASE_REPLICAS = []
+for number, replica_url in enumerate(filter(None, os.getenv('DATABASE_REPLICA_URLS', '').split(',')), start=1):
+    DATABASE_REPLICAS.append(f'replica_{number}')
+    # Replicas point at the test database during tests
+    DATABASES[f'replica_{number}'] = {**database_settings(replica_url.strip()), 'TEST': {'MIRROR': 'default'}}
+DATABASE_ROUTERS = ['task_management.routers.ReplicaRouter'] if DATABASE_REPLICAS else []
+REPLICA_PIN_SECONDS = int(os.getenv('REPLICA_PIN_SECONDS', '5'))
+REPLICA_RETRY_SECONDS = int(os.getenv('REPLICA_RETRY_SECONDS', '30'))
+
 # Password validation
 # https://docs.djangoproject.com/en/5.2/ref/settings/#auth-password-validators
 
@@ -131,7 +179,10 @@ STATIC_URL = '/static/'
 STATIC_ROOT = os.path.join(BASE_DIR, 'staticfiles')
 
 STATICFILES_STORAGE = 'whitenoise.storage.CompressedManifestStaticFilesStorage'
-MIDDLEWARE.insert(1, 'whitenoise.middleware.WhiteNoiseMiddleware')   
+MIDDLEWARE.insert(
+    MIDDLEWARE.index('django.middleware.security.SecurityMiddleware') + 1,
+    'task_management.middleware.WhiteNoiseMiddleware'  # async-capable subclass
+)
 
 # Default primary key field type
 # https://docs.djangoproject.com/en/5.2/ref/settings/#default-auto-field
@@ -145,3 +196,99 @@ LOGOUT_REDIRECT_URL = 'login'
 # Crispy Forms configuration
 CRISPY_ALLOWED_TEMPLATE_PACKS = "bootstrap5"
 CRISPY_TEMPLATE_PACK = "bootstrap5"
+
+# Caches. 'default' holds small per-user data (task form group choices); 'fragments' holds
+# rendered template fragments (tasks/fragments.py). CACHE_URL and FRAGMENT_CACHE_URL pick the
+# backends: unset -> local memory (dev, one copy per process), file:///var/tmp/fragments -> file
+# based, redis://host:6379/1 -> Redis. With several workers, use a shared backend for 'default' so
+# invalidations reach every process.
+def cache_backend(url, location):
+    if url.startswith('file://'):
+        return {'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache', 'LOCATION': url[len('file://'):]}
+    if url.startswith(('redis://', 'rediss://', 'unix://')):
+        return {'BACKEND': 'django.core.cache.backends.redis.RedisCache', 'LOCATION': url}
+    return {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache', 'LOCATION': location}
+
+
+CACHES = {
+    'default': cache_backend(os.getenv('CACHE_URL', ''), 'default'),
+    'fragments': cache_backend(os.getenv('FRAGMENT_CACHE_URL', ''), 'fragments'),
+}
+FRAGMENT_CACHE_ALIAS = 'fragments'
+# Keys are versioned, so the timeout only bounds how long unused fragments linger
+FRAGMENT_CACHE_TIMEOUT = int(os.getenv('FRAGMENT_CACHE_TIMEOUT', str(60 * 60 * 24)))
+
+# Overdue sweep (tasks/overdue.py): seconds between in-process runs under gunicorn. The status
+# tabs and counters rely on it to move expired tasks to 'overdue', so it is on by default; set 0
+# only when `python manage.py mark_overdue_tasks` is scheduled externally (cron) instead.
+OVERDUE_SWEEP_INTERVAL = int(os.getenv('OVERDUE_SWEEP_INTERVAL', '300'))
+OVERDUE_SWEEP_BATCH_SIZE = int(os.getenv('OVERDUE_SWEEP_BATCH_SIZE', '1000'))
+
+# Completed tasks untouched for this many days are moved to the archive table by
+# `archive_completed_tasks` (tasks/archive.py)
+TASK_ARCHIVE_AFTER_DAYS = int(os.getenv('TASK_ARCHIVE_AFTER_DAYS', '90'))
+TASK_ARCHIVE_BATCH_SIZE = int(os.getenv('TASK_ARCHIVE_BATCH_SIZE', '1000'))
+
+# Recurring tasks (tasks/recurrence.py): occurrences are created this many days ahead, by
+# `generate_recurring_tasks` and by the in-process sweep when OVERDUE_SWEEP_INTERVAL is set
+TASK_RECURRENCE_HORIZON_DAYS = int(os.getenv('TASK_RECURRENCE_HORIZON_DAYS', '14'))
+TASK_RECURRENCE_BATCH_SIZE = int(os.getenv('TASK_RECURRENCE_BATCH_SIZE', '500'))
+
+# Calendar page and .ics feed (tasks/agenda.py). Windows with more tasks than the maximum are cut
+# short with a notice; grouped results are cached in the fragment cache under versioned keys.
+TASK_CALENDAR_MAX_TASKS = int(os.getenv('TASK_CALENDAR_MAX_TASKS', '1000'))
+TASK_CALENDAR_CACHE_TIMEOUT = int(os.getenv('TASK_CALENDAR_CACHE_TIMEOUT', str(60 * 60)))
+TASK_CALENDAR_FEED_PAST_DAYS = int(os.getenv('TASK_CALENDAR_FEED_PAST_DAYS', '30'))
+TASK_CALENDAR_FEED_FUTURE_DAYS = int(os.getenv('TASK_CALENDAR_FEED_FUTURE_DAYS', '365'))
+TASK_CALENDAR_FEED_REFRESH_MINUTES = int(os.getenv('TASK_CALENDAR_FEED_REFRESH_MINUTES', '15'))
+
+# Realtime events (tasks/events.py). Streams stay open under ASGI; under WSGI each request returns
+# what is pending and the browser reconnects after TASK_EVENTS_RETRY_MS, so sync workers aren't held.
+TASK_EVENTS_POLL_INTERVAL = float(os.getenv('TASK_EVENTS_POLL_INTERVAL', '1'))  # outbox polls per process
+TASK_EVENTS_HEARTBEAT = 20  # seconds between keepalive comments on idle streams
+TASK_EVENTS_RETRY_MS = int(os.getenv('TASK_EVENTS_RETRY_MS', '3000'))
+TASK_EVENTS_REPLAY_LIMIT = 200  # missed events replayed on reconnect before asking for a reload
+TASK_EVENTS_LOOKBACK = 30  # seconds a skipped outbox id is re-checked for a late commit
+TASK_EVENTS_RETENTION_HOURS = int(os.getenv('TASK_EVENTS_RETENTION_HOURS', '24'))  # prune_task_events
+
+# Per-request metrics (task_management/middleware.py)
+# Budgets are keyed by URL name; any of 'queries', 'sql_ms', 'render_ms', 'wall_ms' can be set.
+# Exceeding a budget logs a warning, or raises ViewBudgetExceeded when VIEW_BUDGETS_STRICT is on.
+# Write budgets are measured counts (QueryBudgetTests) for the most expensive form of each request,
+# e.g. creating a repeating group task; they include the visibility, counter and outbox writes.
+VIEW_BUDGETS = {
+    'task_list': {'queries': 5, 'sql_ms': 200},
+    'group_list': {'queries': 5, 'sql_ms': 200},
+    'group_detail': {'queries': 8, 'sql_ms': 200},
+    'task_create': {'queries': 18},
+    'task_create_for_group': {'queries': 26},
+    'task_edit': {'queries': 15},
+    'task_complete': {'queries': 11},
+    'group_members_manage': {'queries': 23},
+    'task_bulk_action': {'queries': 23},
+    'api_task_overview': {'queries': 4, 'sql_ms': 200},
+    'api_group_overview': {'queries': 3, 'sql_ms': 200},
+    'api_group_detail_overview': {'queries': 6, 'sql_ms': 200},
+    'task_events': {'queries': 5},
+    'group_task_events': {'queries': 5},
+    'task_calendar': {'queries': 6, 'sql_ms': 200},  # includes the feed key read
+    'task_calendar_feed': {'queries': 4, 'sql_ms': 200},
+}
+VIEW_BUDGETS_STRICT = os.getenv('VIEW_BUDGETS_STRICT', '0') == '1'
+
+# The metrics logger writes one JSON line per request at INFO and budget overruns at WARNING; only
+# the overruns are logged unless REQUEST_METRICS_LOG_LEVEL=INFO opts in to the per-request lines.
+LOGGING = {
+    'version': 1,
+    'disable_existing_loggers': False,
+    'handlers': {
+        'console': {'class': 'logging.StreamHandler'},
+    },
+    'loggers': {
+        'task_management.metrics': {
+            'handlers': ['console'],
+            'level': os.getenv('REQUEST_METRICS_LOG_LEVEL', 'WARNING'),
+            'propagate': False,
+        },
+    },
+}
@@ -0,0 +1,164 @@
+# tasks/agenda.py
+# Calendar (month/week) page and iCalendar feed. Both read the user's visible tasks for a date
+# window with one due_date range query (task_due_idx) and group them per day here. The grouped
+# result is cached per user and window under a key carrying the same version as the task list
+# ETag: the counter row with the latest updated_at, plus the versions of the user's groups (their
+# names are shown). Any change to a visible task moves one of them, so entries are never
+# invalidated in place; they just stop being asked for.
+
+import hashlib
+from datetime import date, datetime, timedelta, timezone
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core import signing
+from tasks.models import CalendarFeedKey, Task, new_feed_key
+from .counters import user_task_counts
+from .forms import user_group_choices
+from .fragments import fragment_cache, group_fragment_versions
+
+CALENDAR_MODES = ('month', 'week')
+CALENDAR_FIELDS = ('id', 'title', 'status', 'due_date', 'group__name', 'recurrence_id', 'updated_at')
+CALENDAR_CACHE_KEY = 'task_calendar:{}'
+FEED_SALT = 'tasks.agenda.feed'
+
+
+def calendar_window(mode, anchor):
+    # (first day, last day) shown for the month or week containing `anchor`; weeks start on Monday
+    # and a month view is padded to whole weeks
+    if mode == 'week':
+        start = anchor - timedelta(days=anchor.weekday())
+        return start, start + timedelta(days=6)
+    first = anchor.replace(day=1)
+    last = (first + timedelta(days=31)).replace(day=1) - timedelta(days=1)
+    return first - timedelta(days=first.weekday()), last + timedelta(days=6 - last.weekday())
+
+
+def shift_anchor(mode, anchor, step):
+    # The anchor of the previous (step=-1) or next (step=1) page
+    if mode == 'week':
+        return anchor + timedelta(weeks=step)
+    month = anchor.replace(day=1) + timedelta(days=31 if step > 0 else -1)
+    return month.replace(day=1)
+
+
+def calendar_version(user):
+    group_ids = [group_id for group_id, _ in user_group_choices(user)]
+    return sorted(user_task_counts(user).items()), sorted(group_fragment_versions(group_ids).items())
+
+
+def due_tasks(user, start, end, limit):
+    # Visible tasks due in [start, end], one query; ordering matches the task list within a day
+    return list(
+        Task.objects.visible_to(user).filter(due_date__range=(start, end))
+        .order_by('due_date', '-created_at', '-id').values(*CALENDAR_FIELDS)[:limit]
+    )
+
+
+def tasks_by_day(user, start, end, version=None):
+    # Returns (days, truncated): [(date, [task rows])] for every day of the window, and whether
+    # the window held more than TASK_CALENDAR_MAX_TASKS tasks (the rest are left out)
+    version = calendar_version(user) if version is None else version
+    key = CALENDAR_CACHE_KEY.format(hashlib.md5(
+        repr((user.pk, start, end, version)).encode(), usedforsecurity=False
+    ).hexdigest())
+    cache = fragment_cache()
+    cached = cache.get(key)
+    if cached is not None:
+        return cached
+
+    limit = settings.TASK_CALENDAR_MAX_TASKS
+    rows = due_tasks(user, start, end, limit + 1)
+    by_day = {}
+    for row in rows[:limit]:
+        by_day.setdefault(row['due_date'], []).append(row)
+    days = [
+        (day, by_day.get(day, []))
+        for day in (start + timedelta(days=offset) for offset in range((end - start).days + 1))
+    ]
+    result = (days, len(rows) > limit)
+    cache.set(key, result, settings.TASK_CALENDAR_CACHE_TIMEOUT)
+    return result
+
+
+# Feed URLs: calendar clients can't log in, so the URL carries the user id and the user's feed key,
+# signed. Resetting the key (reset_feed_token) revokes the old URL.
+
+def feed_token(user):
+    feed_key, _ = CalendarFeedKey.objects.get_or_create(user=user)
+    return signing.Signer(salt=FEED_SALT).sign(f'{user.pk}:{feed_key.key}')
+
+
+def reset_feed_token(user):
+    CalendarFeedKey.objects.update_or_create(user=user, defaults={'key': new_feed_key()})
+
+
+def feed_user(token):
+    try:
+        user_id, key = signing.Signer(salt=FEED_SALT).unsign(token).split(':', 1)
+    except (signing.BadSignature, ValueError):
+        return None
+    return get_user_model().objects.filter(pk=user_id, is_active=True, calendar_feed_key__key=key).first()
+
+
+def feed_window(today=None):
+    today = today or date.today()
+    return (
+        today - timedelta(days=settings.TASK_CALENDAR_FEED_PAST_DAYS),
+        today + timedelta(days=settings.TASK_CALENDAR_FEED_FUTURE_DAYS)
+    )
+
+
+def ics_escape(text):
+    return text.replace('\\', '\\\\').replace(';', '\\;').replace(',', '\\,').replace('\r\n', '\\n').replace('\n', '\\n')
+
+
+def ics_fold(line):
+    # Content lines are at most 75 octets; longer ones continue on lines starting with a space
+    data = line.encode()
+    if len(data) <= 75:
+        return line
+    parts, start = [], 0
+    while start < len(data):
+        end = min(start + (75 if not parts else 74), len(data))
+        while end < len(data) and (data[end] & 0xC0) == 0x80:
+            end -= 1  # don't split a UTF-8 sequence
+        parts.append(data[start:end].decode())
+        start = end
+    return '\r\n '.join(parts)
+
+
+def ics_calendar(days, name, host, url_for_task):
+    # A VCALENDAR with one all-day VEVENT per task. UIDs are the task ids, so clients update
+    # events in place; the status goes in the summary since events have no "completed" state.
+    status_labels = dict(Task.STATUS_CHOICES)
+    lines = [
+        'BEGIN:VCALENDAR',
+        'VERSION:2.0',
+        'PRODID:-//Task Management//Tasks//EN',
+        'CALSCALE:GREGORIAN',
+        'METHOD:PUBLISH',
+        f'X-WR-CALNAME:{ics_escape(name)}',
+        f'REFRESH-INTERVAL;VALUE=DURATION:PT{settings.TASK_CALENDAR_FEED_REFRESH_MINUTES}M',
+    ]
+    for day, rows in days:
+        for row in rows:
+            summary = row['title'] if row['status'] == 'ongoing' else f"[{status_labels[row['status']]}] {row['title']}"
+            stamp = row['updated_at'].astimezone(timezone.utc) if row['updated_at'] else datetime.now(timezone.utc)
+            lines += [
+                'BEGIN:VEVENT',
+                f"UID:{row['id']}@{host}",
+                f'DTSTAMP:{stamp:%Y%m%dT%H%M%SZ}',
+                f'DTSTART;VALUE=DATE:{day:%Y%m%d}',
+                f'DTEND;VALUE=DATE:{day + timedelta(days=1):%Y%m%d}',
+                f'SUMMARY:{ics_escape(summary)}',
+                'TRANSP:TRANSPARENT',
+                f"URL:{url_for_task(row['id'])}",
+            ]
+            if row['group__name']:
+                lines.append(f"CATEGORIES:{ics_escape(row['group__name'])}")
+            if row['recurrence_id']:
+                lines.append(f"RELATED-TO:{row['recurrence_id']}@{host}")
+            lines.append('END:VEVENT')
+    lines.append('END:VCALENDAR')
+    return ''.join(ics_fold(line) + '\r\n' for line in lines)
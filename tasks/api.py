@@ -0,0 +1,358 @@
+# tasks/api.py
+# JSON API over tasks, groups and memberships. Uses the same session authentication and the
+# same visibility/permission rules as the HTML views, without template rendering.
+
+import json
+import uuid
+
+from django.db import models, transaction
+from django.db.models.functions import Coalesce
+from django.http import JsonResponse
+from django.views.generic import View
+from task_management.db import pool_stats
+from tasks.models import ArchivedTask, Task
+from users.models import Membership
+from .bulk import bulk_create_tasks, complete_tasks
+from .counters import STATUSES, agroup_task_counter, auser_task_counts
+from .forms import TaskForm, user_groups
+from .fragments import stats as fragment_stats
+from .pagination import KeysetPaginator
+
+# Public field name -> ORM lookup, used with .values() so only the requested columns are read
+TASK_FIELDS = {
+    'id': 'id',
+    'title': 'title',
+    'description': 'description',
+    'status': 'status',
+    'due_date': 'due_date',
+    'owner': 'owner__username',
+    'assignee': 'assignee__username',
+    'group': 'group_id',
+    'group_name': 'group__name',
+    'created_at': 'created_at',
+    'updated_at': 'updated_at',
+}
+GROUP_FIELDS = {
+    'id': 'id',
+    'name': 'name',
+    'admin': 'admin__username',
+    'created_at': 'created_at',
+}
+MEMBER_FIELDS = {
+    'user_id': 'user_id',
+    'username': 'user__username',
+    'date_joined': 'date_joined',
+}
+
+TASK_ORDERING = KeysetPaginator.ordering
+GROUP_ORDERING = [('name', False), ('id', False)]
+MEMBER_ORDERING = [('id', False)]
+
+
+class ApiError(Exception):
+    def __init__(self, message, status=400, errors=None):
+        super().__init__(message)
+        self.message = message
+        self.status = status
+        self.errors = errors
+
+
+# Base view: JSON errors instead of redirects, ?fields= sparse fieldsets and cursor pagination
+class ApiView(View):
+    default_page_size = 20
+    max_page_size = 100
+    max_batch_size = 500
+
+    def dispatch(self, request, *args, **kwargs):
+        if not request.user.is_authenticated:
+            return JsonResponse({'error': 'Authentication required.'}, status=401)
+        try:
+            return super().dispatch(request, *args, **kwargs)
+        except ApiError as exc:
+            body = {'error': exc.message}
+            if exc.errors:
+                body['errors'] = exc.errors
+            return JsonResponse(body, status=exc.status)
+
+    def parse_json(self):
+        try:
+            return json.loads(self.request.body)
+        except ValueError:
+            raise ApiError("Request body must be valid JSON.")
+
+    def batch_items(self, key):
+        body = self.parse_json()
+        items = body.get(key) if isinstance(body, dict) else None
+        if not isinstance(items, list) or not items:
+            raise ApiError(f"Expected a non-empty '{key}' list.")
+        if len(items) > self.max_batch_size:
+            raise ApiError(f"At most {self.max_batch_size} items per batch.")
+        return items
+
+    def requested_fields(self, available):
+        raw = self.request.GET.get('fields')
+        if not raw:
+            return list(available)
+        fields = [name.strip() for name in raw.split(',') if name.strip()]
+        unknown = [name for name in fields if name not in available]
+        if unknown:
+            raise ApiError(f"Unknown field(s): {', '.join(unknown)}.")
+        return fields
+
+    def page_size(self):
+        try:
+            size = int(self.request.GET.get('limit', self.default_page_size))
+        except ValueError:
+            raise ApiError("'limit' must be an integer.")
+        return max(1, min(size, self.max_page_size))
+
+    def serialize(self, row, fields, field_map):
+        return {name: row[field_map[name]] for name in fields}
+
+    def paginated_response(self, queryset, field_map, ordering):
+        fields = self.requested_fields(field_map)
+        lookups = {field_map[name] for name in fields} | {name for name, _ in ordering}
+        page = KeysetPaginator(self.page_size(), ordering=ordering).paginate(
+            queryset.values(*lookups),
+            after=self.request.GET.get('after'),
+            before=self.request.GET.get('before')
+        )
+        return JsonResponse({
+            'results': [self.serialize(row, fields, field_map) for row in page],
+            'next': page.next_cursor,
+            'previous': page.previous_cursor,
+        })
+
+    def detail_response(self, queryset, field_map, not_found):
+        fields = self.requested_fields(field_map)
+        row = queryset.values(*{field_map[name] for name in fields}).first()
+        if row is None:
+            raise ApiError(not_found, status=404)
+        return JsonResponse(self.serialize(row, fields, field_map))
+
+
+class TaskApiListView(ApiView):
+    # GET: tasks visible to the user (same rules as TaskListView). ?status=, ?group=, ?fields=, ?limit=, ?after=/?before=
+    # ?archived=1 lists archived tasks instead (the status filter does not apply there)
+    def get(self, request):
+        if request.GET.get('archived') == '1':
+            queryset = ArchivedTask.objects.visible_to(request.user)
+        else:
+            queryset = Task.objects.visible_to(request.user).with_status(request.GET.get('status'))
+        group_id = request.GET.get('group')
+        if group_id:
+            try:
+                queryset = queryset.filter(group_id=uuid.UUID(group_id))
+            except ValueError:
+                raise ApiError("'group' must be a UUID.")
+        return self.paginated_response(queryset, TASK_FIELDS, TASK_ORDERING)
+
+
+class TaskApiDetailView(ApiView):
+    def get(self, request, pk):
+        return self.detail_response(Task.objects.visible_to(request.user).filter(pk=pk), TASK_FIELDS, "Task not found.")
+
+
+class TaskBatchCreateApiView(ApiView):
+    # POST {"tasks": [{title, description, due_date, assignee, group, status}, ...]}
+    # All tasks are validated with TaskForm first; either every task is created or none is.
+    def post(self, request):
+        items = self.batch_items('tasks')
+        member_group_ids = set(Membership.objects.filter(user=request.user).values_list('group_id', flat=True))
+
+        tasks, errors = [], {}
+        for index, item in enumerate(items):
+            if not isinstance(item, dict):
+                errors[index] = {'__all__': ["Expected an object."]}
+                continue
+            form = TaskForm(data={'status': 'ongoing', **item}, request_user=request.user)
+            if not form.is_valid():
+                errors[index] = form.errors.get_json_data()
+                continue
+            task = form.save(commit=False)
+            task.owner = request.user
+            # Same assignee defaults as TaskCreateView
+            if not task.assignee_id and not task.group_id:
+                task.assignee = request.user
+            elif task.group_id and not task.assignee_id and task.group_id in member_group_ids:
+                task.assignee = request.user
+            tasks.append(task)
+
+        if errors:
+            raise ApiError("Validation failed; no tasks were created.", errors=errors)
+        created = bulk_create_tasks(tasks)
+        return JsonResponse({'created': [task.pk for task in created]}, status=201)
+
+
+class TaskBatchUpdateApiView(ApiView):
+    # POST {"tasks": [{"id": ..., <fields to change>}, ...]}
+    # Same permission as TaskUpdateView (task owner or group admin); all-or-nothing.
+    def post(self, request):
+        items = self.batch_items('tasks')
+        requested_ids = []
+        for item in items:
+            try:
+                requested_ids.append(uuid.UUID(str(item.get('id'))) if isinstance(item, dict) else None)
+            except ValueError:
+                requested_ids.append(None)
+        editable = {
+            task.pk: task
+            for task in Task.objects.filter(
+                models.Q(owner=request.user) | models.Q(group__admin=request.user),
+                id__in=[task_id for task_id in requested_ids if task_id]
+            )
+        }
+
+        forms, errors = [], {}
+        for index, (item, task_id) in enumerate(zip(items, requested_ids)):
+            task = editable.get(task_id)
+            if task is None:
+                errors[index] = {'id': [{'message': "Task not found or not editable.", 'code': 'not_found'}]}
+                continue
+            data = {
+                'title': task.title,
+                'description': task.description,
+                'due_date': task.due_date,
+                'assignee': task.assignee_id,
+                'group': task.group_id,
+                'status': task.status,
+            }
+            data.update({key: value for key, value in item.items() if key != 'id'})
+            form = TaskForm(
+                data=data, instance=task, request_user=request.user,
+                specific_group=task.group if task.group_id else None
+            )
+            if not form.is_valid():
+                errors[index] = form.errors.get_json_data()
+            elif 'due_date' in form.changed_data and task.status == 'overdue' and task.owner_id != request.user.pk:
+                errors[index] = {'due_date': [{
+                    'message': "Only the task owner can change the due date of an overdue task.",
+                    'code': 'permission_denied'
+                }]}
+            else:
+                forms.append(form)
+
+        if errors:
+            raise ApiError("Validation failed; no tasks were updated.", errors=errors)
+        with transaction.atomic():
+            updated = [form.save().pk for form in forms]
+        return JsonResponse({'updated': updated})
+
+
+class TaskBatchCompleteApiView(ApiView):
+    # POST {"ids": [...]}: one permission query and one UPDATE for the whole set
+    def post(self, request):
+        return JsonResponse(complete_tasks(request.user, self.batch_items('ids')))
+
+
+class GroupApiListView(ApiView):
+    def get(self, request):
+        return self.paginated_response(user_groups(request.user), GROUP_FIELDS, GROUP_ORDERING)
+
+
+class GroupApiDetailView(ApiView):
+    def get(self, request, pk):
+        return self.detail_response(user_groups(request.user).filter(pk=pk), GROUP_FIELDS, "Group not found.")
+
+
+class GroupMembersApiView(ApiView):
+    def get(self, request, pk):
+        if not user_groups(request.user).filter(pk=pk).exists():
+            raise ApiError("Group not found.", status=404)
+        return self.paginated_response(Membership.objects.filter(group_id=pk), MEMBER_FIELDS, MEMBER_ORDERING)
+
+
+class FragmentCacheStatsApiView(ApiView):
+    # GET (staff only): fragment cache hits/misses by fragment name since this worker started
+    def get(self, request):
+        if not request.user.is_staff:
+            raise ApiError("Staff only.", status=403)
+        return JsonResponse({'fragments': fragment_stats.snapshot()})
+
+
+class DatabasePoolStatsApiView(ApiView):
+    # GET (staff only): connection pool statistics of this worker process; empty unless DB_POOL is on
+    def get(self, request):
+        if not request.user.is_staff:
+            raise ApiError("Staff only.", status=403)
+        return JsonResponse({'pools': pool_stats()})
+
+
+# Async counterparts of the task list, group list and group detail pages for ASGI deployments
+# (see start.sh). They use the async ORM, so a worker keeps serving other requests while one waits
+# on the database. Django runs async ORM calls one at a time on its thread-sensitive executor, so
+# a request's reads are awaited in turn; gathering them would not overlap them.
+class AsyncApiView(ApiView):
+    async def dispatch(self, request, *args, **kwargs):
+        request.user = await request.auser()
+        if not request.user.is_authenticated:
+            return JsonResponse({'error': 'Authentication required.'}, status=401)
+        try:
+            return await View.dispatch(self, request, *args, **kwargs)
+        except ApiError as exc:
+            body = {'error': exc.message}
+            if exc.errors:
+                body['errors'] = exc.errors
+            return JsonResponse(body, status=exc.status)
+
+    async def paginated_results(self, queryset, field_map, ordering, fields):
+        lookups = {field_map[name] for name in fields} | {name for name, _ in ordering}
+        page = await KeysetPaginator(self.page_size(), ordering=ordering).apaginate(
+            queryset.values(*lookups),
+            after=self.request.GET.get('after'),
+            before=self.request.GET.get('before')
+        )
+        return {
+            'results': [self.serialize(row, fields, field_map) for row in page],
+            'next': page.next_cursor,
+            'previous': page.previous_cursor,
+        }
+
+
+def counts_json(counts):
+    return {status: counts[status] for status in [*STATUSES, 'all']}
+
+
+class TaskOverviewApiView(AsyncApiView):
+    # GET: a page of visible tasks (?status=, ?fields=, ?limit=, ?after=/?before=) plus the tab counts
+    async def get(self, request):
+        queryset = Task.objects.visible_to(request.user).with_status(request.GET.get('status'))
+        tasks = await self.paginated_results(queryset, TASK_FIELDS, TASK_ORDERING, self.requested_fields(TASK_FIELDS))
+        counts = await auser_task_counts(request.user)
+        return JsonResponse({'counts': counts_json(counts), 'tasks': tasks})
+
+
+class GroupOverviewApiView(AsyncApiView):
+    # GET: the user's groups with their task counters
+    async def get(self, request):
+        fields = self.requested_fields(GROUP_FIELDS)
+        groups = user_groups(request.user).annotate(**{
+            f'{status}_count': Coalesce(f'task_counter__{status}', 0) for status in STATUSES
+        })
+        field_map = {**GROUP_FIELDS, **{f'{status}_count': f'{status}_count' for status in STATUSES}}
+        fields += [f'{status}_count' for status in STATUSES]
+        return JsonResponse(await self.paginated_results(groups, field_map, GROUP_ORDERING, fields))
+
+
+class GroupDetailOverviewApiView(AsyncApiView):
+    # GET: group, members, counters and the first page of its tasks. The membership check comes
+    # first, so nothing else is read for a group the user can't see.
+    async def get(self, request, pk):
+        group = await user_groups(request.user).filter(pk=pk).values(*GROUP_FIELDS.values()).afirst()
+        if group is None:
+            raise ApiError("Group not found.", status=404)
+        members = await self.members(pk)
+        counter = await agroup_task_counter(pk)
+        tasks = await self.paginated_results(
+            Task.objects.filter(group_id=pk), TASK_FIELDS, TASK_ORDERING, self.requested_fields(TASK_FIELDS)
+        )
+        return JsonResponse({
+            'group': self.serialize(group, GROUP_FIELDS, GROUP_FIELDS),
+            'members': members,
+            'counts': {**{status: getattr(counter, status) for status in STATUSES}, 'all': counter.total},
+            'tasks': tasks,
+        })
+
+    async def members(self, group_id):
+        rows = Membership.objects.filter(group_id=group_id).order_by('user__username').values(*MEMBER_FIELDS.values())
+        return [self.serialize(row, MEMBER_FIELDS, MEMBER_FIELDS) async for row in rows]
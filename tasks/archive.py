@@ -0,0 +1,54 @@
+# tasks/archive.py
+# Moves completed tasks that nobody has touched for TASK_ARCHIVE_AFTER_DAYS into ArchivedTask.
+# The hot table, its indexes and the TaskVisibility index then only grow with recent work, and
+# the default listings never read old completed rows. Archived tasks are read-only.
+
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+from tasks.models import ArchivedTask, Task, TaskEvent, TaskVisibility
+from .counters import apply_counter_deltas, group_status_counts, visible_status_counts
+from .events import task_events
+from .signals import bulk_delete
+
+ARCHIVED_FIELDS = (
+    'id', 'title', 'description', 'owner_id', 'assignee_id', 'group_id',
+    'status', 'due_date', 'created_at', 'updated_at',
+)
+
+
+def archivable_tasks(cutoff):
+    # updated_at stands in for the completion time: completing a task saves it, and a task that
+    # is edited after completion stays hot for another full period (task_completed_updated_idx)
+    return Task.objects.filter(status='completed', updated_at__lt=cutoff)
+
+
+def archive_completed_tasks(older_than_days=None, batch_size=1000):
+    # Move tasks in batches of one transaction each; safe to run repeatedly and concurrently.
+    # Returns the number of tasks archived.
+    days = settings.TASK_ARCHIVE_AFTER_DAYS if older_than_days is None else older_than_days
+    cutoff = timezone.now() - timedelta(days=days)
+    archived = 0
+    while True:
+        with transaction.atomic():
+            # Locked until deleted; a concurrent run skips these rows instead of waiting for them
+            rows = list(
+                archivable_tasks(cutoff).order_by('updated_at').select_for_update(skip_locked=True)
+                .values(*ARCHIVED_FIELDS)[:batch_size]
+            )
+            if not rows:
+                break
+            ids = [row['id'] for row in rows]
+            tasks = Task.objects.filter(id__in=ids)
+            visibility = TaskVisibility.objects.filter(task_id__in=ids)
+            apply_counter_deltas(visible_status_counts(visibility, sign=-1), group_status_counts(tasks, sign=-1))
+            ArchivedTask.objects.bulk_create([ArchivedTask(**row) for row in rows])
+            TaskEvent.objects.bulk_create(task_events('task.archived', [Task(**row) for row in rows]))
+            # The per-task delete handler is replaced by the set-based counter update above; the
+            # collector still cascades to the visibility rows and anything else referencing tasks
+            with bulk_delete(Task):
+                tasks.delete()
+            archived += len(rows)
+    return archived
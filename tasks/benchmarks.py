@@ -0,0 +1,74 @@
+# tasks/benchmarks.py
+# Summary statistics shared by the benchmark commands, and the JSON report format used to
+# compare runs (benchmark_views --json / --compare, benchmark_http --json).
+
+import json
+import statistics
+from datetime import datetime, timezone
+
+from django.db import connection
+
+
+def percentile(ordered, fraction):
+    # Nearest-rank percentile of an already sorted list
+    return ordered[min(len(ordered) - 1, round(fraction * (len(ordered) - 1)))]
+
+
+def summarize(timings, elapsed, errors=0, queries=None):
+    # timings: per-request milliseconds; elapsed: wall-clock seconds for the whole run
+    ordered = sorted(timings)
+    summary = {
+        'requests': len(ordered),
+        'errors': errors,
+        'throughput': round(len(ordered) / elapsed, 1) if elapsed else None,
+        'mean_ms': round(statistics.fmean(ordered), 2),
+        'p50_ms': round(statistics.median(ordered), 2),
+        'p95_ms': round(percentile(ordered, 0.95), 2),
+        'p99_ms': round(percentile(ordered, 0.99), 2),
+        'max_ms': round(ordered[-1], 2),
+    }
+    if queries:
+        summary['queries_mean'] = round(statistics.fmean(queries), 1)
+        summary['queries_max'] = max(queries)
+    return summary
+
+
+def format_summary(name, summary):
+    line = (
+        f"{name}: {summary['throughput']} req/s, p50 {summary['p50_ms']:.1f}ms, p95 {summary['p95_ms']:.1f}ms, "
+        f"p99 {summary['p99_ms']:.1f}ms, max {summary['max_ms']:.1f}ms"
+    )
+    if 'queries_mean' in summary:
+        line += f", {summary['queries_mean']:g} queries/request (max {summary['queries_max']})"
+        if summary['queries_max'] > summary.get('query_budget', summary['queries_max']):
+            line += f" over the budget of {summary['query_budget']}"
+    if summary['errors']:
+        line += f", {summary['errors']} error(s)"
+    return line
+
+
+def write_report(path, results, **meta):
+    report = {
+        'meta': {'created': datetime.now(timezone.utc).isoformat(), 'database': connection.vendor, **meta},
+        'results': results,
+    }
+    with open(path, 'w') as file:
+        json.dump(report, file, indent=2)
+
+
+def compare_reports(baseline_path, results):
+    # Lines comparing p95 latency and queries per request with an earlier --json report
+    with open(baseline_path) as file:
+        baseline = json.load(file)['results']
+    lines = []
+    for name, summary in results.items():
+        before = baseline.get(name)
+        if before is None:
+            lines.append(f"{name}: not in the baseline")
+            continue
+        change = (summary['p95_ms'] - before['p95_ms']) / before['p95_ms'] * 100 if before['p95_ms'] else 0
+        line = f"{name}: p95 {before['p95_ms']:.1f}ms -> {summary['p95_ms']:.1f}ms ({change:+.0f}%)"
+        if 'queries_mean' in summary and 'queries_mean' in before:
+            line += f", queries {before['queries_mean']:g} -> {summary['queries_mean']:g}"
+        lines.append(line)
+    return lines
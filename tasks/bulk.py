@@ -0,0 +1,103 @@
+# tasks/bulk.py
+
+import uuid
+from collections import Counter
+from datetime import date
+
+from django.db import models, transaction
+from django.utils import timezone
+from tasks.models import Task, TaskEvent
+from .counters import apply_counter_deltas, group_status_counts, status_change_deltas
+from .events import previous_audiences, record_task_events, task_events
+from .visibility import add_tasks_visibility, resync_tasks_visibility
+
+
+def bulk_create_tasks(tasks, batch_size=500):
+    # Insert many unsaved Task instances with the same rules Task.save() applies,
+    # keeping the visibility index in step. Returns the created tasks.
+    today = date.today()
+    for task in tasks:
+        task.apply_overdue_rule(today)
+    with transaction.atomic():
+        created = Task.objects.bulk_create(tasks, batch_size=batch_size)
+        add_tasks_visibility(created, batch_size=batch_size * 4)
+        apply_counter_deltas(group_deltas=Counter((task.group_id, task.status) for task in created if task.group_id))
+        TaskEvent.objects.bulk_create(task_events('task.created', created), batch_size=batch_size)
+    return created
+
+
+def parse_task_ids(task_ids):
+    # Returns (set of UUIDs, list of values that are not UUIDs)
+    parsed_ids, invalid_ids = set(), []
+    for task_id in task_ids:
+        try:
+            parsed_ids.add(task_id if isinstance(task_id, uuid.UUID) else uuid.UUID(str(task_id)))
+        except ValueError:
+            invalid_ids.append(task_id)
+    return parsed_ids, invalid_ids
+
+
+def complete_tasks(user, task_ids):
+    # Mark the given tasks completed for `user` with one permission query and one UPDATE.
+    # Anyone who can see a task (owner, assignee, group member or admin) may complete it,
+    # matching TaskMarkCompleteView. Returns a report of what happened to each id.
+    parsed_ids, invalid_ids = parse_task_ids(task_ids)
+
+    with transaction.atomic():
+        statuses = dict(
+            Task.objects.visible_to(user).filter(id__in=parsed_ids)
+            .order_by().select_for_update(of=('self',)).values_list('id', 'status')
+        )
+        to_complete = [task_id for task_id, status in statuses.items() if status != 'completed']
+        if to_complete:
+            completing = Task.objects.filter(id__in=to_complete)
+            deltas = status_change_deltas(completing, 'completed')
+            completing.update(status='completed', updated_at=timezone.now())
+            apply_counter_deltas(*deltas)
+            record_task_events('task.completed', to_complete)
+    return {
+        'completed': to_complete,
+        'already_completed': [task_id for task_id, status in statuses.items() if status == 'completed'],
+        'not_found': [task_id for task_id in parsed_ids if task_id not in statuses] + invalid_ids,
+    }
+
+
+def update_editable_tasks(user, task_ids, extra_condition=None, **changes):
+    # Apply `changes` to the tasks `user` may edit (owner or group admin, as TaskOwnerOrGroupAdminMixin)
+    # with one permission query and one UPDATE, then refresh their visibility rows.
+    # Returns {'updated': [...], 'skipped': [...]}.
+    parsed_ids, invalid_ids = parse_task_ids(task_ids)
+    permitted = Task.objects.filter(models.Q(owner=user) | models.Q(group__admin=user), id__in=parsed_ids)
+    if extra_condition is not None:
+        permitted = permitted.filter(extra_condition)
+
+    with transaction.atomic():
+        updated = list(permitted.order_by().select_for_update(of=('self',)).values_list('id', flat=True))
+        if updated:
+            changing = Task.objects.filter(id__in=updated)
+            previous = previous_audiences(updated)
+            if 'group' in changes:
+                group_deltas = group_status_counts(changing, sign=-1)
+            changing.update(updated_at=timezone.now(), **changes)
+            if 'group' in changes:
+                group_deltas.update(group_status_counts(changing))
+                apply_counter_deltas(group_deltas=group_deltas)
+            resync_tasks_visibility(updated)
+            record_task_events('task.updated', updated, previous)
+    return {
+        'updated': updated,
+        'skipped': [task_id for task_id in parsed_ids if task_id not in set(updated)] + invalid_ids,
+    }
+
+
+def reassign_tasks(user, task_ids, assignee):
+    # Group tasks can only be assigned to members of their group (as in TaskForm); None unassigns
+    eligible = None
+    if assignee is not None:
+        eligible = models.Q(group__isnull=True) | models.Q(group__members__user=assignee)
+    return update_editable_tasks(user, task_ids, extra_condition=eligible, assignee=assignee)
+
+
+def move_tasks(user, task_ids, group):
+    # Move tasks into `group` (None makes them personal); callers check the user may use `group`
+    return update_editable_tasks(user, task_ids, group=group)
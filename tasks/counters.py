@@ -0,0 +1,180 @@
+# tasks/counters.py
+# Incremental maintenance of UserTaskCounter / GroupTaskCounter. Every code path that changes a
+# task's status or group, or adds/removes TaskVisibility rows, turns the change into deltas keyed by
+# (user_id or group_id, status) and applies them here with one UPDATE ... SET x = x + CASE ... per table.
+
+from collections import Counter
+
+from django.db import models, transaction
+from tasks.models import Task, TaskVisibility, UserTaskCounter, GroupTaskCounter
+
+STATUSES = [value for value, _ in Task.STATUS_CHOICES]
+
+
+def visible_status_counts(visibility_rows, sign=1):
+    # Deltas for a set of TaskVisibility rows that are about to appear (sign=1) or disappear (sign=-1)
+    deltas = Counter()
+    for user_id, status, count in visibility_rows.order_by().values('user_id', 'task__status') \
+            .annotate(count=models.Count('pk')).values_list('user_id', 'task__status', 'count'):
+        deltas[user_id, status] += sign * count
+    return deltas
+
+
+def group_status_counts(tasks, sign=1):
+    # Same for the group counters, from a Task queryset
+    deltas = Counter()
+    for group_id, status, count in tasks.filter(group__isnull=False).order_by().values('group_id', 'status') \
+            .annotate(count=models.Count('pk')).values_list('group_id', 'status', 'count'):
+        deltas[group_id, status] += sign * count
+    return deltas
+
+
+def status_change_deltas(tasks, new_status):
+    # Deltas for moving every task in `tasks` to `new_status`; call before the UPDATE
+    user_deltas = visible_status_counts(TaskVisibility.objects.filter(task__in=tasks.values('pk')), sign=-1)
+    for (user_id, _), count in list(user_deltas.items()):
+        user_deltas[user_id, new_status] -= count
+    group_deltas = group_status_counts(tasks, sign=-1)
+    for (group_id, _), count in list(group_deltas.items()):
+        group_deltas[group_id, new_status] -= count
+    return user_deltas, group_deltas
+
+
+def _apply(model, key_field, deltas):
+    deltas = {key: delta for key, delta in deltas.items() if delta}
+    if not deltas:
+        return
+    # A single UPDATE with one CASE per status, however many keys and distinct deltas there are
+    changes = {}
+    for (key_id, status), delta in deltas.items():
+        changes.setdefault(status, []).append(models.When(**{key_field: key_id}, then=models.Value(delta)))
+    key_ids = {key_id for key_id, _ in deltas}
+    rows = model.objects.filter(**{f'{key_field}__in': key_ids})
+    increments = {
+        status: models.F(status) + models.Case(*whens, default=models.Value(0))
+        for status, whens in changes.items()
+    }
+    # Usually every row exists and that UPDATE is the only statement. It only applies when all of
+    # them do (counted in the same statement), so a missing row never leaves a partial update.
+    present = models.Subquery(
+        model.objects.filter(**{f'{key_field}__in': key_ids}).order_by()
+        .annotate(count=models.Func(models.F('pk'), function='COUNT', output_field=models.IntegerField()))
+        .values('count')
+    )
+    if rows.filter(models.lookups.Exact(present, len(key_ids))).update(**increments):
+        return
+    # Rows only need creating for keys that gain tasks
+    model.objects.bulk_create(
+        [model(**{key_field: key_id}) for key_id in {key_id for (key_id, _), delta in deltas.items() if delta > 0}],
+        ignore_conflicts=True
+    )
+    rows.update(**increments)
+
+
+def apply_counter_deltas(user_deltas=None, group_deltas=None):
+    # Callers that change several tables wrap this in their own transaction
+    _apply(UserTaskCounter, 'user_id', user_deltas or {})
+    _apply(GroupTaskCounter, 'group_id', group_deltas or {})
+
+
+def task_change_deltas(old_status, old_user_ids, old_group_id, new_status, new_user_ids, new_group_id):
+    # Deltas for one task moving from its old (status, visible users, group) to the new one
+    user_deltas, group_deltas = Counter(), Counter()
+    for user_id in old_user_ids:
+        user_deltas[user_id, old_status] -= 1
+    for user_id in new_user_ids:
+        user_deltas[user_id, new_status] += 1
+    if old_group_id:
+        group_deltas[old_group_id, old_status] -= 1
+    if new_group_id:
+        group_deltas[new_group_id, new_status] += 1
+    return user_deltas, group_deltas
+
+
+def expected_counters():
+    # The source of truth, computed from scratch
+    users = {}
+    for (user_id, status), count in visible_status_counts(TaskVisibility.objects.all()).items():
+        users.setdefault(user_id, dict.fromkeys(STATUSES, 0))[status] = count
+    groups = {}
+    for (group_id, status), count in group_status_counts(Task.objects.all()).items():
+        groups.setdefault(group_id, dict.fromkeys(STATUSES, 0))[status] = count
+    return users, groups
+
+
+def find_counter_drift():
+    # Returns ({user_id: expected counts}, {group_id: expected counts}) for rows that are wrong
+    expected_users, expected_groups = expected_counters()
+    drift = []
+    for model, key_field, expected in (
+        (UserTaskCounter, 'user_id', expected_users),
+        (GroupTaskCounter, 'group_id', expected_groups),
+    ):
+        wrong = {}
+        actual = {row[key_field]: row for row in model.objects.values(key_field, *STATUSES)}
+        for key_id in set(expected) | set(actual):
+            wanted = expected.get(key_id, dict.fromkeys(STATUSES, 0))
+            row = actual.get(key_id)
+            if row is None and not any(wanted.values()):
+                continue
+            if row is None or any(row[status] != wanted[status] for status in STATUSES):
+                wrong[key_id] = wanted
+        drift.append(wrong)
+    return tuple(drift)
+
+
+def repair_counters(user_drift, group_drift, batch_size=1000):
+    with transaction.atomic():
+        for model, key_field, drift in (
+            (UserTaskCounter, 'user_id', user_drift),
+            (GroupTaskCounter, 'group_id', group_drift),
+        ):
+            model.objects.bulk_create(
+                [model(**{key_field: key_id}, **counts) for key_id, counts in drift.items()],
+                batch_size=batch_size,
+                update_conflicts=True,
+                unique_fields=[key_field.removesuffix('_id')],
+                update_fields=STATUSES
+            )
+
+
+def _latest_change(tasks):
+    return models.Subquery(tasks.order_by('-updated_at').values('updated_at')[:1])
+
+
+def _user_counter(user):
+    return UserTaskCounter.objects.filter(user=user).annotate(
+        last_change=_latest_change(Task.objects.filter(visibility__user=models.OuterRef('user')))
+    )
+
+
+def _counts(counter):
+    counts = {status: getattr(counter, status) for status in STATUSES}
+    counts['all'] = counter.total
+    counts['last_change'] = getattr(counter, 'last_change', None)
+    return counts
+
+
+def user_task_counts(user):
+    # Tab badges for the task list ('all' is the sum) plus the latest updated_at among the visible
+    # tasks, read together in one query; tasks/etags.py builds the page validator from the same dict
+    return _counts(_user_counter(user).first() or UserTaskCounter(user=user))
+
+
+async def auser_task_counts(user):
+    return _counts(await _user_counter(user).afirst() or UserTaskCounter(user=user))
+
+
+def _group_counter(group):
+    return GroupTaskCounter.objects.filter(group=group).annotate(
+        last_change=_latest_change(Task.objects.filter(group=models.OuterRef('group')))
+    )
+
+
+def group_task_counter(group):
+    # GroupTaskCounter for the group detail page, with last_change as above
+    return _group_counter(group).first() or GroupTaskCounter(group_id=getattr(group, 'pk', group))
+
+
+async def agroup_task_counter(group):
+    return await _group_counter(group).afirst() or GroupTaskCounter(group_id=getattr(group, 'pk', group))
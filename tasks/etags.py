@@ -0,0 +1,74 @@
+# tasks/etags.py
+# ETag validators for conditional GETs of the task list and group detail pages. The validator is
+# the page's counter row read together with the latest updated_at of its tasks (one query): edits
+# bump updated_at, while status changes, additions, removals and visibility changes move a counter.
+# The result is kept on the request so a full render does not read it again.
+
+import hashlib
+from datetime import date
+
+from django.conf import settings
+from django.contrib.messages import get_messages
+from .agenda import calendar_version, feed_user, feed_window
+from .counters import group_task_counter, user_task_counts
+from .forms import user_group_choices
+from .fragments import group_fragment_versions
+
+
+def page_etag(request, *parts):
+    # None disables the conditional response; pending flash messages must reach the user
+    if len(get_messages(request)):
+        return None
+    # The page embeds a CSRF token, so a new session or token must not get a 304
+    session_parts = (
+        request.user.pk,
+        request.session.session_key,
+        request.COOKIES.get(settings.CSRF_COOKIE_NAME),
+        request.GET.urlencode(),
+    )
+    return hashlib.md5(repr(session_parts + parts).encode(), usedforsecurity=False).hexdigest()
+
+
+def task_list_etag(request, *args, **kwargs):
+    if not request.user.is_authenticated:
+        return None
+    # Rows show group names, so the versions of the user's groups are part of the validator
+    group_ids = [group_id for group_id, _ in user_group_choices(request.user)]
+    versions = sorted(group_fragment_versions(group_ids).items())
+    request.task_counts = user_task_counts(request.user)
+    return page_etag(request, 'task_list', sorted(request.task_counts.items()), versions)
+
+
+def group_detail_etag(request, pk, *args, **kwargs):
+    if not request.user.is_authenticated:
+        return None
+    if pk not in {group_id for group_id, _ in user_group_choices(request.user)}:
+        # Let the view answer (404) for groups the user cannot see
+        return None
+    version = group_fragment_versions([pk])[pk]
+    request.group_task_counter = counter = group_task_counter(pk)
+    return page_etag(
+        request, 'group_detail', pk, version,
+        counter.ongoing, counter.completed, counter.overdue, counter.last_change
+    )
+
+
+def task_calendar_etag(request, *args, **kwargs):
+    if not request.user.is_authenticated:
+        return None
+    # Kept for the view: the calendar cache key uses the same version (tasks/agenda.py)
+    request.calendar_version = calendar_version(request.user)
+    return page_etag(request, 'task_calendar', date.today(), request.calendar_version)
+
+
+def calendar_feed_etag(request, token, *args, **kwargs):
+    # Calendar clients poll the feed; unchanged tasks answer 304 after the counter and group
+    # version reads. No session parts: the feed is addressed by its token, not a login.
+    request.feed_user = user = feed_user(token)
+    if user is None:
+        return None
+    request.calendar_version = calendar_version(user)
+    return hashlib.md5(
+        repr(('calendar_feed', user.pk, feed_window(), request.calendar_version)).encode(), usedforsecurity=False
+    ).hexdigest()
+
@@ -0,0 +1,279 @@
+# tasks/events.py
+# Realtime updates over Server-Sent Events.
+#
+# Writers: every path that creates, changes or deletes tasks or memberships adds TaskEvent rows
+# (a transactional outbox) next to the change: the Task/Membership signals for single saves, and
+# the bulk helpers, overdue sweep and membership updates for set-based changes.
+#
+# Delivery: one EventBroker per worker process polls the outbox every TASK_EVENTS_POLL_INTERVAL
+# seconds and fans new rows out to the open streams through in-memory queues. An idle stream is
+# a coroutine waiting on its queue, with no database connection and no polling of its own, so a
+# process can hold many of them; the database sees one small query per process per interval.
+
+import asyncio
+import contextvars
+import json
+import logging
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.db import DatabaseError, connection, connections, models
+from tasks.models import Task, TaskEvent
+from users.models import Group
+
+logger = logging.getLogger('tasks.events')
+
+TASK_PAYLOAD_FIELDS = ('id', 'title', 'status', 'due_date', 'owner', 'assignee', 'group')
+
+
+def task_payload(task):
+    return {
+        'id': str(task.pk),
+        'title': task.title,
+        'status': task.status,
+        'status_display': task.get_status_display(),
+        'due_date': task.due_date.isoformat() if task.due_date else None,
+        'assignee_id': task.assignee_id,
+        'group_id': str(task.group_id) if task.group_id else None,
+    }
+
+
+def audience(group_id, owner_id, assignee_id):
+    # Channel targets for a task: its group, or the owner and assignee of a personal task
+    if group_id:
+        return [{'group_id': group_id}]
+    return [{'user_id': user_id} for user_id in {owner_id, assignee_id} if user_id]
+
+
+def task_events(kind, tasks):
+    return [
+        TaskEvent(kind=kind, payload=task_payload(task), **target)
+        for task in tasks
+        for target in audience(task.group_id, task.owner_id, task.assignee_id)
+    ]
+
+
+def removal_events(previous, tasks):
+    # 'task.removed' for channels that could see a task before a change and can't any more.
+    # `previous` maps task id -> (group_id, owner_id, assignee_id) from before the change.
+    events = []
+    for task in tasks:
+        if task.pk not in previous:
+            continue
+        before = audience(*previous[task.pk])
+        after = audience(task.group_id, task.owner_id, task.assignee_id)
+        events.extend(
+            TaskEvent(kind='task.removed', payload={'id': str(task.pk)}, **target)
+            for target in before if target not in after
+        )
+    return events
+
+
+def record_task_events(kind, task_ids, previous=None):
+    # Events for tasks changed by a set-based UPDATE; one SELECT and one INSERT
+    tasks = list(Task.objects.filter(id__in=task_ids).order_by().only(*TASK_PAYLOAD_FIELDS))
+    TaskEvent.objects.bulk_create(task_events(kind, tasks) + removal_events(previous or {}, tasks))
+
+
+def previous_audiences(task_ids):
+    return {
+        task_id: (group_id, owner_id, assignee_id)
+        for task_id, group_id, owner_id, assignee_id
+        in Task.objects.filter(id__in=task_ids).values_list('id', 'group_id', 'owner_id', 'assignee_id')
+    }
+
+
+def record_membership_events(kind, group_id, users):
+    # `users`: (user_id, username) pairs. The group's channel updates its member list; the user's
+    # own channel tells their open streams to reconnect with the new set of groups.
+    TaskEvent.objects.bulk_create([
+        event
+        for user_id, username in users
+        for event in (
+            TaskEvent(kind=kind, group_id=group_id, payload={'user_id': user_id, 'username': username}),
+            TaskEvent(kind=kind, user_id=user_id, payload={'group_id': str(group_id)}),
+        )
+    ])
+
+
+def prune_task_events(older_than):
+    return TaskEvent.objects.filter(created_at__lt=older_than).delete()[0]
+
+
+# Streams
+
+def format_event(event):
+    data = {**event.payload, 'group_id': str(event.group_id) if event.group_id else event.payload.get('group_id')}
+    return f"id: {event.id}\nevent: {event.kind}\ndata: {json.dumps(data)}\n\n"
+
+
+def channel_filter(channels):
+    condition = models.Q(pk__in=[])
+    for channel in channels:
+        kind, _, key = channel.partition(':')
+        condition |= models.Q(**{f'{kind}_id': key})
+    return condition
+
+
+async def user_channels(user):
+    group_ids = Group.objects.filter(models.Q(admin=user) | models.Q(members__user=user)).distinct().values_list('id', flat=True)
+    return [f'user:{user.pk}'] + [f'group:{group_id}' async for group_id in group_ids]
+
+
+async def missed_events(channels, last_event_id=None, since=None):
+    # Events a reconnecting client missed (after its Last-Event-ID), or that happened between
+    # rendering the page (`since`, epoch seconds) and opening the stream.
+    # Returns (events, complete); complete is False when there were more than the replay limit.
+    events = TaskEvent.objects.filter(channel_filter(channels))
+    if last_event_id is not None:
+        events = events.filter(id__gt=last_event_id)
+    elif since is not None:
+        events = events.filter(created_at__gte=datetime.fromtimestamp(since, tz=timezone.utc))
+    else:
+        return [], True
+    limit = settings.TASK_EVENTS_REPLAY_LIMIT
+    rows = [event async for event in events.order_by('id')[:limit + 1]]
+    return rows[:limit], len(rows) <= limit
+
+
+async def latest_event_id():
+    return (await TaskEvent.objects.aaggregate(last=models.Max('id')))['last'] or 0
+
+
+def release_connections():
+    # A stream can stay open for hours; it shouldn't keep the connection it used for the replay.
+    # Connections inside a transaction (tests) are left alone.
+    for conn in connections.all(initialized_only=True):
+        if not conn.in_atomic_block:
+            conn.close()
+
+
+OVERFLOW = object()
+
+
+class EventBroker:
+    # Per-process fan-out from the outbox to the open streams. Polling runs on a dedicated thread
+    # (one database connection per process) and only while someone is subscribed.
+    queue_size = 100
+    batch_size = 500
+    max_gap = 1000
+
+    def __init__(self):
+        self.subscribers = {}  # channel -> set of queues
+        self.poller = None
+        self.ready = None
+        self.executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='task-events')
+        self.last_id = None
+        # Ids are allocated at INSERT but become visible at COMMIT, so a slow transaction can commit
+        # below last_id. Skipped ids are re-checked for TASK_EVENTS_LOOKBACK seconds (id -> first
+        # noticed); larger jumps are rolled-back bulk inserts and are not tracked.
+        self.gaps = {}
+
+    def subscribe(self, channels):
+        queue = asyncio.Queue(self.queue_size)
+        for channel in channels:
+            self.subscribers.setdefault(channel, set()).add(queue)
+        loop = asyncio.get_running_loop()
+        if self.poller is None or self.poller.done() or self.poller.get_loop() is not loop:
+            self.ready = asyncio.Event()
+            # A fresh context: the poller must not inherit the subscribing request's executor
+            self.poller = loop.create_task(self.poll(), context=contextvars.Context())
+        return queue
+
+    async def wait_ready(self):
+        # Replays must start after the poller has its starting point, or events between the two are lost
+        await self.ready.wait()
+
+    def unsubscribe(self, queue, channels):
+        for channel in channels:
+            queues = self.subscribers.get(channel)
+            if queues is not None:
+                queues.discard(queue)
+                if not queues:
+                    del self.subscribers[channel]
+
+    async def poll(self):
+        fetch = sync_to_async(self.fetch, thread_sensitive=False, executor=self.executor)
+        self.last_id = None
+        while self.subscribers:
+            self.dispatch(await fetch())
+            if self.last_id is not None:
+                self.ready.set()
+            await asyncio.sleep(settings.TASK_EVENTS_POLL_INTERVAL)
+
+    def fetch(self):
+        try:
+            if self.last_id is None:
+                self.last_id = TaskEvent.objects.aggregate(last=models.Max('id'))['last'] or 0
+                self.gaps = {}
+                return []
+            rows = list(
+                TaskEvent.objects.filter(models.Q(id__gt=self.last_id) | models.Q(id__in=list(self.gaps)))
+                .order_by('id')[:self.batch_size]
+            )
+        except DatabaseError:
+            logger.exception("Polling task events failed")
+            connection.close()
+            return []
+        now = time.monotonic()
+        for row in rows:
+            if row.id in self.gaps:
+                del self.gaps[row.id]
+            elif row.id > self.last_id:
+                if row.id - self.last_id <= self.max_gap:
+                    self.gaps.update(dict.fromkeys(range(self.last_id + 1, row.id), now))
+                self.last_id = row.id
+        cutoff = now - settings.TASK_EVENTS_LOOKBACK
+        self.gaps = {event_id: noticed for event_id, noticed in self.gaps.items() if noticed >= cutoff}
+        return rows
+
+    def dispatch(self, events):
+        for event in events:
+            for queue in list(self.subscribers.get(event.channel, ())):
+                try:
+                    queue.put_nowait(event)
+                except asyncio.QueueFull:
+                    # A stream that can't keep up is closed; the client reconnects with
+                    # Last-Event-ID and catches up from the outbox
+                    while not queue.empty():
+                        queue.get_nowait()
+                    queue.put_nowait(OVERFLOW)
+
+
+broker = EventBroker()
+
+
+async def event_stream(channels, user_id, last_event_id=None, since=None):
+    # Body of an SSE response (ASGI). Subscribing comes before the replay query, so an event
+    # committed in between arrives twice at most, never zero times; ids dedupe it.
+    queue = broker.subscribe(channels)
+    try:
+        yield f"retry: {settings.TASK_EVENTS_RETRY_MS}\n\n"
+        await broker.wait_ready()
+        replay, complete = await missed_events(channels, last_event_id, since)
+        replayed_ids = {event.id for event in replay}
+        for event in replay:
+            yield format_event(event)
+        if not complete:
+            # Too much was missed to patch the page; the client asks the user to reload
+            yield "event: reset\ndata: {}\n\n"
+        await sync_to_async(release_connections)()
+        while True:
+            try:
+                event = await asyncio.wait_for(queue.get(), settings.TASK_EVENTS_HEARTBEAT)
+            except asyncio.TimeoutError:
+                yield ": keepalive\n\n"
+                continue
+            if event is OVERFLOW:
+                break
+            if event.id in replayed_ids:
+                continue
+            yield format_event(event)
+            if event.kind.startswith('member.') and event.user_id == user_id:
+                # The user's groups changed: end the stream so the client reconnects with new channels
+                break
+    finally:
+        broker.unsubscribe(queue, channels)
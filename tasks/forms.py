@@ -1,12 +1,71 @@
 # tasks/forms.py
 
+import codecs
+import uuid
+
 from django import forms
-from tasks.models import Task
-from users.models import Group, Membership
+from django.core.cache import cache
+from django.db import models
+from django.urls import reverse_lazy
+from tasks.models import Task, TaskRecurrence
+from users.models import Group
 from django.contrib.auth import get_user_model
 
 User = get_user_model()
 
+GROUP_CHOICES_CACHE_KEY = 'task_form_groups:{}'
+GROUP_CHOICES_CACHE_TIMEOUT = 60 * 60
+
+
+# (id, name) pairs of the groups a user belongs to or admins, cached per user for rendering.
+# Invalidated from tasks/signals.py whenever memberships or groups change; permission checks use
+# user_groups() instead, so a stale entry can only show an outdated option, never accept it.
+def user_group_choices(user):
+    key = GROUP_CHOICES_CACHE_KEY.format(user.pk)
+    choices = cache.get(key)
+    if choices is None:
+        choices = list(
+            Group.objects.filter(models.Q(admin=user) | models.Q(members__user=user))
+            .distinct().order_by('name').values_list('id', 'name')
+        )
+        cache.set(key, choices, GROUP_CHOICES_CACHE_TIMEOUT)
+    return choices
+
+
+def user_groups(user):
+    # Groups a user may put tasks into, read from the database when a form validates
+    return Group.objects.filter(models.Q(admin=user) | models.Q(members__user=user)).distinct()
+
+
+def invalidate_user_group_choices(user_ids):
+    cache.delete_many([GROUP_CHOICES_CACHE_KEY.format(user_id) for user_id in user_ids])
+
+
+# Select that only renders the empty choice and the current selection; the remaining options
+# are fetched page by page from an autocomplete endpoint (see task_form.html), so the
+# page never contains every user in the system. Validation still runs against the field's queryset.
+class AutocompleteSelect(forms.Select):
+    def __init__(self, url, attrs=None):
+        super().__init__(attrs)
+        self.url = url
+
+    def get_context(self, name, value, attrs):
+        context = super().get_context(name, value, attrs)
+        context['widget']['attrs']['data-autocomplete-url'] = str(self.url)
+        return context
+
+    def optgroups(self, name, value, attrs=None):
+        selected = [v for v in value if v not in (None, '')]
+        all_choices = self.choices
+        choices = [('', all_choices.field.empty_label or '')]
+        if selected:
+            choices += [all_choices.choice(obj) for obj in all_choices.queryset.filter(pk__in=selected)]
+        self.choices = choices
+        try:
+            return super().optgroups(name, value, attrs)
+        finally:
+            self.choices = all_choices
+
 # Form for creating and updating individual tasks
 class TaskForm(forms.ModelForm):
     # Overriding the queryset for assignee and group to make them optional
@@ -14,7 +73,7 @@ class TaskForm(forms.ModelForm):
         queryset=User.objects.all().order_by('username'), # Default: all users
         required=False,
         empty_label="Unassigned",
-        widget=forms.Select(attrs={'class': 'form-control'})
+        widget=AutocompleteSelect(reverse_lazy('user_autocomplete'), attrs={'class': 'form-control'})
     )
     group = forms.ModelChoiceField(
         queryset=Group.objects.all().order_by('name'), # Default: all groups
@@ -52,27 +111,117 @@ class TaskForm(forms.ModelForm):
         super().__init__(*args, **kwargs)
 
         if self.request_user:
-            # Filter groups for the current user (admin or member)
-            user_groups_as_member_ids = Membership.objects.filter(user=self.request_user).values_list('group__id', flat=True)
-            user_groups_as_admin_ids = Group.objects.filter(admin=self.request_user).values_list('id', flat=True)
-            allowed_group_ids = list(set(list(user_groups_as_member_ids) + list(user_groups_as_admin_ids)))
-            self.fields['group'].queryset = Group.objects.filter(id__in=allowed_group_ids).order_by('name')
+            # Groups for the current user (admin or member). The widget renders the cached choices;
+            # the queryset checks the submitted group against the database when a POST validates.
+            group_choices = user_group_choices(self.request_user)
+            self.fields['group'].queryset = user_groups(self.request_user)
+            self.fields['group'].widget.choices = [('', self.fields['group'].empty_label)] + group_choices
 
             # If a specific group is provided (e.g., when creating a task from GroupDetailView)
             if self.specific_group:
                 # Set the initial group for the form and disable the field
                 self.fields['group'].initial = self.specific_group
                 self.fields['group'].widget.attrs['disabled'] = 'disabled'
-                # Filter assignees to only members of this specific group
-                group_member_ids = Membership.objects.filter(group=self.specific_group).values_list('user__id', flat=True)
-                self.fields['assignee'].queryset = User.objects.filter(id__in=group_member_ids).order_by('username')
-            elif self.instance.pk and self.instance.group: # If editing an existing task with a group
-                 # Filter assignees to only members of the task's current group
-                group_member_ids = Membership.objects.filter(group=self.instance.group).values_list('user__id', flat=True)
-                self.fields['assignee'].queryset = User.objects.filter(id__in=group_member_ids).order_by('username')
+                assignee_group_id = self.specific_group.pk
             else:
-                # For personal tasks or when no group is selected, assignee can be any user (or self)
-                self.fields['assignee'].queryset = User.objects.all().order_by('username')
+                # If editing an existing task with a group
+                assignee_group_id = self.instance.group_id if self.instance.pk else None
+            if assignee_group_id:
+                # Filter assignees to only members of this group
+                self.fields['assignee'].queryset = User.objects.filter(
+                    group_memberships__group_id=assignee_group_id
+                ).order_by('username')
+                self.fields['assignee'].widget.url = f"{reverse_lazy('user_autocomplete')}?group={assignee_group_id}"
+            # For personal tasks or when no group is selected, assignee can be any user (or self)
+
+
+# Optional schedule shown under TaskForm when creating a task (prefix 'repeat'). The task's due
+# date is the first occurrence; tasks/recurrence.py creates the following ones.
+class TaskRecurrenceForm(forms.Form):
+    frequency = forms.ChoiceField(
+        choices=[('', 'Does not repeat')] + TaskRecurrence.FREQUENCY_CHOICES,
+        required=False,
+        label='Repeat',
+        widget=forms.Select(attrs={'class': 'form-control'})
+    )
+    interval = forms.IntegerField(
+        min_value=1, max_value=365, initial=1, required=False, label='Every',
+        help_text="Number of days, weeks or months between occurrences.",
+        widget=forms.NumberInput(attrs={'class': 'form-control'})
+    )
+    weekdays = forms.TypedMultipleChoiceField(
+        choices=TaskRecurrence.WEEKDAY_CHOICES,
+        coerce=int,
+        required=False,
+        label='On',
+        help_text="Weekly only; defaults to the due date's weekday.",
+        widget=forms.CheckboxSelectMultiple
+    )
+    until = forms.DateField(
+        required=False,
+        label='Until',
+        widget=forms.DateInput(attrs={'type': 'date', 'class': 'form-control'})
+    )
+
+    def clean_interval(self):
+        return self.cleaned_data['interval'] or 1
+
+    def check_start(self, due_date):
+        # Called with the task's due date once both forms are valid; returns False on errors
+        if not self.cleaned_data['frequency']:
+            return True
+        if not due_date:
+            self.add_error('frequency', "A repeating task needs a due date; the series starts on it.")
+        elif self.cleaned_data['until'] and self.cleaned_data['until'] < due_date:
+            self.add_error('until', "The series cannot end before the due date.")
+        return not self.errors
+
+
+# Several task ids posted as repeated hidden inputs/checkboxes
+class MultipleUUIDField(forms.Field):
+    widget = forms.MultipleHiddenInput
+
+    def to_python(self, value):
+        if not value:
+            return []
+        try:
+            return [uuid.UUID(str(item)) for item in value]
+        except ValueError:
+            raise forms.ValidationError("Invalid task selection.", code='invalid')
+
+
+# Bulk actions on the tasks selected in the task list or group detail page
+class TaskBulkActionForm(forms.Form):
+    ACTION_CHOICES = [
+        ('complete', 'Mark complete'),
+        ('reassign', 'Reassign to'),
+        ('move', 'Move to group'),
+    ]
+    action = forms.ChoiceField(choices=ACTION_CHOICES, widget=forms.Select(attrs={'class': 'form-select form-select-sm'}))
+    tasks = MultipleUUIDField(error_messages={'required': "Select at least one task."})
+    assignee = forms.ModelChoiceField(
+        queryset=User.objects.all(),
+        required=False,
+        empty_label="Unassigned",
+        widget=AutocompleteSelect(reverse_lazy('user_autocomplete'), attrs={'class': 'form-select form-select-sm'})
+    )
+    group = forms.ModelChoiceField(
+        queryset=Group.objects.none(),
+        required=False,
+        empty_label="Personal Task",
+        widget=forms.Select(attrs={'class': 'form-select form-select-sm'})
+    )
+
+    def __init__(self, *args, **kwargs):
+        self.request_user = kwargs.pop('request_user')
+        group = kwargs.pop('group', None)
+        super().__init__(*args, **kwargs)
+        # Move targets: only the user's own groups, rendered and validated as in TaskForm
+        group_choices = user_group_choices(self.request_user)
+        self.fields['group'].queryset = user_groups(self.request_user)
+        self.fields['group'].widget.choices = [('', self.fields['group'].empty_label)] + group_choices
+        if group:
+            self.fields['assignee'].widget.url = f"{reverse_lazy('user_autocomplete')}?group={group.pk}"
 
 
 # Form specifically for marking a task as complete (or changing status)
@@ -84,23 +233,63 @@ class TaskStatusForm(forms.ModelForm):
             'status': forms.Select(attrs={'class': 'form-control'}),
         }
 
-# Form for adding/removing members from a group
+# Form for adding/removing members from a group.
+# Only the submitted ids are validated (one query per field); the page renders the current
+# page of members and search results itself instead of a checkbox for every user.
 class GroupMemberForm(forms.Form):
-    # Use CheckboxSelectMultiple to allow selecting multiple users
-    members = forms.ModelMultipleChoiceField(
-        queryset=User.objects.all().order_by('username'),
-        widget=forms.CheckboxSelectMultiple,
-        required=False, # Allows removing all members if desired
-        help_text="Select users to add/remove from the group."
+    add = forms.ModelMultipleChoiceField(
+        queryset=User.objects.none(),
+        required=False,
+        help_text="Users to add to the group."
+    )
+    remove = forms.ModelMultipleChoiceField(
+        queryset=User.objects.none(),
+        required=False,
+        help_text="Members to remove from the group."
     )
 
     def __init__(self, *args, **kwargs):
         self.group = kwargs.pop('group', None)
         super().__init__(*args, **kwargs)
         if self.group:
-            # Set initial selected members to current group members
-            current_members = self.group.members.values_list('user', flat=True)
-            self.fields['members'].initial = list(current_members)
-            # Exclude the group admin from the selectable members, as admin is always a member
-            self.fields['members'].queryset = User.objects.exclude(id=self.group.admin.id).order_by('username')
+            # The group admin is always a member and can be neither added nor removed
+            self.fields['add'].queryset = User.objects.exclude(
+                group_memberships__group=self.group
+            ).exclude(id=self.group.admin_id)
+            self.fields['remove'].queryset = User.objects.filter(
+                group_memberships__group=self.group
+            ).exclude(id=self.group.admin_id)
+
+
+# Upload form for TaskImportView; the format defaults to the file extension
+class TaskImportForm(forms.Form):
+    file = forms.FileField(help_text="CSV with a header row, or NDJSON (one JSON object per line).")
+    format = forms.ChoiceField(
+        choices=[('', 'Detect from file name'), ('csv', 'CSV'), ('ndjson', 'NDJSON')],
+        required=False
+    )
+
+    def clean_file(self):
+        # The importer commits a chunk at a time, so a decoding error halfway through would leave the
+        # earlier rows imported; the whole upload is checked first, one chunk at a time
+        upload = self.cleaned_data['file']
+        decoder = codecs.getincrementaldecoder('utf-8')()
+        try:
+            for chunk in upload.chunks():
+                decoder.decode(chunk)
+            decoder.decode(b'', final=True)
+        except UnicodeDecodeError:
+            raise forms.ValidationError("The file is not valid UTF-8 text.")
+        finally:
+            upload.seek(0)
+        return upload
 
+    def clean(self):
+        cleaned_data = super().clean()
+        upload = cleaned_data.get('file')
+        if upload and not cleaned_data.get('format'):
+            extension = upload.name.rsplit('.', 1)[-1].lower()
+            if extension not in ('csv', 'ndjson'):
+                raise forms.ValidationError("Cannot tell the file format; please choose one.")
+            cleaned_data['format'] = extension
+        return cleaned_data
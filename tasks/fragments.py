@@ -0,0 +1,80 @@
+# tasks/fragments.py
+# Cached template fragments ({% fragmentcache %} in tasks/templatetags/fragments.py).
+# Fragment keys carry everything the markup depends on: task rows vary on the task's updated_at,
+# group blocks on a per-group version that is bumped whenever the group, its admin or its members
+# change. Stale fragments are never invalidated in place; they just stop being asked for.
+
+import threading
+import time
+from collections import Counter
+
+from django.conf import settings
+from django.core.cache import caches
+
+GROUP_VERSION_KEY = 'group_fragment_version:{}'
+
+
+def fragment_cache():
+    return caches[settings.FRAGMENT_CACHE_ALIAS]
+
+
+def group_fragment_versions(group_ids):
+    # {group_id: version} with one cache round trip; groups without a version get a fresh one
+    keys = {GROUP_VERSION_KEY.format(group_id): group_id for group_id in set(group_ids) if group_id}
+    cache = fragment_cache()
+    found = cache.get_many(keys)
+    missing = {key: time.time_ns() for key in keys if key not in found}
+    if missing:
+        cache.set_many(missing, timeout=None)
+        found.update(missing)
+    return {keys[key]: version for key, version in found.items()}
+
+
+def bump_group_fragment_versions(group_ids):
+    # A new timestamp rather than incr(): works for evicted keys and never reuses an old version
+    group_ids = [group_id for group_id in group_ids if group_id]
+    if group_ids:
+        version = time.time_ns()
+        fragment_cache().set_many({GROUP_VERSION_KEY.format(group_id): version for group_id in group_ids}, timeout=None)
+
+
+def annotate_group_versions(tasks):
+    # Sets task.group_fragment_version on each task for the task row cache keys
+    versions = group_fragment_versions(task.group_id for task in tasks)
+    for task in tasks:
+        task.group_fragment_version = versions.get(task.group_id, 0)
+    return tasks
+
+
+# Per-process hit/miss totals by fragment name; per-request counts go to the request metrics log line
+class FragmentStats:
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.hits = Counter()
+        self.misses = Counter()
+
+    def record(self, name, hit):
+        with self.lock:
+            (self.hits if hit else self.misses)[name] += 1
+
+    def snapshot(self):
+        with self.lock:
+            return {
+                name: {'hits': self.hits[name], 'misses': self.misses[name]}
+                for name in sorted(set(self.hits) | set(self.misses))
+            }
+
+    def reset(self):
+        with self.lock:
+            self.hits.clear()
+            self.misses.clear()
+
+
+stats = FragmentStats()
+
+
+def record_fragment_access(request, name, hit):
+    stats.record(name, hit)
+    if request is not None:
+        attribute = '_fragment_hits' if hit else '_fragment_misses'
+        setattr(request, attribute, getattr(request, attribute, 0) + 1)
@@ -0,0 +1,180 @@
+# tasks/importer.py
+# Bulk task import from CSV or NDJSON. Rows are read lazily and handled in chunks: each chunk
+# resolves its usernames, groups and memberships with one query apiece, is validated in memory and
+# inserted through bulk_create_tasks() in its own transaction. Columns follow tasks/export.py, so an
+# export can be imported again (id, created_at and updated_at are ignored).
+
+import csv
+import json
+import time
+from datetime import date
+from itertools import islice
+
+from django.contrib.auth import get_user_model
+from django.core.exceptions import ValidationError
+from django.db import models
+from tasks.models import Task
+from users.models import Group, Membership
+from .bulk import bulk_create_tasks, parse_task_ids
+
+User = get_user_model()
+
+IMPORT_FORMATS = ('csv', 'ndjson')
+DEFAULT_BATCH_SIZE = 1000
+STATUSES = {value for value, _ in Task.STATUS_CHOICES}
+TITLE_MAX_LENGTH = Task._meta.get_field('title').max_length
+# Columns read by the importer; NDJSON values must be strings (or null) like their CSV counterparts
+IMPORT_FIELDS = ('title', 'description', 'status', 'due_date', 'owner', 'assignee', 'group')
+
+
+def read_rows(lines, import_format):
+    # Yields (line number, row dict) pairs; unparsable NDJSON lines come through as strings
+    if import_format == 'csv':
+        reader = csv.DictReader(lines)
+        for row in reader:
+            yield reader.line_num, row
+        return
+    for number, line in enumerate(lines, start=1):
+        if not line.strip():
+            continue
+        try:
+            yield number, json.loads(line)
+        except ValueError:
+            yield number, line
+
+
+def non_text_fields(row):
+    # NDJSON numbers, lists or objects where the importer expects text
+    return [field for field in IMPORT_FIELDS if row.get(field) is not None and not isinstance(row[field], str)]
+
+
+class ImportReport:
+    def __init__(self):
+        self.created = 0
+        self.errors = []  # (line number, message)
+        self.elapsed = 0.0
+
+    @property
+    def rows_per_second(self):
+        return self.created / self.elapsed if self.elapsed else 0.0
+
+    def __str__(self):
+        return (
+            f"Imported {self.created} task(s) in {self.elapsed:.2f}s "
+            f"({self.rows_per_second:.0f} rows/s); {len(self.errors)} row(s) rejected."
+        )
+
+
+class TaskImporter:
+    # `owner`: owner of rows without an 'owner' column (and of every row when `restrict_to_owner`).
+    # `restrict_to_owner`: used by the upload view; rows may only target groups the owner belongs to.
+    def __init__(self, owner=None, restrict_to_owner=False, batch_size=DEFAULT_BATCH_SIZE):
+        self.owner = owner
+        self.restrict_to_owner = restrict_to_owner
+        self.batch_size = batch_size
+
+    def run(self, rows):
+        report = ImportReport()
+        start = time.perf_counter()
+        rows = iter(rows)
+        while True:
+            chunk = list(islice(rows, self.batch_size))
+            if not chunk:
+                break
+            tasks = self.build_tasks(chunk, report)
+            if tasks:
+                report.created += len(bulk_create_tasks(tasks, batch_size=self.batch_size))
+        report.elapsed = time.perf_counter() - start
+        return report
+
+    def build_tasks(self, chunk, report):
+        valid_rows = []
+        for line, row in chunk:
+            if not isinstance(row, dict):
+                report.errors.append((line, "Not a JSON object."))
+            elif non_text_fields(row):
+                report.errors.append((line, f"Expected text for {', '.join(non_text_fields(row))}."))
+            else:
+                valid_rows.append((line, {key: (value.strip() if isinstance(value, str) else value) for key, value in row.items()}))
+
+        users, groups, members = self.resolve(row for _, row in valid_rows)
+        tasks = []
+        for line, row in valid_rows:
+            try:
+                tasks.append(self.build_task(row, users, groups, members))
+            except ValidationError as exc:
+                report.errors.append((line, ' '.join(exc.messages)))
+        return tasks
+
+    def resolve(self, rows):
+        # One query each for the usernames, groups and memberships referenced by the chunk
+        usernames, group_ids = set(), set()
+        for row in rows:
+            if not self.restrict_to_owner and row.get('owner'):
+                usernames.add(row['owner'])
+            if row.get('assignee'):
+                usernames.add(row['assignee'])
+            if row.get('group'):
+                group_ids.add(row['group'])
+        group_ids, _ = parse_task_ids(group_ids)  # drops values that are not UUIDs
+
+        users = {user.username: user for user in User.objects.filter(username__in=usernames).only('id', 'username')}
+        groups = Group.objects.filter(id__in=group_ids)
+        if self.restrict_to_owner:
+            groups = groups.filter(models.Q(admin=self.owner) | models.Q(members__user=self.owner)).distinct()
+        groups = {str(group.pk): group for group in groups.only('id', 'admin_id')}
+        members = set(Membership.objects.filter(group_id__in=[group.pk for group in groups.values()]).values_list('group_id', 'user_id'))
+        members.update((group.pk, group.admin_id) for group in groups.values())
+        return users, groups, members
+
+    def build_task(self, row, users, groups, members):
+        title = row.get('title') or ''
+        if not title:
+            raise ValidationError("Title is required.")
+        if len(title) > TITLE_MAX_LENGTH:
+            raise ValidationError(f"Title is longer than {TITLE_MAX_LENGTH} characters.")
+
+        status = row.get('status') or 'ongoing'
+        if status not in STATUSES:
+            raise ValidationError(f"Unknown status '{status}'.")
+
+        due_date = None
+        if row.get('due_date'):
+            try:
+                due_date = date.fromisoformat(row['due_date'])
+            except (TypeError, ValueError):
+                raise ValidationError(f"Invalid due date '{row['due_date']}'; expected YYYY-MM-DD.")
+
+        if self.restrict_to_owner or not row.get('owner'):
+            owner = self.owner
+            if owner is None:
+                raise ValidationError("Owner is required.")
+        else:
+            owner = users.get(row['owner'])
+            if owner is None:
+                raise ValidationError(f"Unknown owner '{row['owner']}'.")
+
+        group = None
+        if row.get('group'):
+            group = groups.get(str(row['group']))
+            if group is None:
+                raise ValidationError(f"Unknown group '{row['group']}'.")
+
+        assignee = None
+        if row.get('assignee'):
+            assignee = users.get(row['assignee'])
+            if assignee is None:
+                raise ValidationError(f"Unknown assignee '{row['assignee']}'.")
+            # Same rule as TaskForm: group tasks go to members of the group
+            if group is not None and (group.pk, assignee.pk) not in members:
+                raise ValidationError(f"'{assignee.username}' is not a member of the task's group.")
+
+        return Task(
+            title=title,
+            description=row.get('description') or '',
+            status=status,
+            due_date=due_date,
+            owner=owner,
+            assignee=assignee,
+            group=group,
+        )
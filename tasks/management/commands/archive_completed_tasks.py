@@ -0,0 +1,28 @@
+# tasks/management/commands/archive_completed_tasks.py
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from tasks.archive import archive_completed_tasks
+
+
+class Command(BaseCommand):
+    help = (
+        "Move completed tasks not updated for --older-than-days days into the archive table, "
+        "in batches of one transaction each."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--older-than-days', type=int, default=settings.TASK_ARCHIVE_AFTER_DAYS,
+            help="Archive completed tasks last updated more than this many days ago."
+        )
+        parser.add_argument(
+            '--batch-size', type=int, default=settings.TASK_ARCHIVE_BATCH_SIZE,
+            help="Tasks moved per transaction."
+        )
+
+    def handle(self, *args, **options):
+        if options['older_than_days'] < 0 or options['batch_size'] < 1:
+            raise CommandError("--older-than-days must be at least 0 and --batch-size at least 1.")
+        archived = archive_completed_tasks(options['older_than_days'], batch_size=options['batch_size'])
+        self.stdout.write(self.style.SUCCESS(f"Archived {archived} task(s)."))
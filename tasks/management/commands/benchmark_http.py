@@ -0,0 +1,83 @@
+# tasks/management/commands/benchmark_http.py
+
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+from django.core.management.base import BaseCommand, CommandError
+from django.urls import reverse
+from tasks.benchmarks import format_summary, summarize, write_report
+
+DEFAULT_VIEWS = ['task_list', 'api_task_list', 'api_task_overview', 'group_list', 'api_group_overview']
+
+
+class Command(BaseCommand):
+    help = (
+        "Load a running server with concurrent logged-in GET requests and report throughput and latency "
+        "per URL. Run it once against the WSGI server and once with SERVER_MODE=asgi (start.sh) to compare."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('base_url', help="e.g. http://localhost:8000")
+        parser.add_argument('--username', required=True)
+        parser.add_argument('--password', required=True)
+        parser.add_argument('--path', action='append', dest='paths',
+                            help=f"Path to request; may be repeated. Default: {', '.join(DEFAULT_VIEWS)}.")
+        parser.add_argument('--requests', type=int, default=500, help="Requests per path.")
+        parser.add_argument('--concurrency', type=int, default=20)
+        parser.add_argument('--json', help="Write the results to this file (same format as benchmark_views --json).")
+
+    def handle(self, *args, **options):
+        if options['requests'] < 1 or options['concurrency'] < 1:
+            raise CommandError("--requests and --concurrency must be at least 1.")
+        base_url = options['base_url'].rstrip('/')
+        cookies = self.login(base_url, options['username'], options['password'])
+        paths = options['paths'] or [reverse(name) for name in DEFAULT_VIEWS]
+        self.stdout.write(f"{options['requests']} requests per path, concurrency {options['concurrency']}\n")
+        results = {}
+        for path in paths:
+            results[path] = self.run(base_url + path, cookies, options['requests'], options['concurrency'])
+        if options['json']:
+            write_report(
+                options['json'], results,
+                base_url=base_url, requests=options['requests'], concurrency=options['concurrency']
+            )
+
+    def login(self, base_url, username, password):
+        session = requests.Session()
+        login_url = base_url + reverse('login')
+        session.get(login_url).raise_for_status()
+        response = session.post(login_url, data={
+            'username': username,
+            'password': password,
+            'csrfmiddlewaretoken': session.cookies.get('csrftoken', ''),
+        }, headers={'Referer': login_url}, allow_redirects=False)
+        if response.status_code != 302 or 'sessionid' not in session.cookies:
+            raise CommandError("Login failed; check --username and --password.")
+        return session.cookies.get_dict()
+
+    def run(self, url, cookies, count, concurrency):
+        local = threading.local()
+
+        def fetch(_):
+            # One keep-alive session per thread
+            if not hasattr(local, 'session'):
+                local.session = requests.Session()
+                local.session.cookies.update(cookies)
+            started = time.perf_counter()
+            try:
+                ok = local.session.get(url).status_code == 200
+            except requests.RequestException:
+                ok = False
+            return ok, (time.perf_counter() - started) * 1000
+
+        started = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=concurrency) as pool:
+            results = list(pool.map(fetch, range(count)))
+        elapsed = time.perf_counter() - started
+
+        summary = summarize([ms for _, ms in results], elapsed, errors=sum(1 for ok, _ in results if not ok))
+        line = format_summary(url, summary)
+        self.stdout.write(self.style.WARNING(line) if summary['errors'] else line)
+        return summary
@@ -0,0 +1,66 @@
+# tasks/management/commands/benchmark_task_search.py
+
+import statistics
+import time
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, models, transaction
+from tasks.benchmarks import percentile
+from tasks.models import Task
+from tasks.seeding import seed_dataset
+
+User = get_user_model()
+
+DEFAULT_QUERIES = ['report', 'budget review', 'deploy -outage', '"release planning"', 'vendor payment contract']
+
+
+class Command(BaseCommand):
+    help = (
+        "Time task searches (first page, as TaskListView runs them) for the user who can see the most tasks. "
+        "With --seed-tasks, a deterministic dataset is created first and rolled back afterwards."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--seed-tasks', type=int, default=0, help="Seed this many tasks first (rolled back), e.g. 1000000.")
+        parser.add_argument('--query', action='append', dest='queries', help="Search text; may be repeated.")
+        parser.add_argument('--repeat', type=int, default=5, help="Timed runs per query (after one warm-up run).")
+        parser.add_argument('--page-size', type=int, default=10)
+
+    def handle(self, *args, **options):
+        if options['repeat'] < 1:
+            raise CommandError("--repeat must be at least 1.")
+        with transaction.atomic():
+            if options['seed_tasks']:
+                started = time.perf_counter()
+                seed_dataset(options['seed_tasks'])
+                self.stdout.write(f"Seeded {options['seed_tasks']} tasks in {time.perf_counter() - started:.1f}s (rolled back at the end).")
+            self.benchmark(options['queries'] or DEFAULT_QUERIES, options['repeat'], options['page_size'])
+            # Never keep the seeded rows
+            transaction.set_rollback(True)
+
+    def benchmark(self, queries, repeat, page_size):
+        with connection.cursor() as cursor:
+            cursor.execute('ANALYZE')
+        user = User.objects.annotate(visible_count=models.Count('visible_tasks')).order_by('-visible_count').first()
+        if user is None:
+            raise CommandError("No tasks to search. Seed some with --seed-tasks.")
+        visible = Task.objects.filter(visibility__user=user)
+        self.stdout.write(f"{connection.vendor}: searching {visible.count()} tasks visible to {user.username}\n")
+
+        for text in queries:
+            queryset = visible.search(text).order_by('-rank', '-created_at', '-id').values('id', 'title', 'rank')
+            list(queryset[:page_size])  # warm-up
+            timings = []
+            for _ in range(repeat):
+                started = time.perf_counter()
+                rows = list(queryset[:page_size])
+                timings.append((time.perf_counter() - started) * 1000)
+            timings.sort()
+            p95 = percentile(timings, 0.95)
+            self.stdout.write(
+                f"{text!r}: {len(rows)} row(s) on the first page, "
+                f"median {statistics.median(timings):.1f}ms, p95 {p95:.1f}ms, max {timings[-1]:.1f}ms"
+            )
+            if connection.vendor == 'postgresql' and 'task_search_vector_idx' not in queryset.explain():
+                self.stdout.write(self.style.WARNING("  plan does not use task_search_vector_idx"))
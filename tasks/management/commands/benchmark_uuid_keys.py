@@ -0,0 +1,102 @@
+# tasks/management/commands/benchmark_uuid_keys.py
+
+import time
+import uuid
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import DatabaseError, connection, transaction
+from task_management.ids import uuid7
+from tasks.benchmarks import write_report
+from tasks.models import Task
+
+GENERATORS = {'uuid4': uuid.uuid4, 'uuid7': uuid7}
+
+
+class Command(BaseCommand):
+    help = (
+        "Compare random (uuid4) and time-ordered (uuid7) primary keys: insert throughput and primary key index "
+        "size for a scratch table with the same key column as tasks_task. Each table is first filled with "
+        "--existing uuid4 rows, as a table migrated from uuid4 would be. Everything is rolled back."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rows', type=int, default=200000, help="Rows inserted and timed per key type.")
+        parser.add_argument('--existing', type=int, default=100000, help="uuid4 rows already in the table.")
+        parser.add_argument('--batch-size', type=int, default=1000, help="Rows per INSERT batch (an import chunk).")
+        parser.add_argument('--json', help="Write the results to this file.")
+
+    def handle(self, *args, **options):
+        if options['rows'] < 1 or options['batch_size'] < 1 or options['existing'] < 0:
+            raise CommandError("--rows and --batch-size must be at least 1 and --existing at least 0.")
+        results = {}
+        with transaction.atomic():
+            for name, generate in GENERATORS.items():
+                results[name] = self.run(f'benchmark_{name}_keys', generate, options)
+                self.stdout.write(self.format(name, results[name]))
+            transaction.set_rollback(True)
+        if options['json']:
+            write_report(options['json'], results, rows=options['rows'], existing=options['existing'])
+            self.stdout.write(f"\nWrote {options['json']}")
+
+    def run(self, table, generate, options):
+        pk = Task._meta.pk
+        with connection.cursor() as cursor:
+            cursor.execute(f"CREATE TABLE {table} (id {pk.db_type(connection)} NOT NULL PRIMARY KEY, title varchar(255) NOT NULL)")
+            insert = f"INSERT INTO {table} (id, title) VALUES (%s, %s)"
+
+            def rows(count, make_id):
+                return [(pk.get_db_prep_value(make_id(), connection), 'Benchmark task') for _ in range(count)]
+
+            for start in range(0, options['existing'], options['batch_size']):
+                cursor.executemany(insert, rows(min(options['batch_size'], options['existing'] - start), uuid.uuid4))
+            size_before = self.index_size(cursor, table)
+
+            timings = []
+            for start in range(0, options['rows'], options['batch_size']):
+                batch = rows(min(options['batch_size'], options['rows'] - start), generate)
+                started = time.perf_counter()
+                cursor.executemany(insert, batch)
+                timings.append((len(batch), time.perf_counter() - started))
+            size_after = self.index_size(cursor, table)
+
+        # The last tenth shows whether inserts slow down as the index outgrows the cache
+        tail = timings[-max(1, len(timings) // 10):]
+        result = {
+            'rows_per_second': round(options['rows'] / sum(seconds for _, seconds in timings)),
+            'last_tenth_rows_per_second': round(sum(count for count, _ in tail) / sum(seconds for _, seconds in tail)),
+            'index_bytes': size_after,
+        }
+        if size_after is not None:
+            result['index_bytes_per_new_row'] = round((size_after - size_before) / options['rows'], 1)
+        return result
+
+    def index_size(self, cursor, table):
+        # Bytes used by the primary key index, where the database can tell
+        try:
+            with transaction.atomic():
+                if connection.vendor == 'postgresql':
+                    cursor.execute(
+                        "SELECT pg_relation_size(indexrelid) FROM pg_index WHERE indrelid = %s::regclass AND indisprimary",
+                        [table]
+                    )
+                elif connection.vendor == 'sqlite':
+                    # Needs SQLite built with the dbstat virtual table
+                    cursor.execute(
+                        "SELECT SUM(pgsize) FROM dbstat WHERE name IN "
+                        "(SELECT name FROM sqlite_master WHERE type = 'index' AND tbl_name = %s)",
+                        [table]
+                    )
+                else:
+                    return None
+                return cursor.fetchone()[0]
+        except DatabaseError:
+            return None
+
+    def format(self, name, result):
+        line = f"{name}: {result['rows_per_second']} rows/s (last tenth {result['last_tenth_rows_per_second']} rows/s)"
+        if result['index_bytes'] is not None:
+            line += (
+                f", primary key index {result['index_bytes'] / 2 ** 20:.1f} MiB "
+                f"({result['index_bytes_per_new_row']} bytes per new row)"
+            )
+        return line
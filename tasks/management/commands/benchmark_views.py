@@ -0,0 +1,150 @@
+# tasks/management/commands/benchmark_views.py
+
+import itertools
+import logging
+import time
+from contextlib import ExitStack
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections, models, transaction
+from django.test import Client
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from tasks.benchmarks import compare_reports, format_summary, summarize, write_report
+from tasks.models import Task
+from users.models import Group
+
+User = get_user_model()
+
+SCENARIOS = [
+    'task_list:ongoing', 'task_list:completed', 'task_list:overdue', 'task_list:all',
+    'group_detail:large', 'group_detail:small',
+    'task_create', 'task_complete',
+    'group_members_manage', 'group_members_manage:post',
+]
+
+
+class Command(BaseCommand):
+    help = (
+        "Request the main pages in-process through the test client as one user and report latency percentiles, "
+        "queries per request and throughput for each. Everything runs in one transaction that is rolled back, "
+        "so the POST scenarios leave the data as it was and runs stay comparable. Seed data with seed_perf first."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--user', help="Username to browse as. Default: the admin of the group with the most members.")
+        parser.add_argument('--requests', type=int, default=50, help="Timed requests per scenario.")
+        parser.add_argument('--warmup', type=int, default=5, help="Untimed requests per scenario first.")
+        parser.add_argument('--scenario', action='append', dest='scenarios', choices=SCENARIOS,
+                            help="Scenario to run; may be repeated. Default: all.")
+        parser.add_argument('--clear-cache', action='store_true', help="Clear the cache before every request (cold fragments).")
+        parser.add_argument('--json', help="Write the results to this file for later --compare.")
+        parser.add_argument('--compare', help="An earlier --json report to compare against.")
+
+    def handle(self, *args, **options):
+        if options['requests'] < 1 or options['warmup'] < 0:
+            raise CommandError("--requests must be at least 1 and --warmup at least 0.")
+        results = {}
+        with transaction.atomic():
+            user = self.get_user(options['user'])
+            client = Client()
+            client.force_login(user)
+            requests = self.scenario_requests(user)
+            meta = {'user': user.username, 'tasks': Task.objects.count(), 'users': User.objects.count()}
+            self.stdout.write(f"As {user.username}: {options['requests']} requests per scenario after {options['warmup']} warm-up\n")
+            # Budget overruns are reported in the summary lines instead of one warning per request
+            metrics_logger = logging.getLogger('task_management.metrics')
+            level, metrics_logger.level = metrics_logger.level, logging.ERROR
+            try:
+                for name in options['scenarios'] or SCENARIOS:
+                    results[name] = self.run(client, name, requests[name], options)
+                    self.stdout.write(format_summary(name, results[name]))
+            finally:
+                metrics_logger.setLevel(level)
+            transaction.set_rollback(True)
+
+        if options['json']:
+            write_report(options['json'], results, requests=options['requests'], clear_cache=options['clear_cache'], **meta)
+            self.stdout.write(f"\nWrote {options['json']}")
+        if options['compare']:
+            self.stdout.write(f"\nCompared with {options['compare']}:")
+            for line in compare_reports(options['compare'], results):
+                self.stdout.write(f"  {line}")
+
+    def get_user(self, username):
+        if username:
+            try:
+                return User.objects.get(username=username)
+            except User.DoesNotExist:
+                raise CommandError(f"No user named {username!r}.")
+        group = Group.objects.annotate(member_count=models.Count('members')).order_by('-member_count') \
+            .select_related('admin').first()
+        if group is None:
+            raise CommandError("No groups to benchmark. Seed some with seed_perf.")
+        return group.admin
+
+    def scenario_requests(self, user):
+        # name -> iterator of (method, path, data, expected status)
+        groups = Group.objects.filter(models.Q(admin=user) | models.Q(members__user=user)).distinct() \
+            .annotate(member_count=models.Count('members', distinct=True))
+        large = groups.filter(admin=user).order_by('-member_count').first()
+        small = groups.order_by('member_count').first()
+        if large is None:
+            raise CommandError(f"{user.username} administers no group; pass --user with a group admin.")
+        ongoing = list(Task.objects.filter(visibility__user=user, status='ongoing').values_list('pk', flat=True)[:1000])
+        if not ongoing:
+            raise CommandError(f"{user.username} has no ongoing tasks to complete.")
+        outsider = User.objects.exclude(group_memberships__group=large).exclude(pk=large.admin_id).first()
+
+        def get(path):
+            return itertools.repeat(('get', path, None, 200))
+
+        def member_toggles():
+            # Alternately add and remove the same user, so the group ends where it started
+            for add in itertools.cycle([True, False]):
+                yield 'post', reverse('group_members_manage', args=[large.pk]), {'add' if add else 'remove': [outsider.pk]}, 302
+
+        requests = {
+            f'task_list:{status}': get(f"{reverse('task_list')}?status={status}")
+            for status in ('ongoing', 'completed', 'overdue', 'all')
+        }
+        requests.update({
+            'group_detail:large': get(reverse('group_detail', args=[large.pk])),
+            'group_detail:small': get(reverse('group_detail', args=[small.pk])),
+            'task_create': (
+                ('post', reverse('task_create_for_group', args=[large.pk]), {'title': f'Benchmark task {i}', 'status': 'ongoing'}, 302)
+                for i in itertools.count()
+            ),
+            # Distinct ongoing tasks while they last; repeats after that are "already completed" requests
+            'task_complete': (('post', reverse('task_complete', args=[pk]), None, 302) for pk in itertools.cycle(ongoing)),
+            'group_members_manage': get(reverse('group_members_manage', args=[large.pk])),
+            'group_members_manage:post': member_toggles() if outsider else None,
+        })
+        return requests
+
+    def run(self, client, name, requests, options):
+        if requests is None:
+            raise CommandError(f"{name}: no user outside the group to add and remove.")
+        for method, path, data, _ in itertools.islice(requests, options['warmup']):
+            getattr(client, method)(path, data)
+
+        timings, queries, errors = [], [], 0
+        started = time.perf_counter()
+        for method, path, data, expected_status in itertools.islice(requests, options['requests']):
+            if options['clear_cache']:
+                cache.clear()
+            with ExitStack() as stack:
+                captured = [stack.enter_context(CaptureQueriesContext(conn)) for conn in connections.all()]
+                request_started = time.perf_counter()
+                response = getattr(client, method)(path, data)
+                timings.append((time.perf_counter() - request_started) * 1000)
+            queries.append(sum(len(context.captured_queries) for context in captured))
+            errors += response.status_code != expected_status
+        summary = summarize(timings, time.perf_counter() - started, errors, queries)
+        budget = settings.VIEW_BUDGETS.get(name.split(':')[0], {}).get('queries')
+        if budget is not None:
+            summary['query_budget'] = budget
+        return summary
@@ -0,0 +1,102 @@
+# tasks/management/commands/explain_task_queries.py
+
+import re
+from datetime import date
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from tasks.agenda import calendar_window
+from tasks.models import Task
+from tasks.overdue import expired_tasks
+from tasks.seeding import seed_dataset
+from users.models import Group, Membership
+
+User = get_user_model()
+
+
+def full_scan(table):
+    # A plan step that walks the whole table: "SCAN <table>" on SQLite (also when it walks an index
+    # to skip the sort), "Seq Scan on <table>" on PostgreSQL
+    return re.compile(rf'\bSCAN {table}\b|Seq Scan on {table}\b')
+
+
+class Command(BaseCommand):
+    help = (
+        "EXPLAIN the main task queries and check that their plans use the expected indexes. "
+        "With --seed-tasks, a deterministic dataset is created first and rolled back afterwards."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--seed-tasks', type=int, default=0, help="Seed this many tasks before explaining (rolled back).")
+        parser.add_argument('--check', action='store_true', help="Exit non-zero if a plan does not use its expected index or scans a table it should not.")
+
+    def handle(self, *args, **options):
+        with transaction.atomic():
+            if options['seed_tasks']:
+                self.seed(options['seed_tasks'])
+            failures = self.explain_all()
+            # Never keep the seeded rows
+            transaction.set_rollback(True)
+
+        if failures and options['check']:
+            raise CommandError(f"{len(failures)} plan(s) did not use the expected index or took a path they should avoid: {', '.join(failures)}")
+        if not failures:
+            self.stdout.write(self.style.SUCCESS("All plans use their expected indexes."))
+
+    def query_shapes(self):
+        # (label, queryset, substring expected in the plan, patterns the plan must not match)
+        user = User.objects.filter(group_memberships__isnull=False).order_by('pk').first()
+        group = Group.objects.order_by('pk').first()
+        if user is None or group is None:
+            raise CommandError("No data to explain. Seed some with --seed-tasks.")
+        return [
+            # Reached from the user's visibility rows; walking every task and probing visibility per
+            # row also mentions the visibility index, so the full scan is ruled out separately, and
+            # so is the calendar's due date index taking over
+            ('task_list', Task.objects.filter(visibility__user=user, status='ongoing').order_by('due_date', '-created_at'),
+             'taskvisibility_user_id_task_id', [full_scan(Task._meta.db_table), re.compile(r'\btask_due_idx\b')]),
+            ('group_detail', Task.objects.filter(group=group).order_by('due_date', '-created_at')[:11],
+             'task_group_due_idx', []),
+            ('group_status', Task.objects.filter(group=group, status='ongoing').order_by('due_date'),
+             'task_group_status_due_idx', []),
+            ('assignee_status', Task.objects.filter(assignee=user, status='ongoing').order_by('due_date'),
+             'task_assignee_status_due_idx', []),
+            ('overdue_sweep', expired_tasks(date.today()).values('id'),
+             'task_open_due_idx', []),
+            ('calendar', Task.objects.filter(visibility__user=user, due_date__range=calendar_window('month', date.today()))
+             .order_by('due_date', '-created_at'), 'task_due_idx', []),
+            ('membership_check', Membership.objects.filter(user=user, group=group),
+             'membership_user_id_group_id', []),
+        ] + ([
+            # GIN index on the trigger-maintained vector; other databases use the icontains fallback
+            ('search', Task.objects.filter(visibility__user=user).search('report budget').values('id'),
+             'task_search_vector_idx', []),
+        ] if connection.vendor == 'postgresql' else [])
+
+    def explain_all(self):
+        with connection.cursor() as cursor:
+            cursor.execute('ANALYZE')
+
+        failures = []
+        for label, queryset, expected_index, avoided in self.query_shapes():
+            plan = queryset.explain()
+            used = expected_index in plan
+            matches = (pattern.search(plan) for pattern in avoided)
+            matched = [match.group(0) for match in matches if match]
+            if not used or matched:
+                failures.append(label)
+            if matched:
+                status = self.style.ERROR('AVOID')
+            else:
+                status = self.style.SUCCESS('OK') if used else self.style.ERROR('MISSING')
+            self.stdout.write(f"[{status}] {label} (expects {expected_index})")
+            for step in matched:
+                self.stdout.write(f"  should not {step}")
+            self.stdout.write(plan)
+            self.stdout.write('')
+        return failures
+
+    def seed(self, task_count):
+        users, groups = seed_dataset(task_count)
+        self.stdout.write(f"Seeded {task_count} tasks, {len(users)} users and {len(groups)} groups (rolled back at the end).\n")
@@ -0,0 +1,49 @@
+# tasks/management/commands/export_tasks.py
+
+from django.contrib.auth import get_user_model
+from django.core.exceptions import ValidationError
+from django.core.management.base import BaseCommand, CommandError
+from tasks.export import DEFAULT_CHUNK_SIZE, EXPORT_FORMATS, export_queryset, iter_export
+from users.models import Group
+
+User = get_user_model()
+
+
+class Command(BaseCommand):
+    help = (
+        "Stream tasks as CSV or NDJSON, optionally limited to the tasks a user can see or to one group. "
+        "Rows are read in chunks through a server-side cursor, so memory use stays flat."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--user', help="Username; export the tasks visible to this user.")
+        parser.add_argument('--group', help="Group id; export the tasks of this group.")
+        parser.add_argument(
+            '--status', default='all', choices=['ongoing', 'completed', 'overdue', 'all'],
+            help="Status tab to export (default: all)."
+        )
+        parser.add_argument('--format', default='csv', choices=sorted(EXPORT_FORMATS), help="Output format.")
+        parser.add_argument('--output', help="File to write to (default: stdout).")
+        parser.add_argument('--chunk-size', type=int, default=DEFAULT_CHUNK_SIZE, help="Rows fetched per round trip.")
+
+    def handle(self, *args, **options):
+        user = group = None
+        if options['user']:
+            user = User.objects.filter(username=options['user']).first()
+            if user is None:
+                raise CommandError(f"No user named '{options['user']}'.")
+        if options['group']:
+            try:
+                group = Group.objects.get(pk=options['group'])
+            except (Group.DoesNotExist, ValidationError):
+                raise CommandError(f"No group with id '{options['group']}'.")
+
+        queryset = export_queryset(user=user, group=group, status=options['status'])
+        lines = iter_export(queryset, options['format'], chunk_size=options['chunk_size'])
+        if options['output']:
+            with open(options['output'], 'w', newline='', encoding='utf-8') as output:
+                output.writelines(lines)
+            self.stderr.write(f"Exported tasks to {options['output']}.")
+        else:
+            for line in lines:
+                self.stdout.write(line, ending='')
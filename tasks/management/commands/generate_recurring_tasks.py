@@ -0,0 +1,28 @@
+# tasks/management/commands/generate_recurring_tasks.py
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from tasks.recurrence import generate_recurring_tasks
+
+
+class Command(BaseCommand):
+    help = (
+        "Create the occurrences of recurring tasks that fall within the horizon "
+        "(TASK_RECURRENCE_HORIZON_DAYS), in batches of rules."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--horizon-days', type=int, default=settings.TASK_RECURRENCE_HORIZON_DAYS,
+            help="Create occurrences due up to this many days from today."
+        )
+        parser.add_argument(
+            '--batch-size', type=int, default=settings.TASK_RECURRENCE_BATCH_SIZE,
+            help="Rules handled per transaction."
+        )
+
+    def handle(self, *args, **options):
+        if options['horizon_days'] < 0 or options['batch_size'] < 1:
+            raise CommandError("--horizon-days must be at least 0 and --batch-size at least 1.")
+        created = generate_recurring_tasks(horizon_days=options['horizon_days'], batch_size=options['batch_size'])
+        self.stdout.write(self.style.SUCCESS(f"Created {created} recurring task occurrence(s)."))
@@ -0,0 +1,49 @@
+# tasks/management/commands/import_tasks.py
+
+import os
+import sys
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from tasks.importer import DEFAULT_BATCH_SIZE, IMPORT_FORMATS, TaskImporter, read_rows
+
+User = get_user_model()
+
+
+class Command(BaseCommand):
+    help = (
+        "Import tasks from a CSV or NDJSON file (or '-' for stdin) in batches. Rows are validated per "
+        "batch with batched lookups and inserted with bulk_create; rejected rows are reported at the end."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help="File to import, or '-' for stdin.")
+        parser.add_argument('--format', choices=IMPORT_FORMATS, help="Input format (default: from the file extension).")
+        parser.add_argument('--owner', help="Username that owns rows without an 'owner' column.")
+        parser.add_argument('--batch-size', type=int, default=DEFAULT_BATCH_SIZE, help="Rows validated and inserted per transaction.")
+
+    def handle(self, *args, **options):
+        import_format = options['format'] or os.path.splitext(options['path'])[1].lstrip('.').lower()
+        if import_format not in IMPORT_FORMATS:
+            raise CommandError("Cannot tell the input format; pass --format csv or --format ndjson.")
+
+        owner = None
+        if options['owner']:
+            owner = User.objects.filter(username=options['owner']).first()
+            if owner is None:
+                raise CommandError(f"No user named '{options['owner']}'.")
+
+        importer = TaskImporter(owner=owner, batch_size=options['batch_size'])
+        if options['path'] == '-':
+            report = importer.run(read_rows(sys.stdin, import_format))
+        else:
+            try:
+                with open(options['path'], newline='', encoding='utf-8') as lines:
+                    report = importer.run(read_rows(lines, import_format))
+            except OSError as exc:
+                raise CommandError(str(exc))
+
+        for line, message in report.errors:
+            self.stderr.write(f"line {line}: {message}")
+        style = self.style.SUCCESS if not report.errors else self.style.WARNING
+        self.stdout.write(style(str(report)))
@@ -0,0 +1,19 @@
+# tasks/management/commands/mark_overdue_tasks.py
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from tasks.overdue import sweep_overdue_tasks
+
+
+class Command(BaseCommand):
+    help = "Move ongoing tasks whose due date has passed to 'overdue' using batched bulk UPDATEs."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size', type=int, default=settings.OVERDUE_SWEEP_BATCH_SIZE,
+            help="Tasks updated per UPDATE statement."
+        )
+
+    def handle(self, *args, **options):
+        moved = sweep_overdue_tasks(batch_size=options['batch_size'])
+        self.stdout.write(self.style.SUCCESS(f"Moved {moved} task(s) to overdue."))
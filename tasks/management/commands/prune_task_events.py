@@ -0,0 +1,22 @@
+# tasks/management/commands/prune_task_events.py
+
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+from tasks.events import prune_task_events
+
+
+class Command(BaseCommand):
+    help = "Delete realtime task events older than the replay window (TASK_EVENTS_RETENTION_HOURS)."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--older-than-hours', type=int, default=settings.TASK_EVENTS_RETENTION_HOURS,
+            help="Age in hours above which events are deleted."
+        )
+
+    def handle(self, *args, **options):
+        deleted = prune_task_events(timezone.now() - timedelta(hours=options['older_than_hours']))
+        self.stdout.write(self.style.SUCCESS(f"Deleted {deleted} task events."))
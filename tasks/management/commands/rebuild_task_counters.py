@@ -0,0 +1,26 @@
+# tasks/management/commands/rebuild_task_counters.py
+
+from django.core.management.base import BaseCommand, CommandError
+from tasks.counters import find_counter_drift, repair_counters
+
+
+class Command(BaseCommand):
+    help = "Check the per-user and per-group task counters against the tasks and repair any drift."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--check', action='store_true', help="Only report drift; exit non-zero if any is found.")
+        parser.add_argument('--batch-size', type=int, default=1000, help="Rows per upsert batch.")
+
+    def handle(self, *args, **options):
+        user_drift, group_drift = find_counter_drift()
+        self.stdout.write(f"Wrong user counters: {len(user_drift)}, wrong group counters: {len(group_drift)}")
+
+        if options['check']:
+            if user_drift or group_drift:
+                raise CommandError("Task counters are out of sync. Run without --check to repair them.")
+            self.stdout.write(self.style.SUCCESS("Task counters are consistent."))
+            return
+
+        if user_drift or group_drift:
+            repair_counters(user_drift, group_drift, batch_size=options['batch_size'])
+        self.stdout.write(self.style.SUCCESS("Task counters rebuilt."))
@@ -0,0 +1,29 @@
+# tasks/management/commands/rebuild_task_visibility.py
+
+from django.core.management.base import BaseCommand, CommandError
+from tasks.counters import find_counter_drift, repair_counters
+from tasks.visibility import find_visibility_drift, repair_visibility
+
+
+class Command(BaseCommand):
+    help = "Check the task visibility index against the owner/assignee/group rules and repair any drift."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--check', action='store_true', help="Only report drift; exit non-zero if any is found.")
+        parser.add_argument('--batch-size', type=int, default=1000, help="Rows per insert/delete batch.")
+
+    def handle(self, *args, **options):
+        missing, stale = find_visibility_drift()
+        self.stdout.write(f"Missing rows: {len(missing)}, stale rows: {len(stale)}")
+
+        if options['check']:
+            if missing or stale:
+                raise CommandError("Task visibility index is out of sync. Run without --check to repair it.")
+            self.stdout.write(self.style.SUCCESS("Task visibility index is consistent."))
+            return
+
+        if missing or stale:
+            repair_visibility(missing, stale, batch_size=options['batch_size'])
+            # The per-user counters are derived from the index rows
+            repair_counters(*find_counter_drift(), batch_size=options['batch_size'])
+        self.stdout.write(self.style.SUCCESS("Task visibility index rebuilt."))
@@ -0,0 +1,70 @@
+# tasks/management/commands/seed_perf.py
+
+import time
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from django.db import models, transaction
+from tasks.counters import find_counter_drift, repair_counters
+from tasks.seeding import seed_dataset
+from users.models import Group
+
+User = get_user_model()
+
+
+class Command(BaseCommand):
+    help = (
+        "Create a synthetic dataset for load testing: users, a few large groups and many small ones, and tasks "
+        "weighted towards the larger groups. Unlike --seed-tasks on the other commands, the data is kept. "
+        "Use a separate database; benchmark_views and benchmark_http can then be pointed at it."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=2000)
+        parser.add_argument('--groups', type=int, default=400)
+        parser.add_argument('--tasks', type=int, default=100000)
+        parser.add_argument('--large-groups', type=int, default=3, help="Number of large groups.")
+        parser.add_argument('--large-group-size', type=int, default=300, help="Members per large group.")
+        parser.add_argument('--small-group-size', type=int, default=8, help="Maximum members per small group.")
+        parser.add_argument('--prefix', default='perf', help="Prefix for the seeded usernames and group names.")
+        parser.add_argument('--password', default='perf-pass', help="Password for every seeded user.")
+        parser.add_argument('--seed', type=int, default=42, help="Random seed; the same arguments give the same data.")
+        parser.add_argument('--batch-size', type=int, default=5000)
+
+    def handle(self, *args, **options):
+        if min(options['users'], options['groups'], options['tasks'], options['batch_size']) < 1:
+            raise CommandError("--users, --groups, --tasks and --batch-size must be at least 1.")
+        if options['large_groups'] > options['groups']:
+            raise CommandError("--large-groups cannot exceed --groups.")
+        prefix = options['prefix']
+        if User.objects.filter(username__startswith=f'{prefix}_user_').exists():
+            raise CommandError(f"Users prefixed '{prefix}_' already exist. Use another --prefix or a fresh database.")
+
+        started = time.perf_counter()
+        with transaction.atomic():
+            users, groups = seed_dataset(
+                options['tasks'],
+                seed=options['seed'],
+                batch_size=options['batch_size'],
+                user_count=options['users'],
+                group_count=options['groups'],
+                large_groups=options['large_groups'],
+                large_group_size=options['large_group_size'],
+                small_group_size=options['small_group_size'],
+                prefix=prefix,
+                password=options['password'],
+            )
+            # bulk_create skips the signals that keep the counters current
+            repair_counters(*find_counter_drift(), batch_size=options['batch_size'])
+        self.stdout.write(
+            f"Seeded {len(users)} users, {len(groups)} groups and {options['tasks']} tasks "
+            f"in {time.perf_counter() - started:.1f}s."
+        )
+
+        largest = Group.objects.filter(name__startswith=f'{prefix}_group_').annotate(
+            member_count=models.Count('members')
+        ).select_related('admin').order_by('-member_count').first()
+        self.stdout.write(self.style.SUCCESS(
+            f"Largest group: {largest.name} ({largest.member_count} members), admin {largest.admin.username}. "
+            f"All seeded users have the password given by --password."
+        ))
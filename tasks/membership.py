@@ -0,0 +1,47 @@
+# tasks/membership.py
+
+from django.contrib.auth import get_user_model
+from django.db import transaction
+from users.models import Membership
+from .events import record_membership_events
+from .forms import invalidate_user_group_choices
+from .fragments import bump_group_fragment_versions
+from .signals import bulk_delete
+from .visibility import sync_group_members_visibility
+
+User = get_user_model()
+
+
+def update_group_members(group, add_user_ids, remove_user_ids):
+    # Add and remove members of a group with one INSERT and one DELETE in a single transaction.
+    # Bulk operations skip the per-row Membership signals, so the visibility index and the
+    # cached form choices and group fragments are brought up to date here in bulk instead.
+    # Returns (added, removed) counts.
+    add_user_ids = set(add_user_ids) - {group.admin_id}
+    remove_user_ids = set(remove_user_ids) - {group.admin_id} - add_user_ids
+
+    with transaction.atomic():
+        added_ids = add_user_ids - set(
+            Membership.objects.filter(group=group, user_id__in=add_user_ids).values_list('user_id', flat=True)
+        )
+        Membership.objects.bulk_create(
+            [Membership(group=group, user_id=user_id) for user_id in added_ids],
+            ignore_conflicts=True
+        )
+        removed = Membership.objects.filter(group=group, user_id__in=remove_user_ids)
+        removed_users = list(removed.values_list('user_id', 'user__username')) if remove_user_ids else []
+        # The per-row post_delete handler is skipped; its work is done for all rows below
+        with bulk_delete(Membership):
+            removed_count = removed.delete()[0] if remove_user_ids else 0
+
+        sync_group_members_visibility(group.pk, added_ids, remove_user_ids)
+        if added_ids:
+            record_membership_events(
+                'member.joined', group.pk, User.objects.filter(id__in=added_ids).values_list('id', 'username')
+            )
+        record_membership_events('member.left', group.pk, removed_users)
+        transaction.on_commit(lambda: invalidate_user_group_choices(added_ids | remove_user_ids))
+        if added_ids or removed_count:
+            transaction.on_commit(lambda: bump_group_fragment_versions([group.pk]))
+
+    return len(added_ids), removed_count
@@ -0,0 +1,43 @@
+# Generated by Django 5.2.2 on 2026-10-18 02:11
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+def populate_visibility(apps, schema_editor):
+    Task = apps.get_model('tasks', 'Task')
+    TaskVisibility = apps.get_model('tasks', 'TaskVisibility')
+    pairs = set(Task.objects.values_list('owner_id', 'id'))
+    pairs.update(Task.objects.filter(assignee__isnull=False).values_list('assignee_id', 'id'))
+    pairs.update(Task.objects.filter(group__isnull=False).values_list('group__admin_id', 'id'))
+    pairs.update(Task.objects.filter(group__members__isnull=False).values_list('group__members__user_id', 'id'))
+    TaskVisibility.objects.bulk_create(
+        [TaskVisibility(user_id=user_id, task_id=task_id) for user_id, task_id in pairs],
+        batch_size=1000
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tasks', '0001_initial'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TaskVisibility',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('task', models.ForeignKey(help_text='The task visible to the user.', on_delete=django.db.models.deletion.CASCADE, related_name='visibility', to='tasks.task')),
+                ('user', models.ForeignKey(help_text='The user who can see the task.', on_delete=django.db.models.deletion.CASCADE, related_name='visible_tasks', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'verbose_name': 'Task Visibility',
+                'verbose_name_plural': 'Task Visibility',
+                'unique_together': {('user', 'task')},
+            },
+        ),
+        migrations.RunPython(populate_visibility, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,65 @@
+# Generated by Django 5.2.2 on 2026-10-18 02:36
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+def populate_counters(apps, schema_editor):
+    Task = apps.get_model('tasks', 'Task')
+    TaskVisibility = apps.get_model('tasks', 'TaskVisibility')
+    UserTaskCounter = apps.get_model('tasks', 'UserTaskCounter')
+    GroupTaskCounter = apps.get_model('tasks', 'GroupTaskCounter')
+
+    users = {}
+    for row in TaskVisibility.objects.values('user_id', 'task__status').annotate(count=models.Count('pk')).order_by():
+        users.setdefault(row['user_id'], {})[row['task__status']] = row['count']
+    UserTaskCounter.objects.bulk_create(
+        [UserTaskCounter(user_id=user_id, **counts) for user_id, counts in users.items()],
+        batch_size=1000
+    )
+
+    groups = {}
+    for row in Task.objects.filter(group__isnull=False).values('group_id', 'status').annotate(count=models.Count('pk')).order_by():
+        groups.setdefault(row['group_id'], {})[row['status']] = row['count']
+    GroupTaskCounter.objects.bulk_create(
+        [GroupTaskCounter(group_id=group_id, **counts) for group_id, counts in groups.items()],
+        batch_size=1000
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tasks', '0003_task_query_indexes'),
+        ('users', '0002_delete_task'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='GroupTaskCounter',
+            fields=[
+                ('ongoing', models.IntegerField(default=0)),
+                ('completed', models.IntegerField(default=0)),
+                ('overdue', models.IntegerField(default=0)),
+                ('group', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='task_counter', serialize=False, to='users.group')),
+            ],
+            options={
+                'abstract': False,
+            },
+        ),
+        migrations.CreateModel(
+            name='UserTaskCounter',
+            fields=[
+                ('ongoing', models.IntegerField(default=0)),
+                ('completed', models.IntegerField(default=0)),
+                ('overdue', models.IntegerField(default=0)),
+                ('user', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='task_counter', serialize=False, to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'abstract': False,
+            },
+        ),
+        migrations.RunPython(populate_counters, migrations.RunPython.noop),
+    ]
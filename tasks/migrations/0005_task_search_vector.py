@@ -0,0 +1,58 @@
+# Generated by Django 5.2.2 on 2026-10-18 02:51
+
+import django.contrib.postgres.search
+from django.db import migrations
+
+
+# PostgreSQL only: a trigger keeps search_vector current for every write path (save, bulk_create,
+# queryset.update), existing rows are backfilled and the vector gets a GIN index.
+# Other databases keep the column NULL and use the icontains fallback in TaskQuerySet.search().
+CREATE_SEARCH_SQL = [
+    """
+    CREATE OR REPLACE FUNCTION tasks_task_search_vector_update() RETURNS trigger AS $$
+    BEGIN
+        NEW.search_vector :=
+            setweight(to_tsvector('english', coalesce(NEW.title, '')), 'A') ||
+            setweight(to_tsvector('english', coalesce(NEW.description, '')), 'B');
+        RETURN NEW;
+    END
+    $$ LANGUAGE plpgsql
+    """,
+    """
+    CREATE TRIGGER tasks_task_search_vector_trigger
+    BEFORE INSERT OR UPDATE OF title, description, search_vector ON tasks_task
+    FOR EACH ROW EXECUTE FUNCTION tasks_task_search_vector_update()
+    """,
+    # Fires the trigger for every existing row
+    "UPDATE tasks_task SET search_vector = NULL",
+    "CREATE INDEX task_search_vector_idx ON tasks_task USING gin (search_vector)",
+]
+DROP_SEARCH_SQL = [
+    "DROP INDEX IF EXISTS task_search_vector_idx",
+    "DROP TRIGGER IF EXISTS tasks_task_search_vector_trigger ON tasks_task",
+    "DROP FUNCTION IF EXISTS tasks_task_search_vector_update()",
+]
+
+
+def run_on_postgresql(statements):
+    def run(apps, schema_editor):
+        if schema_editor.connection.vendor == 'postgresql':
+            for statement in statements:
+                schema_editor.execute(statement)
+    return run
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tasks', '0004_task_counters'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='task',
+            name='search_vector',
+            field=django.contrib.postgres.search.SearchVectorField(editable=False, null=True),
+        ),
+        migrations.RunPython(run_on_postgresql(CREATE_SEARCH_SQL), run_on_postgresql(DROP_SEARCH_SQL)),
+    ]
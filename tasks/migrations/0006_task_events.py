@@ -0,0 +1,27 @@
+# Generated by Django 5.2.2 on 2026-10-18 03:10
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tasks', '0005_task_search_vector'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TaskEvent',
+            fields=[
+                ('id', models.BigAutoField(primary_key=True, serialize=False)),
+                ('kind', models.CharField(choices=[('task.created', 'Task created'), ('task.updated', 'Task updated'), ('task.completed', 'Task completed'), ('task.deleted', 'Task deleted'), ('task.removed', 'Task no longer visible'), ('member.joined', 'Member joined'), ('member.left', 'Member left')], max_length=20)),
+                ('group_id', models.UUIDField(blank=True, null=True)),
+                ('user_id', models.BigIntegerField(blank=True, null=True)),
+                ('payload', models.JSONField(default=dict)),
+                ('created_at', models.DateTimeField(auto_now_add=True, db_index=True)),
+            ],
+            options={
+                'indexes': [models.Index(fields=['group_id', 'id'], name='taskevent_group_id_idx'), models.Index(fields=['user_id', 'id'], name='taskevent_user_id_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,25 @@
+# Generated by Django 5.2.2 on 2026-10-18 04:24
+
+import django.db.models.deletion
+import tasks.models
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tasks', '0010_task_due_idx'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CalendarFeedKey',
+            fields=[
+                ('user', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='calendar_feed_key', serialize=False, to=settings.AUTH_USER_MODEL)),
+                ('key', models.CharField(default=tasks.models.new_feed_key, max_length=32)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+        ),
+    ]
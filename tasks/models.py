@@ -1,12 +1,65 @@
-from django.db import models
+import secrets
+
+from django.db import models, connections, router, transaction
 from django.conf import settings
+from django.contrib.postgres.search import SearchQuery, SearchRank, SearchVectorField
+from task_management.ids import uuid7
 from users.models import Group
-import uuid
+
+SEARCH_CONFIG = 'english'
+
+class TaskQuerySet(models.QuerySet):
+    def visible_to(self, user):
+        # Owner, assignee, group member or group admin, via the TaskVisibility index
+        return self.filter(visibility__user=user)
+
+    def with_status(self, status_filter):
+        # Status tabs of the task list: 'ongoing' (default), 'completed', 'overdue' or 'all'
+        if status_filter in ['ongoing', 'completed', 'overdue']:
+            return self.filter(status=status_filter)
+        if status_filter == 'all':
+            return self
+        return self.filter(status='ongoing')
+
+    def search(self, text):
+        # Full-text search annotated with a `rank` (higher is better).
+        # PostgreSQL matches against the trigger-maintained, GIN-indexed search_vector;
+        # other databases (SQLite in development) fall back to per-word icontains over the
+        # already-filtered rows, ranking title matches above description matches.
+        if connections[self.db].vendor == 'postgresql':
+            query = SearchQuery(text, search_type='websearch', config=SEARCH_CONFIG)
+            # Cast to double precision so the rank survives a round trip through a cursor unchanged
+            rank = models.functions.Cast(SearchRank(models.F('search_vector'), query), models.FloatField())
+            return self.filter(search_vector=query).annotate(rank=rank)
+
+        # Rough websearch syntax: quotes are dropped and "-word" excludes
+        words = [word.strip('"') for word in text.split()]
+        excluded = [word[1:] for word in words if word.startswith('-') and len(word) > 1]
+        words = [word for word in words if word and not word.startswith('-')]
+        if not words:
+            return self.none()
+        queryset, rank = self, models.Value(0)
+        for word in excluded:
+            queryset = queryset.exclude(models.Q(title__icontains=word) | models.Q(description__icontains=word))
+        for word in words:
+            queryset = queryset.filter(models.Q(title__icontains=word) | models.Q(description__icontains=word))
+            rank += models.Case(
+                models.When(title__icontains=word, then=models.Value(2)),
+                default=models.Value(1)
+            )
+        return queryset.annotate(rank=rank)
+
+
+class TaskManager(models.Manager.from_queryset(TaskQuerySet)):
+    def get_queryset(self):
+        # The search vector is only used inside the database; don't ship it with every row
+        return super().get_queryset().defer('search_vector')
+
 
 # Create your models here.
 class Task(models.Model):
     # Use UUID as primary key for robust unique identification
-    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    id = models.UUIDField(primary_key=True, default=uuid7, editable=False)
     title = models.CharField(max_length=255, help_text="Short description of the task.")
     description = models.TextField(blank=True, help_text="Detailed description of the task.")
     # Task owner (the user who created it)
@@ -48,18 +101,296 @@ class Task(models.Model):
     due_date = models.DateField(null=True, blank=True, help_text="Optional due date for the task.")
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
+    # Set on occurrences created from a recurrence rule (tasks/recurrence.py); otherwise a normal task
+    recurrence = models.ForeignKey(
+        'TaskRecurrence',
+        on_delete=models.SET_NULL,
+        related_name='occurrences',
+        null=True,
+        blank=True,
+        editable=False
+    )
+    # Title (weight A) and description (weight B) as a tsvector. On PostgreSQL a trigger recomputes it
+    # on every INSERT and on UPDATEs touching the text, bulk paths included (migration 0005);
+    # on other databases it stays NULL and TaskQuerySet.search() falls back to icontains.
+    search_vector = SearchVectorField(null=True, editable=False)
+
+    objects = TaskManager()
 
     class Meta:
         verbose_name = "Task"
         verbose_name_plural = "Tasks"
         ordering = ['due_date', 'created_at'] # Order by due date then creation date
+        indexes = [
+            # Group detail page: a group's tasks in list order
+            models.Index(fields=['group', 'due_date', '-created_at'], name='task_group_due_idx'),
+            # Per-status lookups scoped to an assignee or a group, ordered by due date
+            models.Index(fields=['assignee', 'status', 'due_date'], name='task_assignee_status_due_idx'),
+            models.Index(fields=['group', 'status', 'due_date'], name='task_group_status_due_idx'),
+            # Calendar page and feed (tasks/agenda.py): every task due in a date window. Partial, so
+            # the task list (no due_date filter, tasks without one included) can't walk it in
+            # due_date order instead of starting from the user's visibility rows.
+            models.Index(fields=['due_date'], name='task_due_idx', condition=models.Q(due_date__isnull=False)),
+            # Open work only: used by the overdue sweep and due-date range scans
+            models.Index(
+                fields=['due_date'],
+                name='task_open_due_idx',
+                condition=~models.Q(status='completed')
+            ),
+            # Archival (tasks/archive.py): completed tasks, least recently touched first
+            models.Index(
+                fields=['updated_at'],
+                name='task_completed_updated_idx',
+                condition=models.Q(status='completed')
+            ),
+        ]
+        constraints = [
+            # One occurrence per rule and date, however often or concurrently the generator runs
+            models.UniqueConstraint(
+                fields=['recurrence', 'due_date'],
+                name='task_recurrence_due_uniq',
+                condition=models.Q(recurrence__isnull=False)
+            ),
+        ]
 
     def __str__(self):
         return f"{self.title} (Status: {self.status})"
 
-    def save(self, *args, **kwargs):
+    def apply_overdue_rule(self, today=None):
         # Auto-set status to 'overdue' if due_date is in the past and task is not completed
         from datetime import date
-        if self.due_date and self.due_date < date.today() and self.status == 'ongoing':
+        today = today or date.today()
+        if self.due_date and self.due_date < today and self.status == 'ongoing':
             self.status = 'overdue'
-        super().save(*args, **kwargs)
+
+    def save(self, *args, **kwargs):
+        self.apply_overdue_rule()
+        # The post_save handlers (tasks/signals.py) write the TaskEvent outbox row, visibility and
+        # counters; they commit or roll back together with the task row, in one transaction
+        using = kwargs.get('using') or router.db_for_write(Task, instance=self)
+        with transaction.atomic(using=using, savepoint=False):
+            super().save(*args, **kwargs)
+
+
+# A repeating task: the fields copied to every occurrence plus the schedule. Occurrences are real
+# Task rows, created lazily by `generate_recurring_tasks` (tasks/recurrence.py) for the dates up to
+# TASK_RECURRENCE_HORIZON_DAYS ahead; next_date is the first date not materialized yet (NULL once
+# the rule has ended). Deleting the rule stops the series and keeps the tasks already created.
+class TaskRecurrence(models.Model):
+    FREQUENCY_CHOICES = [
+        ('daily', 'Daily'),
+        ('weekly', 'Weekly'),
+        ('monthly', 'Monthly'),
+    ]
+    WEEKDAY_CHOICES = [(0, 'Mon'), (1, 'Tue'), (2, 'Wed'), (3, 'Thu'), (4, 'Fri'), (5, 'Sat'), (6, 'Sun')]
+
+    id = models.UUIDField(primary_key=True, default=uuid7, editable=False)
+    title = models.CharField(max_length=255)
+    description = models.TextField(blank=True)
+    owner = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name='task_recurrences')
+    assignee = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.SET_NULL,
+        related_name='assigned_task_recurrences',
+        null=True,
+        blank=True
+    )
+    group = models.ForeignKey(Group, on_delete=models.CASCADE, related_name='task_recurrences', null=True, blank=True)
+    frequency = models.CharField(max_length=10, choices=FREQUENCY_CHOICES)
+    interval = models.PositiveSmallIntegerField(default=1, help_text="Repeat every N days/weeks/months.")
+    # Weekly rules: comma-separated weekday numbers (0 = Monday); empty means the start date's weekday
+    weekdays = models.CharField(max_length=13, blank=True)
+    start_date = models.DateField()
+    until = models.DateField(null=True, blank=True, help_text="Last possible date (optional).")
+    next_date = models.DateField(null=True, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        indexes = [
+            # The generator's batch query: rules with dates due inside the horizon
+            models.Index(fields=['next_date'], name='recurrence_next_date_idx', condition=models.Q(next_date__isnull=False)),
+        ]
+
+    def __str__(self):
+        return f"{self.title} ({self.describe()})"
+
+    def weekday_set(self):
+        return {int(day) for day in self.weekdays.split(',') if day} or {self.start_date.weekday()}
+
+    def describe(self):
+        unit = {'daily': 'day', 'weekly': 'week', 'monthly': 'month'}[self.frequency]
+        text = f"every {unit}" if self.interval == 1 else f"every {self.interval} {unit}s"
+        if self.frequency == 'weekly':
+            names = dict(self.WEEKDAY_CHOICES)
+            text += " on " + ", ".join(names[day] for day in sorted(self.weekday_set()))
+        elif self.frequency == 'monthly':
+            text += f" on day {self.start_date.day}"
+        if self.until:
+            text += f" until {self.until:%b %d, %Y}"
+        return text
+
+
+class ArchivedTaskQuerySet(models.QuerySet):
+    def visible_to(self, user):
+        # Archived tasks have no TaskVisibility rows; the cold path checks the rules directly
+        group_ids = Group.objects.filter(models.Q(admin=user) | models.Q(members__user=user)).values('id')
+        return self.filter(models.Q(owner=user) | models.Q(assignee=user) | models.Q(group_id__in=group_ids))
+
+
+# Completed tasks moved out of tasks_task by `archive_completed_tasks` (tasks/archive.py), so the
+# hot table, its indexes and the visibility index only hold recent work. Same ids and columns as
+# Task; read-only, listed on the Archived tab and the group page's archived view.
+class ArchivedTask(models.Model):
+    id = models.UUIDField(primary_key=True, editable=False)
+    title = models.CharField(max_length=255)
+    description = models.TextField(blank=True)
+    owner = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name='archived_tasks')
+    assignee = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.SET_NULL,
+        related_name='assigned_archived_tasks',
+        null=True,
+        blank=True
+    )
+    group = models.ForeignKey(Group, on_delete=models.CASCADE, related_name='archived_tasks', null=True, blank=True)
+    status = models.CharField(max_length=10, choices=Task.STATUS_CHOICES)
+    due_date = models.DateField(null=True, blank=True)
+    created_at = models.DateTimeField()
+    updated_at = models.DateTimeField()
+    archived_at = models.DateTimeField(auto_now_add=True)
+
+    objects = ArchivedTaskQuerySet.as_manager()
+
+    class Meta:
+        indexes = [
+            # Archived tab and group archive view: most recently finished first
+            models.Index(fields=['owner', '-updated_at'], name='archivedtask_owner_idx'),
+            models.Index(fields=['assignee', '-updated_at'], name='archivedtask_assignee_idx'),
+            models.Index(fields=['group', '-updated_at'], name='archivedtask_group_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.title} (archived)"
+
+
+# Denormalized index of which users can see which tasks.
+# Kept in sync by tasks/signals.py so the task list is a single indexed lookup
+# instead of an OR across owner/assignee/group membership/group admin.
+class TaskVisibility(models.Model):
+    user = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        related_name='visible_tasks',
+        help_text="The user who can see the task."
+    )
+    task = models.ForeignKey(
+        Task,
+        on_delete=models.CASCADE,
+        related_name='visibility',
+        help_text="The task visible to the user."
+    )
+
+    class Meta:
+        unique_together = ('user', 'task') # One row per (user, task); also serves as the lookup index
+        verbose_name = "Task Visibility"
+        verbose_name_plural = "Task Visibility"
+
+    def __str__(self):
+        return f"{self.user_id} -> {self.task_id}"
+
+
+# Task counts per status, maintained incrementally by tasks/counters.py so the task list tabs
+# and group list badges read one row instead of running aggregate scans.
+# `rebuild_task_counters` recomputes them if they ever drift.
+class TaskCounterBase(models.Model):
+    ongoing = models.IntegerField(default=0)
+    completed = models.IntegerField(default=0)
+    overdue = models.IntegerField(default=0)
+
+    class Meta:
+        abstract = True
+
+    @property
+    def total(self):
+        return self.ongoing + self.completed + self.overdue
+
+
+class UserTaskCounter(TaskCounterBase):
+    # Counts of the tasks visible to the user (same rows as TaskVisibility)
+    user = models.OneToOneField(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name='task_counter'
+    )
+
+    def __str__(self):
+        return f"{self.user_id}: {self.ongoing}/{self.completed}/{self.overdue}"
+
+
+class GroupTaskCounter(TaskCounterBase):
+    # Counts of the tasks in the group
+    group = models.OneToOneField(
+        Group,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name='task_counter'
+    )
+
+    def __str__(self):
+        return f"{self.group_id}: {self.ongoing}/{self.completed}/{self.overdue}"
+
+
+# Outbox of realtime task/membership events (tasks/events.py). Rows are written in the same
+# transaction as the change they describe and streamed to browsers over SSE; the auto-increment
+# id doubles as the SSE event id. Each row targets one channel: a group (everyone who can see the
+# group's tasks) or a single user (personal tasks, own membership changes). Plain id columns
+# instead of foreign keys, so events outlive the rows they describe and never block deletes.
+class TaskEvent(models.Model):
+    KIND_CHOICES = [
+        ('task.created', 'Task created'),
+        ('task.updated', 'Task updated'),
+        ('task.completed', 'Task completed'),
+        ('task.deleted', 'Task deleted'),
+        ('task.removed', 'Task no longer visible'),
+        ('task.archived', 'Task archived'),
+        ('member.joined', 'Member joined'),
+        ('member.left', 'Member left'),
+    ]
+    id = models.BigAutoField(primary_key=True)
+    kind = models.CharField(max_length=20, choices=KIND_CHOICES)
+    group_id = models.UUIDField(null=True, blank=True)
+    user_id = models.BigIntegerField(null=True, blank=True)
+    payload = models.JSONField(default=dict)
+    created_at = models.DateTimeField(auto_now_add=True, db_index=True)
+
+    class Meta:
+        indexes = [
+            # Replays: a channel's events after a given id
+            models.Index(fields=['group_id', 'id'], name='taskevent_group_id_idx'),
+            models.Index(fields=['user_id', 'id'], name='taskevent_user_id_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.id} {self.kind}"
+
+    @property
+    def channel(self):
+        return f'group:{self.group_id}' if self.group_id else f'user:{self.user_id}'
+
+
+def new_feed_key():
+    return secrets.token_urlsafe(16)
+
+
+# Per-user secret in the calendar feed URL (tasks/agenda.py). Replacing the key revokes every URL
+# handed out before.
+class CalendarFeedKey(models.Model):
+    user = models.OneToOneField(
+        settings.AUTH_USER_MODEL, on_delete=models.CASCADE, primary_key=True, related_name='calendar_feed_key'
+    )
+    key = models.CharField(max_length=32, default=new_feed_key)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"Calendar feed key for {self.user_id}"
@@ -0,0 +1,82 @@
+# tasks/overdue.py
+
+import logging
+import threading
+from datetime import date, timedelta
+
+from django.conf import settings
+from django.db import transaction, close_old_connections
+from django.utils import timezone
+from tasks.models import Task
+from .counters import apply_counter_deltas, status_change_deltas
+from .events import prune_task_events, record_task_events
+from .recurrence import generate_recurring_tasks
+
+logger = logging.getLogger(__name__)
+
+
+def expired_tasks(today):
+    # The exclude() restates the task_open_due_idx predicate so planners that cannot infer it
+    # from status='ongoing' (SQLite) still pick the partial index
+    return Task.objects.exclude(status='completed').filter(status='ongoing', due_date__lt=today).order_by()
+
+
+def sweep_overdue_tasks(today=None, batch_size=1000):
+    # Flip expired 'ongoing' tasks to 'overdue' in set-based batches; safe to run repeatedly.
+    # Returns the number of tasks moved.
+    today = today or date.today()
+    moved = 0
+    while True:
+        with transaction.atomic():
+            # Rows stay locked until the UPDATE so the counter deltas match what it changes
+            batch_ids = list(
+                expired_tasks(today).select_for_update().values_list('id', flat=True)[:batch_size]
+            )
+            if not batch_ids:
+                break
+            batch = Task.objects.filter(id__in=batch_ids, status='ongoing')
+            deltas = status_change_deltas(batch, 'overdue')
+            moved += batch.update(status='overdue', updated_at=timezone.now())
+            apply_counter_deltas(*deltas)
+            record_task_events('task.updated', batch_ids)
+    return moved
+
+
+# Minimal in-process scheduler: a daemon thread that runs the sweep every `interval` seconds,
+# after extending recurring tasks to their horizon (tasks/recurrence.py), then prunes realtime
+# events older than TASK_EVENTS_RETENTION_HOURS (tasks/events.py). Started from
+# gunicorn.conf.py unless OVERDUE_SWEEP_INTERVAL is 0; concurrent runs from several workers are
+# harmless because all three jobs are idempotent.
+class OverdueSweepScheduler(threading.Thread):
+    def __init__(self, interval, batch_size=1000):
+        super().__init__(name='overdue-sweep', daemon=True)
+        self.interval = interval
+        self.batch_size = batch_size
+        self.stopped = threading.Event()
+
+    def run(self):
+        while not self.stopped.wait(self.interval):
+            try:
+                self.run_once()
+            finally:
+                close_old_connections()
+
+    def run_once(self):
+        try:
+            created = generate_recurring_tasks(batch_size=settings.TASK_RECURRENCE_BATCH_SIZE)
+            logger.info("Created %d recurring task occurrence(s).", created)
+        except Exception:
+            logger.exception("Generating recurring tasks failed.")
+        try:
+            moved = sweep_overdue_tasks(batch_size=self.batch_size)
+            logger.info("Overdue sweep moved %d task(s) to overdue.", moved)
+        except Exception:
+            logger.exception("Overdue sweep failed.")
+        try:
+            pruned = prune_task_events(timezone.now() - timedelta(hours=settings.TASK_EVENTS_RETENTION_HOURS))
+            logger.info("Pruned %d realtime task event(s).", pruned)
+        except Exception:
+            logger.exception("Pruning task events failed.")
+
+    def stop(self):
+        self.stopped.set()
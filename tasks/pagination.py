@@ -0,0 +1,182 @@
+# tasks/pagination.py
+
+from django.core import signing
+from django.core.exceptions import FieldDoesNotExist
+from django.db import models
+
+
+# A page of results from KeysetPaginator. Iterates like a Django Page but has no count/number.
+class KeysetPage:
+    def __init__(self, object_list, next_cursor=None, previous_cursor=None):
+        self.object_list = object_list
+        self.next_cursor = next_cursor
+        self.previous_cursor = previous_cursor
+
+    def __iter__(self):
+        return iter(self.object_list)
+
+    def __len__(self):
+        return len(self.object_list)
+
+    def has_next(self):
+        return self.next_cursor is not None
+
+    def has_previous(self):
+        return self.previous_cursor is not None
+
+    def has_other_pages(self):
+        return self.has_next() or self.has_previous()
+
+
+# Cursor (seek) paginator: each page is fetched with a WHERE on the sort key of the
+# last row seen, so deep pages cost the same as the first one and no COUNT(*) is issued.
+class KeysetPaginator:
+    # (field, descending); NULLs always sort after every non-NULL value
+    ordering = [('due_date', False), ('created_at', True), ('id', True)]
+    cursor_salt = 'tasks.pagination.cursor'
+
+    def __init__(self, per_page, ordering=None):
+        self.per_page = per_page
+        if ordering is not None:
+            self.ordering = ordering
+
+    def order_by(self, reverse=False):
+        # NULLs sort last going forward, so they come first when walking backwards
+        nulls = {'nulls_first': True} if reverse else {'nulls_last': True}
+        expressions = []
+        for name, descending in self.ordering:
+            if descending != reverse:
+                expressions.append(models.F(name).desc(**nulls))
+            else:
+                expressions.append(models.F(name).asc(**nulls))
+        return expressions
+
+    def encode_cursor(self, obj):
+        values = []
+        for name, _ in self.ordering:
+            value = obj[name] if isinstance(obj, dict) else getattr(obj, name)
+            if value is None or isinstance(value, (int, float)):
+                # Numbers (e.g. a search rank annotation) are kept as they are so seeks compare exactly
+                values.append(value)
+            else:
+                values.append(value.isoformat() if hasattr(value, 'isoformat') else str(value))
+        return signing.dumps(values, salt=self.cursor_salt, compress=True)
+
+    def decode_cursor(self, token, model):
+        # Returns the decoded sort key values, or None for a missing/invalid token
+        if not token:
+            return None
+        try:
+            values = signing.loads(token, salt=self.cursor_salt)
+        except signing.BadSignature:
+            return None
+        if not isinstance(values, list) or len(values) != len(self.ordering):
+            return None
+        decoded = []
+        for (name, _), value in zip(self.ordering, values):
+            try:
+                field = model._meta.get_field(name)
+            except FieldDoesNotExist:
+                # An annotation: only plain numbers are accepted
+                if value is not None and (not isinstance(value, (int, float)) or isinstance(value, bool)):
+                    return None
+                decoded.append(value)
+                continue
+            try:
+                decoded.append(None if value is None else field.to_python(value))
+            except Exception:
+                return None
+        return decoded
+
+    def seek_filter(self, values, backward=False):
+        # Rows strictly after (or before, if backward) the given sort key
+        condition = models.Q(pk__in=[])
+        equal_so_far = models.Q()
+        for (name, descending), value in zip(self.ordering, values):
+            forward_is_greater = not descending
+            if backward:
+                forward_is_greater = not forward_is_greater
+            if value is None:
+                # NULLs sort last going forward: nothing comes after them, every non-NULL comes before
+                step = models.Q(**{f'{name}__isnull': False}) if backward else models.Q(pk__in=[])
+                equal = models.Q(**{f'{name}__isnull': True})
+            else:
+                lookup = 'gt' if forward_is_greater else 'lt'
+                step = models.Q(**{f'{name}__{lookup}': value})
+                if not backward:
+                    step |= models.Q(**{f'{name}__isnull': True})
+                equal = models.Q(**{name: value})
+            condition |= equal_so_far & step
+            equal_so_far &= equal
+        return condition
+
+    def page_query(self, queryset, after=None, before=None):
+        # The sliced queryset for one page, plus (backward, has_previous) for build_page()
+        after_values = self.decode_cursor(after, queryset.model)
+        before_values = self.decode_cursor(before, queryset.model) if after_values is None else None
+
+        if before_values is not None:
+            query = queryset.filter(self.seek_filter(before_values, backward=True)) \
+                .order_by(*self.order_by(reverse=True))[:self.per_page + 1]
+            return query, True, False
+
+        if after_values is not None:
+            queryset = queryset.filter(self.seek_filter(after_values))
+        return queryset.order_by(*self.order_by())[:self.per_page + 1], False, after_values is not None
+
+    def build_page(self, rows, backward, has_previous):
+        has_more = len(rows) > self.per_page
+        if backward:
+            rows = list(reversed(rows[:self.per_page]))
+            next_cursor = self.encode_cursor(rows[-1]) if rows else None
+            previous_cursor = self.encode_cursor(rows[0]) if rows and has_more else None
+            return KeysetPage(rows, next_cursor=next_cursor, previous_cursor=previous_cursor)
+
+        rows = rows[:self.per_page]
+        next_cursor = self.encode_cursor(rows[-1]) if rows and has_more else None
+        previous_cursor = self.encode_cursor(rows[0]) if rows and has_previous else None
+        return KeysetPage(rows, next_cursor=next_cursor, previous_cursor=previous_cursor)
+
+    def paginate(self, queryset, after=None, before=None):
+        query, backward, has_previous = self.page_query(queryset, after, before)
+        return self.build_page(list(query), backward, has_previous)
+
+    async def apaginate(self, queryset, after=None, before=None):
+        # Same page through the async ORM (async views)
+        query, backward, has_previous = self.page_query(queryset, after, before)
+        return self.build_page([row async for row in query], backward, has_previous)
+
+
+# ListView mixin swapping Django's offset paginator for KeysetPaginator.
+# Cursors travel in the ?after= / ?before= query parameters.
+class KeysetPaginationMixin:
+    keyset_paginator_class = KeysetPaginator
+    keyset_ordering = None  # None: the paginator's default ordering
+
+    def get_keyset_ordering(self):
+        return self.keyset_ordering
+
+    def paginate_queryset(self, queryset, page_size):
+        paginator = self.keyset_paginator_class(page_size, ordering=self.get_keyset_ordering())
+        page = paginator.paginate(
+            queryset,
+            after=self.request.GET.get('after'),
+            before=self.request.GET.get('before')
+        )
+        return (paginator, page, page.object_list, page.has_other_pages())
+
+
+# Previous/next links for a KeysetPage whose cursors travel in custom query parameters,
+# for pages that paginate more than one list at a time.
+def keyset_page_urls(request, page, after_param='after', before_param='before'):
+    def build(param, cursor):
+        params = request.GET.copy()
+        params.pop(after_param, None)
+        params.pop(before_param, None)
+        params[param] = cursor
+        return f'?{params.urlencode()}'
+
+    return {
+        'previous': build(before_param, page.previous_cursor) if page.has_previous() else None,
+        'next': build(after_param, page.next_cursor) if page.has_next() else None,
+    }
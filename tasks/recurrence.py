@@ -0,0 +1,128 @@
+# tasks/recurrence.py
+# Recurring tasks. A TaskRecurrence holds the schedule; its occurrences are ordinary Task rows,
+# materialized lazily: only dates up to TASK_RECURRENCE_HORIZON_DAYS ahead exist at any time,
+# so a daily rule costs a couple of weeks of rows, not years. `generate_recurring_tasks` extends
+# every rule to the horizon in batches and goes through bulk_create_tasks(), so occurrences get
+# the overdue rule, visibility rows, counters and events like any other task.
+
+import calendar
+from datetime import date, timedelta
+
+from django.conf import settings
+from django.db import transaction
+from tasks.models import Task, TaskRecurrence
+from .bulk import bulk_create_tasks
+
+
+def add_months(start, months, day):
+    # The given day of the month `months` after start's month, clamped to the month's length
+    year, month = divmod(start.month - 1 + months, 12)
+    year, month = start.year + year, month + 1
+    return date(year, month, min(day, calendar.monthrange(year, month)[1]))
+
+
+def next_occurrence(rule, after):
+    # First date of the series strictly after `after` (and not before start_date), or None once
+    # the rule has ended
+    start = rule.start_date
+    after = max(after, start - timedelta(days=1))
+    if rule.frequency == 'daily':
+        periods = (after - start).days // rule.interval + 1
+        candidate = start + timedelta(days=periods * rule.interval)
+    elif rule.frequency == 'weekly':
+        # Weeks are counted from the Monday of the start week; every interval-th week is active
+        week_zero = start - timedelta(days=start.weekday())
+        weekdays = rule.weekday_set()
+        candidate = after + timedelta(days=1)
+        for _ in range(7 * rule.interval + 7):
+            if candidate.weekday() in weekdays and (candidate - week_zero).days // 7 % rule.interval == 0:
+                break
+            candidate += timedelta(days=1)
+        else:
+            return None  # no valid weekday
+    else:
+        elapsed = (after.year - start.year) * 12 + after.month - start.month
+        periods = max(0, elapsed // rule.interval)
+        candidate = add_months(start, periods * rule.interval, start.day)
+        while candidate <= after:
+            periods += 1
+            candidate = add_months(start, periods * rule.interval, start.day)
+    if rule.until and candidate > rule.until:
+        return None
+    return candidate
+
+
+def pending_dates(rule, today, horizon, limit=400):
+    # Dates to materialize now, advancing rule.next_date past them. Occurrences missed while the
+    # generator was not running collapse into one (the earliest, which becomes overdue) instead
+    # of a backlog of stale tasks.
+    dates = []
+    while rule.next_date and rule.next_date <= horizon and len(dates) < limit:
+        dates.append(rule.next_date)
+        after = max(rule.next_date, today - timedelta(days=1))
+        rule.next_date = next_occurrence(rule, after)
+    return dates
+
+
+def occurrence(rule, due_date):
+    return Task(
+        title=rule.title,
+        description=rule.description,
+        owner_id=rule.owner_id,
+        assignee_id=rule.assignee_id,
+        group_id=rule.group_id,
+        status='ongoing',
+        due_date=due_date,
+        recurrence=rule,
+    )
+
+
+def horizon_for(today, horizon_days=None):
+    return today + timedelta(days=settings.TASK_RECURRENCE_HORIZON_DAYS if horizon_days is None else horizon_days)
+
+
+def generate_recurring_tasks(today=None, horizon_days=None, batch_size=500):
+    # Create the occurrences due within the horizon for every rule, `batch_size` rules per
+    # transaction. Safe to run repeatedly and concurrently. Returns the number of tasks created.
+    today = today or date.today()
+    horizon = horizon_for(today, horizon_days)
+    created = 0
+    while True:
+        with transaction.atomic():
+            # Rules stay locked until next_date has moved past what was created from them
+            rules = list(
+                TaskRecurrence.objects.filter(next_date__lte=horizon).order_by('next_date')
+                .select_for_update(skip_locked=True)[:batch_size]
+            )
+            if not rules:
+                break
+            tasks = [occurrence(rule, due_date) for rule in rules for due_date in pending_dates(rule, today, horizon)]
+            created += len(bulk_create_tasks(tasks))
+            TaskRecurrence.objects.bulk_update(rules, ['next_date'])
+    return created
+
+
+def start_recurrence(task, frequency, interval=1, weekdays=(), until=None, today=None):
+    # Save a task from the task form as the first occurrence of a new rule that starts on its due
+    # date, and materialize the rest of the horizon. Returns the rule.
+    today = today or date.today()
+    rule = TaskRecurrence(
+        title=task.title,
+        description=task.description,
+        owner_id=task.owner_id,
+        assignee_id=task.assignee_id,
+        group_id=task.group_id,
+        frequency=frequency,
+        interval=interval,
+        weekdays=','.join(str(day) for day in sorted(weekdays)),
+        start_date=task.due_date,
+        until=until,
+    )
+    rule.next_date = next_occurrence(rule, task.due_date)
+    with transaction.atomic():
+        rule.save()
+        task.recurrence = rule
+        task.save()
+        bulk_create_tasks([occurrence(rule, due_date) for due_date in pending_dates(rule, today, horizon_for(today))])
+        rule.save(update_fields=['next_date'])
+    return rule
@@ -0,0 +1,72 @@
+# tasks/seeding.py
+# Deterministic synthetic datasets for the query/benchmark management commands.
+# The query/benchmark commands run this inside a transaction they roll back; seed_perf keeps the data.
+
+import math
+import random
+from datetime import date, timedelta
+
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import make_password
+from tasks.models import Task
+from tasks.visibility import find_visibility_drift, repair_visibility
+from users.models import Group, Membership
+
+User = get_user_model()
+
+# Small vocabulary so seeded titles/descriptions give search queries realistic hit rates
+WORDS = (
+    'report budget review release deploy invoice client meeting design draft audit backlog '
+    'migration database server outage roadmap hiring onboarding survey feedback contract '
+    'renewal security patch testing documentation analytics dashboard marketing campaign '
+    'launch sprint planning retrospective vendor payment quarterly forecast inventory'
+).split()
+
+
+def seed_dataset(task_count, seed=42, batch_size=5000, user_count=None, group_count=None,
+                 large_groups=2, large_group_size=50, small_group_size=5, prefix='seed', password=None):
+    # A few large groups and many small ones, due dates spread over a year, ~70% group tasks.
+    # Larger groups hold more tasks (weighted by the square root of their size: a group with 100x the
+    # members has 10x the tasks), which keeps the visibility index from being all large-group rows.
+    # Users get `password` (one hash for all of them) or an unusable one. Returns (users, groups).
+    rng = random.Random(seed)
+    user_count = user_count or max(10, task_count // 50)
+    group_count = group_count or max(2, user_count // 5)
+    password = make_password(password)
+    users = User.objects.bulk_create(
+        [User(username=f'{prefix}_user_{i}', password=password) for i in range(user_count)],
+        batch_size=batch_size
+    )
+    groups = Group.objects.bulk_create(
+        [Group(name=f'{prefix}_group_{i}', admin=users[i % user_count]) for i in range(group_count)],
+        batch_size=batch_size
+    )
+    sizes = [
+        min(user_count, large_group_size if g < large_groups else rng.randint(1, small_group_size))
+        for g in range(group_count)
+    ]
+    Membership.objects.bulk_create(
+        [Membership(user=user, group=group) for group, size in zip(groups, sizes) for user in rng.sample(users, size)],
+        batch_size=batch_size,
+        ignore_conflicts=True
+    )
+    weights = [math.sqrt(size) for size in sizes]
+    today = date.today()
+    statuses = ['ongoing', 'ongoing', 'completed', 'completed', 'completed', 'overdue']
+    for start in range(0, task_count, batch_size):
+        count = min(start + batch_size, task_count) - start
+        task_groups = rng.choices(groups, weights=weights, k=count)
+        Task.objects.bulk_create([
+            Task(
+                title=f"{' '.join(rng.sample(WORDS, 3)).capitalize()} #{i}",
+                description=' '.join(rng.choices(WORDS, k=rng.randint(0, 30))),
+                owner=rng.choice(users),
+                assignee=rng.choice(users) if rng.random() < 0.8 else None,
+                group=group if rng.random() < 0.7 else None,
+                status=rng.choice(statuses),
+                due_date=today + timedelta(days=rng.randint(-180, 180)) if rng.random() < 0.9 else None,
+            )
+            for i, group in enumerate(task_groups, start)
+        ])
+    repair_visibility(*find_visibility_drift(), batch_size=batch_size)
+    return users, groups
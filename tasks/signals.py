@@ -0,0 +1,164 @@
+# tasks/signals.py
+
+import threading
+from contextlib import contextmanager
+
+from django.conf import settings
+from django.db.models.signals import post_save, post_delete, pre_save, pre_delete
+from django.dispatch import receiver
+from tasks.models import CalendarFeedKey, GroupTaskCounter, Task, TaskEvent, TaskVisibility, UserTaskCounter
+from users.models import Group, Membership
+from .counters import apply_counter_deltas, task_change_deltas
+from .events import record_membership_events, removal_events, task_events
+from .fragments import bump_group_fragment_versions
+from .forms import invalidate_user_group_choices
+from .visibility import sync_task_visibility, sync_user_group_visibility
+
+# Fields that decide who can see a task; saves touching only other fields skip the resync
+VISIBILITY_FIELDS = {'owner', 'owner_id', 'assignee', 'assignee_id', 'group', 'group_id'}
+
+# Groups being deleted on this thread (from pre_delete to post_delete). Their memberships cascade
+# together with their tasks, so there is no visibility to resync; rows re-added for the admin
+# would point at tasks deleted later in the same cascade.
+_deleting = threading.local()
+
+
+def deleting_group_ids():
+    if not hasattr(_deleting, 'group_ids'):
+        _deleting.group_ids = set()
+    return _deleting.group_ids
+
+
+# Models whose per-row delete handlers are skipped on this thread while a bulk operation
+# (tasks/membership.py, tasks/archive.py) deletes them with the ORM and does the handlers' work set-based
+def bulk_deleting_models():
+    if not hasattr(_deleting, 'models'):
+        _deleting.models = set()
+    return _deleting.models
+
+
+@contextmanager
+def bulk_delete(model):
+    bulk_deleting_models().add(model)
+    try:
+        yield
+    finally:
+        bulk_deleting_models().discard(model)
+
+
+@receiver(pre_save, sender=Task)
+def task_state_tracking(sender, instance, **kwargs):
+    # Remember the stored status, group and audience so post_save can move the dashboard counters
+    # and tell whoever can no longer see the task
+    instance._previous_state = (
+        Task.objects.filter(pk=instance.pk).values_list('status', 'group_id', 'owner_id', 'assignee_id').first()
+        if not instance._state.adding else None
+    )
+
+
+@receiver(post_save, sender=Task)
+def task_saved(sender, instance, created, update_fields=None, **kwargs):
+    previous_status, previous_group_id, previous_owner_id, previous_assignee_id = (
+        getattr(instance, '_previous_state', None) or (None, None, None, None)
+    )
+    if created:
+        kind = 'task.created'
+    elif instance.status == 'completed' and previous_status != 'completed':
+        kind = 'task.completed'
+    else:
+        kind = 'task.updated'
+    previous = {instance.pk: (previous_group_id, previous_owner_id, previous_assignee_id)} if previous_status else {}
+    TaskEvent.objects.bulk_create(task_events(kind, [instance]) + removal_events(previous, [instance]))
+
+    if not created and update_fields is not None and not VISIBILITY_FIELDS.intersection(update_fields):
+        if previous_status == instance.status:
+            return
+        # Same audience, different status
+        previous_user_ids = user_ids = set(TaskVisibility.objects.filter(task=instance).values_list('user_id', flat=True))
+    else:
+        previous_user_ids, user_ids = sync_task_visibility(instance)
+    if previous_status is None:
+        previous_user_ids = ()
+    apply_counter_deltas(*task_change_deltas(
+        previous_status, previous_user_ids, previous_group_id,
+        instance.status, user_ids, instance.group_id
+    ))
+
+
+@receiver(pre_delete, sender=Task)
+def task_deleting(sender, instance, **kwargs):
+    if Task in bulk_deleting_models():
+        return
+    # Visibility rows are still there in pre_delete; they cascade away with the task
+    user_ids = TaskVisibility.objects.filter(task=instance).values_list('user_id', flat=True)
+    apply_counter_deltas(*task_change_deltas(instance.status, user_ids, instance.group_id, None, (), None))
+    TaskEvent.objects.bulk_create(task_events('task.deleted', [instance]))
+
+
+@receiver(post_save, sender=Membership)
+def membership_saved(sender, instance, created, **kwargs):
+    if created:
+        sync_user_group_visibility(instance.user_id, instance.group_id)
+        invalidate_user_group_choices([instance.user_id])
+        bump_group_fragment_versions([instance.group_id])
+        record_membership_events('member.joined', instance.group_id, [(instance.user_id, instance.user.username)])
+
+
+@receiver(post_delete, sender=Membership)
+def membership_deleted(sender, instance, **kwargs):
+    if Membership in bulk_deleting_models():
+        return
+    if instance.group_id not in deleting_group_ids():
+        sync_user_group_visibility(instance.user_id, instance.group_id)
+    invalidate_user_group_choices([instance.user_id])
+    bump_group_fragment_versions([instance.group_id])
+    record_membership_events('member.left', instance.group_id, [(instance.user_id, instance.user.username)])
+
+
+@receiver(post_save, sender=settings.AUTH_USER_MODEL)
+def user_created(sender, instance, created, **kwargs):
+    # Counter rows exist from the start, so task writes only need their UPDATE (tasks/counters.py);
+    # so does the calendar feed key, which the calendar page reads (tasks/agenda.py)
+    if created:
+        UserTaskCounter.objects.get_or_create(user=instance)
+        CalendarFeedKey.objects.get_or_create(user=instance)
+
+
+@receiver(pre_save, sender=Group)
+def group_admin_tracking(sender, instance, **kwargs):
+    # Remember the previous admin so post_save can move visibility over
+    instance._previous_admin_id = (
+        Group.objects.filter(pk=instance.pk).values_list('admin_id', flat=True).first()
+        if not instance._state.adding else None
+    )
+
+
+@receiver(post_save, sender=Group)
+def group_saved(sender, instance, created, **kwargs):
+    # Group names appear in every member's cached task form choices
+    previous_admin_id = getattr(instance, '_previous_admin_id', None)
+    member_ids = list(Membership.objects.filter(group=instance).values_list('user_id', flat=True))
+    invalidate_user_group_choices(member_ids + [instance.admin_id, previous_admin_id])
+    # Name and admin appear in the cached group blocks and task rows
+    bump_group_fragment_versions([instance.pk])
+
+    if created:
+        GroupTaskCounter.objects.get_or_create(group=instance)
+        return
+    if previous_admin_id == instance.admin_id:
+        return
+    if previous_admin_id:
+        sync_user_group_visibility(previous_admin_id, instance.pk)
+    sync_user_group_visibility(instance.admin_id, instance.pk)
+
+
+@receiver(pre_delete, sender=Group)
+def group_deleting(sender, instance, **kwargs):
+    deleting_group_ids().add(instance.pk)
+
+
+@receiver(post_delete, sender=Group)
+def group_deleted(sender, instance, **kwargs):
+    deleting_group_ids().discard(instance.pk)
+    # Members are invalidated as their memberships cascade; the admin may not be a member
+    invalidate_user_group_choices([instance.admin_id])
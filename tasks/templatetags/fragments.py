@@ -0,0 +1,39 @@
+# tasks/templatetags/fragments.py
+
+from django import template
+from django.conf import settings
+from django.core.cache.utils import make_template_fragment_key
+from tasks.fragments import fragment_cache, record_fragment_access
+
+register = template.Library()
+
+
+class FragmentCacheNode(template.Node):
+    def __init__(self, nodelist, name, vary_on):
+        self.nodelist = nodelist
+        self.name = name
+        self.vary_on = vary_on
+
+    def render(self, context):
+        key = make_template_fragment_key(self.name, [var.resolve(context) for var in self.vary_on])
+        cache = fragment_cache()
+        value = cache.get(key)
+        record_fragment_access(context.get('request'), self.name, value is not None)
+        if value is None:
+            value = self.nodelist.render(context)
+            cache.set(key, value, settings.FRAGMENT_CACHE_TIMEOUT)
+        return value
+
+
+@register.tag('fragmentcache')
+def do_fragmentcache(parser, token):
+    # {% fragmentcache "name" var1 var2 ... %} ... {% endfragmentcache %}
+    # Like Django's {% cache %}, but uses the 'fragments' cache and the default timeout from
+    # settings, and records hits/misses. The vary-on values must cover everything the markup shows.
+    bits = token.split_contents()
+    if len(bits) < 2:
+        raise template.TemplateSyntaxError(f"'{bits[0]}' tag requires at least a fragment name.")
+    nodelist = parser.parse(('endfragmentcache',))
+    parser.delete_first_token()
+    name = bits[1].strip('"\'')
+    return FragmentCacheNode(nodelist, name, [parser.compile_filter(bit) for bit in bits[2:]])
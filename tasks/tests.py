@@ -1,3 +1,1357 @@
-from django.test import TestCase
+import asyncio
+import csv
+import json
+import tempfile
+import time
+import uuid
+from datetime import date, timedelta
+from io import StringIO
+from unittest import mock, skipUnless
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core import signing
+from django.core.cache import cache, caches
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.db import DatabaseError, connection, connections
+from django.http import HttpResponse
+from django.test import RequestFactory, SimpleTestCase, TestCase, TransactionTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+
+from task_management import routers
+from task_management.ids import uuid7
+from task_management.middleware import ReplicaRoutingMiddleware, ViewBudgetExceeded
+from task_management.settings import database_settings
+from tasks.agenda import FEED_SALT, calendar_window, feed_token, ics_fold, tasks_by_day
+from tasks.archive import archive_completed_tasks
+from tasks.bulk import bulk_create_tasks, complete_tasks, move_tasks, reassign_tasks
+from tasks.counters import apply_counter_deltas, find_counter_drift, user_task_counts
+from tasks.events import OVERFLOW, EventBroker
+from tasks.forms import GROUP_CHOICES_CACHE_KEY, TaskBulkActionForm, TaskForm, user_group_choices
+from tasks.management.commands.benchmark_views import SCENARIOS
+from tasks.models import ArchivedTask, Task, TaskEvent, TaskRecurrence, TaskVisibility, UserTaskCounter
+from tasks.overdue import OverdueSweepScheduler, sweep_overdue_tasks
+from tasks.pagination import KeysetPaginator
+from tasks.recurrence import generate_recurring_tasks, next_occurrence, start_recurrence
+from tasks.membership import update_group_members
+from tasks.visibility import find_visibility_drift
+from users.models import Group, Membership
+
+User = get_user_model()
+
+
+class TaskVisibilityTests(TestCase):
+    def setUp(self):
+        self.admin = User.objects.create_user('admin', password='pass')
+        self.member = User.objects.create_user('member', password='pass')
+        self.outsider = User.objects.create_user('outsider', password='pass')
+        self.group = Group.objects.create(name='Team', admin=self.admin)
+        Membership.objects.create(user=self.admin, group=self.group)
+
+    def visible_to(self, user):
+        return set(Task.objects.filter(visibility__user=user))
+
+    def test_owner_assignee_and_group_see_task(self):
+        task = Task.objects.create(title='Group task', owner=self.admin, group=self.group)
+        personal = Task.objects.create(title='Personal', owner=self.outsider, assignee=self.member)
+        self.assertEqual(self.visible_to(self.admin), {task})
+        self.assertEqual(self.visible_to(self.member), {personal})
+        self.assertEqual(self.visible_to(self.outsider), {personal})
+
+    def test_membership_changes_update_index(self):
+        task = Task.objects.create(title='Group task', owner=self.admin, group=self.group)
+        membership = Membership.objects.create(user=self.member, group=self.group)
+        self.assertEqual(self.visible_to(self.member), {task})
+        membership.delete()
+        self.assertEqual(self.visible_to(self.member), set())
+
+    def test_leaving_group_keeps_assigned_tasks(self):
+        membership = Membership.objects.create(user=self.member, group=self.group)
+        assigned = Task.objects.create(title='Mine', owner=self.admin, assignee=self.member, group=self.group)
+        Task.objects.create(title='Not mine', owner=self.admin, group=self.group)
+        membership.delete()
+        self.assertEqual(self.visible_to(self.member), {assigned})
+
+    def test_reassign_and_admin_change_update_index(self):
+        task = Task.objects.create(title='Group task', owner=self.admin, group=self.group, assignee=self.outsider)
+        self.assertIn(task, self.visible_to(self.outsider))
+        task.assignee = None
+        task.save()
+        self.assertEqual(self.visible_to(self.outsider), set())
+
+        self.group.admin = self.outsider
+        self.group.save()
+        self.assertEqual(self.visible_to(self.outsider), {task})
+
+    def test_deleting_group_or_its_admin(self):
+        Membership.objects.create(user=self.member, group=self.group)
+        Task.objects.create(title='Group task', owner=self.member, group=self.group)
+        personal = Task.objects.create(title='Personal', owner=self.member)
+        self.group.delete()
+        self.assertEqual(find_visibility_drift(), (set(), set()))
+        self.assertEqual(find_counter_drift(), ({}, {}))
+        self.assertEqual(self.visible_to(self.member), {personal})
+        connection.check_constraints()
+
+        group = Group.objects.create(name='Other', admin=self.admin)
+        Membership.objects.create(user=self.member, group=group)
+        Task.objects.create(title='Other task', owner=self.member, group=group)
+        self.admin.delete()
+        self.assertFalse(Group.objects.exists())
+        self.assertEqual(find_visibility_drift(), (set(), set()))
+        self.assertEqual(find_counter_drift(), ({}, {}))
+        connection.check_constraints()
+
+    def test_rebuild_command_repairs_drift(self):
+        task = Task.objects.create(title='Group task', owner=self.admin, group=self.group)
+        TaskVisibility.objects.all().delete()
+        TaskVisibility.objects.create(user=self.outsider, task=task)
+
+        with self.assertRaises(CommandError):
+            call_command('rebuild_task_visibility', '--check', stdout=StringIO())
+        call_command('rebuild_task_visibility', stdout=StringIO())
+        call_command('rebuild_task_visibility', '--check', stdout=StringIO())
+        self.assertEqual(self.visible_to(self.admin), {task})
+        self.assertEqual(self.visible_to(self.outsider), set())
+
+
+class KeysetPaginationTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user('owner', password='pass')
+        self.group = Group.objects.create(name='Team', admin=self.user)
+        Membership.objects.create(user=self.user, group=self.group)
+        today = date.today()
+        # Mix of shared due dates and missing due dates to exercise ties and NULL ordering
+        for i in range(23):
+            due_date = None if i % 5 == 0 else today + timedelta(days=i % 3)
+            Task.objects.create(title=f'Task {i}', owner=self.user, group=self.group, due_date=due_date)
+
+    def expected_order(self):
+        tasks = list(Task.objects.all())
+        tasks.sort(key=lambda t: (t.created_at, t.id), reverse=True)
+        tasks.sort(key=lambda t: (t.due_date is None, t.due_date or date.min))
+        return tasks
+
+    def test_walks_forward_and_backward_without_gaps(self):
+        paginator = KeysetPaginator(5)
+        pages, page = [], paginator.paginate(Task.objects.all())
+        while True:
+            pages.append(page)
+            if not page.has_next():
+                break
+            page = paginator.paginate(Task.objects.all(), after=page.next_cursor)
+        self.assertEqual([t for p in pages for t in p], self.expected_order())
+        self.assertFalse(pages[0].has_previous())
+
+        back = paginator.paginate(Task.objects.all(), before=pages[-1].previous_cursor)
+        self.assertEqual(back.object_list, pages[-2].object_list)
+
+    def test_invalid_cursor_falls_back_to_first_page(self):
+        paginator = KeysetPaginator(5)
+        self.assertEqual(
+            paginator.paginate(Task.objects.all(), after='garbage').object_list,
+            paginator.paginate(Task.objects.all()).object_list
+        )
+
+    def test_list_and_group_pages_follow_cursor(self):
+        self.client.login(username='owner', password='pass')
+        response = self.client.get(reverse('task_list'), {'status': 'all'})
+        self.assertEqual(len(response.context['tasks']), 10)
+        page_obj = response.context['page_obj']
+        self.assertTrue(page_obj.has_next())
+
+        response = self.client.get(reverse('task_list'), {'status': 'all', 'after': page_obj.next_cursor})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.context['tasks'], self.expected_order()[10:20])
+
+        response = self.client.get(reverse('group_detail', args=[self.group.pk]))
+        self.assertEqual(len(response.context['tasks']), 10)
+        self.assertEqual(response.context['task_counter'].total, 23)
+
+
+class OverdueSweepTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user('owner', password='pass')
+        yesterday = date.today() - timedelta(days=1)
+        self.expired = [Task.objects.create(title=f'Expired {i}', owner=self.user) for i in range(5)]
+        # Bypass Task.save() so the rows look like tasks that expired since their last edit
+        Task.objects.filter(pk__in=[t.pk for t in self.expired]).update(due_date=yesterday)
+        self.current = Task.objects.create(title='Current', owner=self.user, due_date=date.today())
+        self.done = Task.objects.create(title='Done', owner=self.user, status='completed')
+        Task.objects.filter(pk=self.done.pk).update(due_date=yesterday)
+
+    def test_sweep_moves_only_expired_ongoing_tasks_and_is_idempotent(self):
+        self.assertEqual(sweep_overdue_tasks(batch_size=2), 5)
+        self.assertEqual(Task.objects.filter(status='overdue').count(), 5)
+        self.assertEqual(Task.objects.get(pk=self.current.pk).status, 'ongoing')
+        self.assertEqual(Task.objects.get(pk=self.done.pk).status, 'completed')
+        self.assertEqual(sweep_overdue_tasks(), 0)
+
+    def test_command_reports_count_and_overdue_tab_uses_status(self):
+        out = StringIO()
+        call_command('mark_overdue_tasks', stdout=out)
+        self.assertIn('Moved 5 task(s)', out.getvalue())
+
+        self.client.login(username='owner', password='pass')
+        response = self.client.get(reverse('task_list'), {'status': 'overdue'})
+        self.assertEqual({t.pk for t in response.context['tasks']}, {t.pk for t in self.expired})
+        response = self.client.get(reverse('task_list'))
+        self.assertEqual([t.pk for t in response.context['tasks']], [self.current.pk])
+
+
+@override_settings(VIEW_BUDGETS_STRICT=True)
+class QueryBudgetTests(TestCase):
+    # Session + user lookups are included; budgets must not grow with the number of rows
+    BUDGETS = {'task_list': 4, 'group_list': 3, 'group_detail': 5}
+
+    def setUp(self):
+        self.owner = User.objects.create_user('owner', password='pass')
+        self.group = Group.objects.create(name='Team', admin=self.owner)
+        Membership.objects.create(user=self.owner, group=self.group)
+        self.client.login(username='owner', password='pass')
+
+    def seed(self, count):
+        for i in range(count):
+            member = User.objects.create_user(f'member{count}_{i}', password='pass')
+            Membership.objects.create(user=member, group=self.group)
+            group = Group.objects.create(name=f'Side {count}_{i}', admin=member)
+            Membership.objects.create(user=self.owner, group=group)
+            Task.objects.create(title=f'Task {i}', owner=self.owner, assignee=member, group=self.group)
+            Task.objects.create(title=f'Side task {i}', owner=member, group=group)
+
+    def assert_budgets(self):
+        cache.clear()
+        caches['fragments'].clear()
+        for url_name, budget in self.BUDGETS.items():
+            args = [self.group.pk] if url_name == 'group_detail' else []
+            # Warm the per-user group choices cache used by the bulk action bar
+            self.client.get(reverse(url_name, args=args))
+            with self.assertNumQueries(budget):
+                response = self.client.get(reverse(url_name, args=args))
+            self.assertEqual(response.status_code, 200)
+
+    def test_pages_have_constant_query_count(self):
+        self.seed(2)
+        self.assert_budgets()
+        self.seed(8)
+        self.assert_budgets()
+
+    def test_writes_stay_within_view_budgets(self):
+        # Any view over its VIEW_BUDGETS entry raises ViewBudgetExceeded (strict for this class)
+        self.seed(3)
+        member = Membership.objects.filter(group=self.group).exclude(user=self.owner).first().user
+        due = date.today().isoformat()
+        task = Task.objects.create(title='Edit me', owner=self.owner, group=self.group)
+        personal = Task.objects.create(title='Personal', owner=self.owner)
+        create_for_group = reverse('task_create_for_group', args=[self.group.pk])
+        for url, data in [
+            (reverse('task_create'), {'title': 'New', 'status': 'ongoing'}),
+            (reverse('task_create'), {'title': 'Daily', 'status': 'ongoing', 'due_date': due, 'repeat-frequency': 'daily'}),
+            (create_for_group, {'title': 'New', 'status': 'ongoing'}),
+            (create_for_group, {'title': 'Weekly', 'status': 'ongoing', 'due_date': due, 'repeat-frequency': 'weekly'}),
+            (reverse('task_edit', args=[personal.pk]), {'title': 'Edited', 'status': 'ongoing'}),
+            (reverse('task_edit', args=[task.pk]), {'title': 'Edited', 'status': 'ongoing', 'group': self.group.pk, 'assignee': member.pk}),
+            (reverse('task_complete', args=[task.pk]), {}),
+            (reverse('task_complete', args=[personal.pk]), {}),
+        ]:
+            self.assertEqual(self.client.post(url, data).status_code, 302, url)
+        self.assertEqual(Task.objects.filter(title='Edited').count(), 2)
+        self.assertEqual(Task.objects.filter(status='completed').count(), 2)
+
+        tasks = [task.pk for task in Task.objects.filter(owner=self.owner, status='ongoing')]
+        for data in [
+            {'action': 'reassign', 'assignee': member.pk},
+            {'action': 'move', 'group': self.group.pk},
+            {'action': 'complete'},
+        ]:
+            self.assertEqual(self.client.post(reverse('task_bulk_action'), {'tasks': tasks, **data}).status_code, 302)
+        manage = reverse('group_members_manage', args=[self.group.pk])
+        newcomer = User.objects.create_user('newcomer')
+        self.assertEqual(self.client.post(manage, {'add': [newcomer.pk], 'remove': [member.pk]}).status_code, 302)
+
+    def test_membership_str_needs_no_extra_queries(self):
+        self.seed(3)
+        memberships = list(Membership.objects.all())
+        with self.assertNumQueries(0):
+            [str(m) for m in memberships]
+
+
+class RequestMetricsMiddlewareTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        User.objects.create_user('owner', password='pass')
+        self.client.login(username='owner', password='pass')
+
+    def test_logs_structured_metrics_with_url_name(self):
+        self.client.get(reverse('task_list'))
+        with self.assertLogs('task_management.metrics', level='INFO') as logs:
+            self.client.get(reverse('task_list'))
+        metrics = json.loads(logs.records[-1].getMessage())
+        self.assertEqual(metrics['view'], 'task_list')
+        self.assertEqual(metrics['queries'], 4)
+        self.assertGreater(metrics['render_ms'], 0)
+        self.assertGreaterEqual(metrics['wall_ms'], metrics['render_ms'])
+
+    @override_settings(VIEW_BUDGETS={'task_list': {'queries': 1}})
+    def test_budget_overrun_warns_or_raises(self):
+        with self.assertLogs('task_management.metrics', level='WARNING') as logs:
+            self.client.get(reverse('task_list'))
+        self.assertIn("View 'task_list' exceeded its budget: queries=", logs.output[-1])
+
+        with override_settings(VIEW_BUDGETS_STRICT=True), self.assertRaises(ViewBudgetExceeded):
+            self.client.get(reverse('task_list'))
+
+
+class TaskFormChoicesTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user('owner', password='pass')
+        self.others = [User.objects.create_user(f'user{i}') for i in range(30)]
+        self.group = Group.objects.create(name='Team', admin=self.user)
+        Membership.objects.create(user=self.user, group=self.group)
+
+    def test_assignee_select_renders_only_selected_user(self):
+        html = str(TaskForm(request_user=self.user, initial={'assignee': self.others[3].pk})['assignee'])
+        self.assertIn('user3', html)
+        self.assertNotIn('user4', html)
+        self.assertIn('data-autocomplete-url="/users/autocomplete/"', html)
+
+    def test_group_choices_are_cached_and_invalidated(self):
+        TaskForm(request_user=self.user)
+        with self.assertNumQueries(0):
+            html = str(TaskForm(request_user=self.user)['group'])
+        self.assertIn('Team', html)
+
+        other = Group.objects.create(name='Other', admin=self.others[0])
+        Membership.objects.create(user=self.user, group=other)
+        self.assertIn('Other', str(TaskForm(request_user=self.user)['group']))
+
+        other.name = 'Renamed'
+        other.save()
+        self.assertIn('Renamed', str(TaskForm(request_user=self.user)['group']))
+
+    def test_post_validates_against_user_groups_and_any_assignee(self):
+        foreign = Group.objects.create(name='Foreign', admin=self.others[0])
+        data = {'title': 'T', 'status': 'ongoing', 'assignee': self.others[5].pk}
+        self.assertTrue(TaskForm(data={**data, 'group': self.group.pk}, request_user=self.user).is_valid())
+        self.assertFalse(TaskForm(data={**data, 'group': foreign.pk}, request_user=self.user).is_valid())
+
+    def test_stale_choices_do_not_grant_access(self):
+        # Another worker removed the membership; this process still has the cached choices
+        other = Group.objects.create(name='Other', admin=self.others[0])
+        Membership.objects.create(user=self.user, group=other)
+        stale = user_group_choices(self.user)
+        Membership.objects.filter(user=self.user, group=other).delete()
+        cache.set(GROUP_CHOICES_CACHE_KEY.format(self.user.pk), stale)
+        self.assertIn('Other', str(TaskForm(request_user=self.user)['group']))
+
+        data = {'title': 'T', 'status': 'ongoing', 'group': other.pk}
+        self.assertFalse(TaskForm(data=data, request_user=self.user).is_valid())
+        task = Task.objects.create(title='Mine', owner=self.user)
+        form = TaskBulkActionForm(data={'action': 'move', 'tasks': [task.pk], 'group': other.pk}, request_user=self.user)
+        self.assertFalse(form.is_valid())
+
+    def test_group_task_assignee_restricted_to_members(self):
+        data = {'title': 'T', 'status': 'ongoing', 'assignee': self.others[5].pk}
+        form = TaskForm(data=data, request_user=self.user, specific_group=self.group)
+        self.assertFalse(form.is_valid())
+        self.assertIn(f'?group={self.group.pk}', str(form['assignee']))
+
+
+class GroupMemberManageTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.admin = User.objects.create_user('admin', password='pass')
+        self.group = Group.objects.create(name='Team', admin=self.admin)
+        Membership.objects.create(user=self.admin, group=self.group)
+        self.users = [User.objects.create_user(f'user{i:02d}') for i in range(30)]
+        self.task = Task.objects.create(title='Group task', owner=self.admin, group=self.group)
+        self.client.login(username='admin', password='pass')
+        self.url = reverse('group_members_manage', args=[self.group.pk])
+
+    def post_members(self, add=(), remove=()):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.post(self.url, {'add': [u.pk for u in add], 'remove': [u.pk for u in remove]})
+        self.assertRedirects(response, reverse('group_detail', args=[self.group.pk]), fetch_redirect_response=False)
+        return len(queries)
+
+    def test_bulk_add_and_remove_keep_index_consistent(self):
+        for user in self.users[28:]:
+            Membership.objects.create(user=user, group=self.group)
+        small = self.post_members(add=self.users[:2], remove=self.users[29:])
+        large = self.post_members(add=self.users[2:20], remove=self.users[:1] + self.users[28:29])
+        self.assertEqual(small, large) # Query count does not depend on how many users change
+        self.assertEqual(self.group.members.count(), 20)
+        self.assertFalse(Membership.objects.filter(group=self.group, user=self.users[0]).exists())
+        self.assertEqual(set(Task.objects.filter(visibility__user=self.users[5])), {self.task})
+        self.assertEqual(set(Task.objects.filter(visibility__user=self.users[0])), set())
+
+        missing, stale = find_visibility_drift()
+        self.assertEqual((missing, stale), (set(), set()))
+
+    def test_admin_cannot_be_removed(self):
+        response = self.client.post(self.url, {'remove': [self.admin.pk]})
+        self.assertTrue(response.context['form'].errors)
+        self.assertTrue(Membership.objects.filter(group=self.group, user=self.admin).exists())
+
+    def test_page_lists_members_and_search_results_paginated(self):
+        response = self.client.get(self.url, {'q': 'user1'})
+        self.assertEqual([u.username for u in response.context['candidates_page']], [f'user1{i}' for i in range(10)])
+        response = self.client.get(self.url)
+        self.assertEqual(len(response.context['candidates_page']), 20)
+        self.assertIsNotNone(response.context['candidates_links']['next'])
+        self.assertEqual([u.username for u in response.context['members_page']], ['admin'])
+
+
+class TaskApiTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user('owner', password='pass')
+        self.member = User.objects.create_user('member')
+        self.outsider = User.objects.create_user('outsider', password='pass')
+        self.group = Group.objects.create(name='Team', admin=self.user)
+        Membership.objects.create(user=self.user, group=self.group)
+        Membership.objects.create(user=self.member, group=self.group)
+        self.client.login(username='owner', password='pass')
+
+    def post_json(self, url_name, payload):
+        return self.client.post(reverse(url_name), json.dumps(payload), content_type='application/json')
+
+    def test_requires_authentication(self):
+        self.client.logout()
+        self.assertEqual(self.client.get(reverse('api_task_list')).status_code, 401)
+
+    def test_list_uses_visibility_sparse_fields_and_cursor(self):
+        for i in range(5):
+            Task.objects.create(title=f'Task {i}', owner=self.member, group=self.group)
+        Task.objects.create(title='Hidden', owner=self.outsider)
+
+        first = self.client.get(reverse('api_task_list'), {'fields': 'id,title', 'limit': 3}).json()
+        self.assertEqual(set(first['results'][0]), {'id', 'title'})
+        second = self.client.get(reverse('api_task_list'), {'fields': 'title', 'limit': 3, 'after': first['next']}).json()
+        titles = {row['title'] for row in first['results'] + second['results']}
+        self.assertEqual(titles, {f'Task {i}' for i in range(5)})
+        self.assertIsNone(second['next'])
+
+        response = self.client.get(reverse('api_task_list'), {'fields': 'title,secret'})
+        self.assertEqual(response.status_code, 400)
+
+    def test_batch_create_is_all_or_nothing(self):
+        tasks = [
+            {'title': 'Personal'},
+            {'title': 'Group', 'group': str(self.group.pk), 'assignee': self.member.pk, 'due_date': '2000-01-01'},
+        ]
+        response = self.post_json('api_task_batch_create', {'tasks': tasks + [{'title': ''}]})
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('2', response.json()['errors'])
+        self.assertFalse(Task.objects.exists())
+
+        response = self.post_json('api_task_batch_create', {'tasks': tasks})
+        self.assertEqual(response.status_code, 201)
+        personal = Task.objects.get(title='Personal')
+        group_task = Task.objects.get(title='Group')
+        self.assertEqual(personal.assignee, self.user)
+        self.assertEqual(group_task.status, 'overdue')
+        self.assertEqual(set(Task.objects.visible_to(self.member)), {group_task})
+
+    def test_batch_update_and_complete_respect_permissions(self):
+        own = Task.objects.create(title='Own', owner=self.user)
+        foreign = Task.objects.create(title='Foreign', owner=self.outsider, assignee=self.user)
+
+        response = self.post_json('api_task_batch_update', {'tasks': [{'id': str(own.pk), 'title': 'Renamed'}, {'id': str(foreign.pk), 'title': 'X'}]})
+        self.assertEqual(response.status_code, 400)
+        response = self.post_json('api_task_batch_update', {'tasks': [{'id': str(own.pk), 'title': 'Renamed'}]})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(Task.objects.get(pk=own.pk).title, 'Renamed')
+
+        hidden = Task.objects.create(title='Hidden', owner=self.outsider)
+        with self.assertNumQueries(11): # session + user; inside a savepoint: permission SELECT, two counter deltas, UPDATE, counter UPDATE, event SELECT + INSERT
+            report = self.post_json('api_task_batch_complete', {'ids': [str(own.pk), str(foreign.pk), str(hidden.pk)]}).json()
+        self.assertEqual(set(report['completed']), {str(own.pk), str(foreign.pk)})
+        self.assertEqual(report['not_found'], [str(hidden.pk)])
+        self.assertEqual(Task.objects.get(pk=hidden.pk).status, 'ongoing')
+
+    def test_groups_and_members(self):
+        groups = self.client.get(reverse('api_group_list'), {'fields': 'name,admin'}).json()['results']
+        self.assertEqual(groups, [{'name': 'Team', 'admin': 'owner'}])
+        members = self.client.get(reverse('api_group_members', args=[self.group.pk])).json()['results']
+        self.assertEqual({m['username'] for m in members}, {'owner', 'member'})
+
+        self.client.login(username='outsider', password='pass')
+        self.assertEqual(self.client.get(reverse('api_group_detail', args=[self.group.pk])).status_code, 404)
+
+
+class TaskBulkActionTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.owner = User.objects.create_user('owner', password='pass')
+        self.member = User.objects.create_user('member')
+        self.outsider = User.objects.create_user('outsider')
+        self.group = Group.objects.create(name='Team', admin=self.owner)
+        self.other_group = Group.objects.create(name='Other', admin=self.owner)
+        Membership.objects.create(user=self.member, group=self.group)
+        self.client.login(username='owner', password='pass')
+
+    def make_tasks(self, count, **kwargs):
+        return [Task.objects.create(title=f'Task {i}', **{'owner': self.owner, **kwargs}) for i in range(count)]
+
+    def post_action(self, tasks, **data):
+        return self.client.post(reverse('task_bulk_action'), {'tasks': [task.pk for task in tasks], **data})
+
+    def test_complete_selected_tasks(self):
+        tasks = self.make_tasks(3)
+        foreign = Task.objects.create(title='Foreign', owner=self.outsider)
+        response = self.post_action(tasks + [foreign], action='complete')
+        self.assertRedirects(response, reverse('task_list'), fetch_redirect_response=False)
+        self.assertEqual(Task.objects.filter(status='completed').count(), 3)
+        self.assertEqual(Task.objects.get(pk=foreign.pk).status, 'ongoing')
+
+    def test_reassign_updates_visibility_and_skips_non_editable(self):
+        tasks = self.make_tasks(2, group=self.group)
+        foreign = Task.objects.create(title='Foreign', owner=self.outsider, group=self.group)
+        report = reassign_tasks(self.member, [task.pk for task in tasks] + [foreign.pk], self.member)
+        self.assertEqual(report['updated'], [])
+        self.assertEqual(set(report['skipped']), {task.pk for task in tasks} | {foreign.pk})
+
+        report = reassign_tasks(self.owner, [task.pk for task in tasks] + [foreign.pk], self.outsider)
+        # The outsider is not in the group, so group tasks cannot be given to them
+        self.assertEqual(report['updated'], [])
+
+        report = reassign_tasks(self.owner, [task.pk for task in tasks] + [foreign.pk], self.member)
+        self.assertEqual(set(report['updated']), {task.pk for task in tasks} | {foreign.pk})
+        self.assertEqual(Task.objects.filter(assignee=self.member).count(), 3)
+        self.assertEqual(find_visibility_drift(), (set(), set()))
+
+    def test_move_resyncs_visibility(self):
+        tasks = self.make_tasks(2, group=self.group)
+        self.assertEqual(Task.objects.visible_to(self.member).count(), 2)
+        report = move_tasks(self.owner, [task.pk for task in tasks], self.other_group)
+        self.assertEqual(len(report['updated']), 2)
+        self.assertEqual(Task.objects.visible_to(self.member).count(), 0)
+        self.assertEqual(find_visibility_drift(), (set(), set()))
+
+    def test_move_into_foreign_group_is_rejected(self):
+        foreign_group = Group.objects.create(name='Foreign', admin=self.outsider)
+        tasks = self.make_tasks(1)
+        self.post_action(tasks, action='move', group=foreign_group.pk)
+        self.assertIsNone(Task.objects.get(pk=tasks[0].pk).group_id)
+
+    def test_query_count_does_not_grow_with_selection(self):
+        def count_queries(tasks):
+            with CaptureQueriesContext(connection) as queries:
+                self.post_action(tasks, action='move', group=self.other_group.pk)
+            return len(queries)
+
+        self.client.get(reverse('task_list'))
+        count_queries(self.make_tasks(1))  # creates the target group's counter row
+        self.assertEqual(count_queries(self.make_tasks(2)), count_queries(self.make_tasks(20)))
+
+
+class TaskExportTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user('owner', password='pass')
+        self.outsider = User.objects.create_user('outsider')
+        self.group = Group.objects.create(name='Team', admin=self.user)
+        Task.objects.create(title='Plain, with "quotes"', owner=self.user)
+        Task.objects.create(title='Done', owner=self.user, status='completed')
+        Task.objects.create(title='Group task', owner=self.outsider, group=self.group)
+        Task.objects.create(title='Hidden', owner=self.outsider)
+        self.client.login(username='owner', password='pass')
+
+    def test_csv_export_streams_visible_tasks_for_status_tab(self):
+        response = self.client.get(reverse('task_export'), {'status': 'ongoing'})
+        self.assertTrue(response.streaming)
+        rows = list(csv.DictReader(StringIO(b''.join(response.streaming_content).decode())))
+        self.assertEqual({row['title'] for row in rows}, {'Plain, with "quotes"', 'Group task'})
+
+    async def test_asgi_export_streams_asynchronously(self):
+        await self.async_client.aforce_login(self.user)
+        response = await self.async_client.get(reverse('task_export'), {'format': 'ndjson', 'status': 'all'})
+        self.assertTrue(response.is_async)
+        body = b''.join([chunk async for chunk in response.streaming_content]).decode()
+        self.assertEqual(
+            {json.loads(line)['title'] for line in body.splitlines()}, {'Plain, with "quotes"', 'Done', 'Group task'}
+        )
+
+    def test_group_ndjson_export_requires_membership(self):
+        response = self.client.get(reverse('group_task_export', args=[self.group.pk]), {'format': 'ndjson', 'status': 'all'})
+        rows = [json.loads(line) for line in b''.join(response.streaming_content).decode().splitlines()]
+        self.assertEqual([row['title'] for row in rows], ['Group task'])
+        self.assertEqual(rows[0]['group_name'], 'Team')
+
+        self.client.force_login(self.outsider)
+        other = Group.objects.create(name='Private', admin=self.user)
+        self.assertEqual(self.client.get(reverse('group_task_export', args=[other.pk])).status_code, 404)
+
+    def test_export_command(self):
+        out = StringIO()
+        call_command('export_tasks', user='owner', status='all', format='ndjson', chunk_size=1, stdout=out)
+        titles = {json.loads(line)['title'] for line in out.getvalue().splitlines()}
+        self.assertEqual(titles, {'Plain, with "quotes"', 'Done', 'Group task'})
+
+
+class TaskImportTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user('owner', password='pass')
+        self.member = User.objects.create_user('member')
+        self.outsider = User.objects.create_user('outsider')
+        self.group = Group.objects.create(name='Team', admin=self.user)
+        self.foreign_group = Group.objects.create(name='Foreign', admin=self.outsider)
+        Membership.objects.create(user=self.member, group=self.group)
+
+    def test_import_command_validates_rows_and_applies_overdue_rule(self):
+        past = (date.today() - timedelta(days=1)).isoformat()
+        lines = [
+            json.dumps({'title': 'Late', 'owner': 'member', 'due_date': past}),
+            json.dumps({'title': 'Group', 'group': str(self.group.pk), 'assignee': 'member'}),
+            json.dumps({'title': 'Bad assignee', 'group': str(self.group.pk), 'assignee': 'outsider'}),
+            json.dumps({'title': '', 'owner': 'owner'}),
+            'not json',
+            json.dumps({'title': 'Bad date', 'due_date': 'tomorrow'}),
+            json.dumps({'title': 123}),
+            json.dumps({'title': 'Odd types', 'status': ['done'], 'assignee': {'name': 'member'}}),
+        ]
+        out, err = StringIO(), StringIO()
+        with tempfile.NamedTemporaryFile('w', suffix='.ndjson') as f:
+            f.write('\n'.join(lines))
+            f.flush()
+            call_command('import_tasks', f.name, owner='owner', batch_size=2, stdout=out, stderr=err)
+
+        self.assertIn('Imported 2 task(s)', out.getvalue())
+        self.assertEqual(len(err.getvalue().splitlines()), 6)
+        self.assertIn('line 3:', err.getvalue())
+        self.assertIn('line 8: Expected text for status, assignee.', err.getvalue())
+        self.assertEqual(Task.objects.get(title='Late').status, 'overdue')
+        self.assertEqual(Task.objects.get(title='Group').owner, self.user)
+        self.assertEqual(find_visibility_drift(), (set(), set()))
+
+    def test_upload_round_trips_an_export_and_restricts_groups(self):
+        Task.objects.create(title='Mine', owner=self.user, group=self.group, assignee=self.member)
+        Task.objects.create(title='Theirs', owner=self.outsider, group=self.foreign_group)
+        export = StringIO()
+        call_command('export_tasks', status='all', stdout=export)
+
+        self.client.login(username='owner', password='pass')
+        upload = SimpleUploadedFile('tasks.csv', export.getvalue().encode())
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.post(reverse('task_import'), {'file': upload}, follow=True)
+        self.assertRedirects(response, reverse('task_list'))
+        self.assertEqual(Task.objects.filter(title='Mine').count(), 2)
+        # Groups the uploader does not belong to are rejected
+        self.assertEqual(Task.objects.filter(title='Theirs').count(), 1)
+        self.assertTrue(all(task.owner_id == self.user.pk for task in Task.objects.filter(title='Mine')))
+        self.assertLess(len(queries), 25)
+
+    def test_upload_that_is_not_utf8_imports_nothing(self):
+        # More rows than one import chunk before the bad byte: nothing may be committed
+        body = 'title\n' + ''.join(f'Row {i}\n' for i in range(1500))
+        upload = SimpleUploadedFile('tasks.csv', body.encode() + b'caf\xe9\n')
+        self.client.login(username='owner', password='pass')
+        response = self.client.post(reverse('task_import'), {'file': upload})
+        self.assertContains(response, 'The file is not valid UTF-8 text.')
+        self.assertFalse(Task.objects.exists())
+
+
+class TaskCounterTests(TestCase):
+    def setUp(self):
+        self.owner = User.objects.create_user('owner', password='pass')
+        self.member = User.objects.create_user('member')
+        self.other = User.objects.create_user('other')
+        self.group = Group.objects.create(name='Team', admin=self.owner)
+        Membership.objects.create(user=self.member, group=self.group)
+
+    def assert_no_drift(self):
+        self.assertEqual(find_counter_drift(), ({}, {}))
+
+    def test_deltas_for_existing_rows_take_one_update_per_table(self):
+        Task.objects.create(title='Group task', owner=self.owner, group=self.group)
+        deltas = ({(self.owner.pk, 'ongoing'): -1, (self.owner.pk, 'completed'): 1, (self.member.pk, 'completed'): 1,
+                   (self.member.pk, 'ongoing'): -1}, {(self.group.pk, 'ongoing'): -1, (self.group.pk, 'completed'): 1})
+        with self.assertNumQueries(2):
+            apply_counter_deltas(*deltas)
+        # A key without a row: the first UPDATE changes nothing, then rows are created and updated
+        UserTaskCounter.objects.filter(user=self.other).delete()
+        with self.assertNumQueries(3):
+            apply_counter_deltas({(self.owner.pk, 'ongoing'): 1, (self.other.pk, 'ongoing'): 1})
+        self.assertEqual(UserTaskCounter.objects.get(user=self.owner).ongoing, 1)
+        self.assertEqual(UserTaskCounter.objects.get(user=self.other).ongoing, 1)
+
+    def test_counters_follow_every_kind_of_change(self):
+        yesterday = date.today() - timedelta(days=1)
+        task = Task.objects.create(title='Group task', owner=self.owner, group=self.group)
+        personal = Task.objects.create(title='Personal', owner=self.member, due_date=yesterday)
+        self.assert_no_drift()
+        counts = user_task_counts(self.member)
+        self.assertEqual([counts[key] for key in ('ongoing', 'completed', 'overdue', 'all')], [1, 0, 1, 2])
+
+        task.status = 'completed'
+        task.save(update_fields=['status'])
+        task.assignee = self.other
+        task.save()
+        self.assert_no_drift()
+
+        bulk_create_tasks([Task(title=f'Bulk {i}', owner=self.owner, group=self.group, due_date=yesterday) for i in range(3)])
+        update_group_members(self.group, [self.other.pk], [self.member.pk])
+        self.assert_no_drift()
+
+        complete_tasks(self.owner, Task.objects.filter(title__startswith='Bulk').values_list('pk', flat=True)[:2])
+        move_tasks(self.owner, [task.pk], None)
+        Task.objects.create(title='Late', owner=self.owner, group=self.group)
+        Task.objects.filter(title='Late').update(due_date=yesterday)
+        sweep_overdue_tasks()
+        self.assert_no_drift()
+
+        personal.delete()
+        self.group.delete()
+        self.assert_no_drift()
+        self.assertEqual(user_task_counts(self.owner)['all'], Task.objects.visible_to(self.owner).count())
+
+    def test_rebuild_command_repairs_drift(self):
+        Task.objects.create(title='Task', owner=self.owner, group=self.group)
+        UserTaskCounter.objects.filter(user=self.owner).update(ongoing=7)
+        with self.assertRaises(CommandError):
+            call_command('rebuild_task_counters', check=True, stdout=StringIO())
+        call_command('rebuild_task_counters', stdout=StringIO())
+        self.assert_no_drift()
+
+    def test_task_list_shows_tab_badges(self):
+        Task.objects.create(title='Task', owner=self.owner, status='completed')
+        self.client.login(username='owner', password='pass')
+        response = self.client.get(reverse('task_list'))
+        self.assertEqual(response.context['status_counts']['completed'], 1)
+
+
+class FragmentCacheTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        caches['fragments'].clear()
+        self.owner = User.objects.create_user('owner', password='pass')
+        self.group = Group.objects.create(name='Team', admin=self.owner)
+        self.task = Task.objects.create(title='Write report', owner=self.owner, group=self.group)
+        self.client.login(username='owner', password='pass')
+
+    def get_with_metrics(self, url):
+        with self.assertLogs('task_management.metrics', level='INFO') as logs:
+            response = self.client.get(url)
+        return response, json.loads(logs.records[-1].getMessage())
+
+    def test_rows_are_served_from_cache_until_the_task_changes(self):
+        _, metrics = self.get_with_metrics(reverse('task_list'))
+        self.assertEqual((metrics['fragment_hits'], metrics['fragment_misses']), (0, 1))
+        response, metrics = self.get_with_metrics(reverse('task_list'))
+        self.assertEqual((metrics['fragment_hits'], metrics['fragment_misses']), (1, 0))
+
+        self.task.title = 'Write summary'
+        self.task.save()
+        response, metrics = self.get_with_metrics(reverse('task_list'))
+        self.assertEqual(metrics['fragment_misses'], 1)
+        self.assertContains(response, 'Write summary')
+
+    def test_group_changes_bump_the_group_version(self):
+        self.client.get(reverse('task_list'))
+        self.group.name = 'Renamed'
+        self.group.save()
+        self.assertContains(self.client.get(reverse('task_list')), 'Renamed')
+
+        url = reverse('group_detail', args=[self.group.pk])
+        self.client.get(url)
+        member = User.objects.create_user('newcomer')
+        with self.captureOnCommitCallbacks(execute=True):
+            update_group_members(self.group, [member.pk], [])
+        response, metrics = self.get_with_metrics(url)
+        self.assertContains(response, 'newcomer')
+        self.assertEqual(metrics['fragment_hits'], 1)  # the task row; header and members re-render
+
+    def test_cached_rows_carry_no_csrf_token(self):
+        self.client.get(reverse('task_list'))
+        response = self.client.get(reverse('task_list'))
+        content = response.content.decode()
+        rows = content[content.index('<tbody>'):content.index('</tbody>')]
+        self.assertNotIn('csrfmiddlewaretoken', rows)
+        self.assertContains(response, 'form="task-complete-form"')
+
+    def test_stats_endpoint_is_staff_only(self):
+        self.client.get(reverse('task_list'))
+        self.assertEqual(self.client.get(reverse('api_fragment_stats')).status_code, 403)
+        User.objects.filter(pk=self.owner.pk).update(is_staff=True)
+        stats = self.client.get(reverse('api_fragment_stats')).json()['fragments']
+        self.assertGreaterEqual(stats['task_row']['misses'], 1)
+
+
+class ConditionalGetTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.owner = User.objects.create_user('owner', password='pass')
+        self.group = Group.objects.create(name='Team', admin=self.owner)
+        self.task = Task.objects.create(title='Task', owner=self.owner, group=self.group)
+        self.client.login(username='owner', password='pass')
+
+    def assert_revalidates(self, url, change):
+        self.client.get(url)  # sets the CSRF cookie, which is part of the validator
+        etag = self.client.get(url)['ETag']
+        with self.assertNumQueries(3):  # session, user, counter row + latest change
+            response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+        change()
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response['ETag'], etag)
+
+    def test_task_list_revalidates_on_edit(self):
+        def edit():
+            self.task.title = 'Edited'
+            self.task.save()
+        self.assert_revalidates(reverse('task_list'), edit)
+
+    def test_task_list_revalidates_on_removal(self):
+        self.assert_revalidates(reverse('task_list'), lambda: Task.objects.filter(pk=self.task.pk).delete())
+
+    def test_group_detail_revalidates_on_membership_change(self):
+        member = User.objects.create_user('member')
+        self.assert_revalidates(
+            reverse('group_detail', args=[self.group.pk]),
+            lambda: Membership.objects.create(user=member, group=self.group)
+        )
+
+    def test_no_validator_for_other_users_groups(self):
+        other = Group.objects.create(name='Other', admin=User.objects.create_user('other'))
+        response = self.client.get(reverse('group_detail', args=[other.pk]))
+        self.assertEqual(response.status_code, 404)
+        self.assertFalse(response.has_header('ETag'))
+
+
+class TaskSearchTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user('user', password='pass')
+        self.other = User.objects.create_user('other', password='pass')
+        self.in_title = Task.objects.create(title='Quarterly budget', owner=self.user)
+        self.in_description = Task.objects.create(title='Planning', description='Check the budget first', owner=self.user)
+        Task.objects.create(title='Budget of someone else', owner=self.other)
+        self.client.login(username='user', password='pass')
+
+    def test_search_is_limited_to_visible_tasks_and_ranks_titles_first(self):
+        response = self.client.get(reverse('task_list'), {'q': 'budget'})
+        self.assertEqual(list(response.context['tasks']), [self.in_title, self.in_description])
+        self.assertEqual(response.context['search'], 'budget')
+
+    def test_excluded_words(self):
+        results = Task.objects.visible_to(self.user).search('budget -quarterly')
+        self.assertEqual(list(results), [self.in_description])
+
+    def test_search_results_paginate_by_rank(self):
+        for i in range(12):
+            Task.objects.create(title=f'Budget {i}', owner=self.user)
+        response = self.client.get(reverse('task_list'), {'q': 'budget'})
+        page = response.context['page_obj']
+        self.assertTrue(page.has_next())
+        response = self.client.get(reverse('task_list'), {'q': 'budget', 'after': page.next_cursor})
+        seen = list(page) + list(response.context['tasks'])
+        self.assertEqual(len(set(seen)), 14)
+        self.assertEqual(seen[-1], self.in_description)
+
+
+class AsyncApiTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user('owner', password='pass')
+        self.member = User.objects.create_user('member')
+        self.outsider = User.objects.create_user('outsider')
+        self.group = Group.objects.create(name='Team', admin=self.user)
+        Membership.objects.create(user=self.member, group=self.group)
+        for i in range(3):
+            Task.objects.create(title=f'Task {i}', owner=self.member, group=self.group)
+        Task.objects.create(title='Done', owner=self.user, status='completed')
+        Task.objects.create(title='Hidden', owner=self.outsider)
+
+    async def test_requires_authentication(self):
+        response = await self.async_client.get(reverse('api_task_overview'))
+        self.assertEqual(response.status_code, 401)
+
+    async def test_task_overview_returns_page_and_counts(self):
+        await self.async_client.aforce_login(self.user)
+        with self.assertLogs('task_management.metrics', level='INFO') as logs:
+            response = await self.async_client.get(reverse('api_task_overview'), {'fields': 'title', 'limit': 2})
+        body = response.json()
+        self.assertEqual(body['counts'], {'ongoing': 3, 'completed': 1, 'overdue': 0, 'all': 4})
+        self.assertEqual(len(body['tasks']['results']), 2)
+        self.assertIsNotNone(body['tasks']['next'])
+        # The metrics middleware still sees the queries made through the async ORM
+        metrics = json.loads(logs.records[-1].getMessage())
+        self.assertEqual(metrics['view'], 'api_task_overview')
+        self.assertEqual(metrics['queries'], 4)
+
+    async def test_group_overview_and_detail(self):
+        await self.async_client.aforce_login(self.user)
+        groups = (await self.async_client.get(reverse('api_group_overview'))).json()['results']
+        self.assertEqual([(group['name'], group['ongoing_count']) for group in groups], [('Team', 3)])
+
+        body = (await self.async_client.get(reverse('api_group_detail_overview', args=[self.group.pk]))).json()
+        self.assertEqual(body['group']['name'], 'Team')
+        self.assertEqual([member['username'] for member in body['members']], ['member'])
+        self.assertEqual(body['counts']['ongoing'], 3)
+        self.assertEqual(len(body['tasks']['results']), 3)
+
+    async def test_group_detail_requires_membership(self):
+        await self.async_client.aforce_login(self.outsider)
+        response = await self.async_client.get(reverse('api_group_detail_overview', args=[self.group.pk]))
+        self.assertEqual(response.status_code, 404)
+
+
+class DatabaseSettingsTests(TestCase):
+    url = 'postgres://app:secret@db:5432/tasks'
+
+    def test_persistent_connections_by_default(self):
+        database = database_settings(self.url, env={})
+        self.assertEqual(database['CONN_MAX_AGE'], 60)
+        self.assertTrue(database['CONN_HEALTH_CHECKS'])
+        self.assertNotIn('pool', database.get('OPTIONS', {}))
+        self.assertEqual(database_settings(self.url, env={'SERVER_MODE': 'asgi'})['CONN_MAX_AGE'], 0)
+
+    def test_pool_replaces_persistent_connections(self):
+        database = database_settings(self.url, env={'DB_POOL': '1', 'DB_POOL_MAX_SIZE': '4', 'DB_CONN_MAX_AGE': '600'})
+        self.assertEqual(database['CONN_MAX_AGE'], 0)
+        self.assertEqual(database['OPTIONS']['pool']['max_size'], 4)
+        # SQLite has no pool support
+        self.assertNotIn('pool', database_settings('sqlite:///db.sqlite3', env={'DB_POOL': '1'}).get('OPTIONS', {}))
+
+    def test_pool_stats_require_staff(self):
+        user = User.objects.create_user('user', password='pass')
+        self.client.force_login(user)
+        self.assertEqual(self.client.get(reverse('api_db_pool_stats')).status_code, 403)
+        user.is_staff = True
+        user.save()
+        self.assertEqual(self.client.get(reverse('api_db_pool_stats')).json(), {'pools': {}})
+
+
+@override_settings(DATABASE_REPLICAS=['replica_missing'])
+class ReplicaRoutingTests(SimpleTestCase):
+    def setUp(self):
+        routers._unavailable_until.clear()
+        self.factory = RequestFactory()
+        self.middleware = ReplicaRoutingMiddleware(lambda request: HttpResponse(routers.read_alias()))
+
+    def test_reads_outside_requests_use_the_primary(self):
+        self.assertEqual(routers.read_alias(), 'default')
+
+    def test_unavailable_replica_falls_back_to_the_primary(self):
+        response = self.middleware(self.factory.get('/'))
+        self.assertEqual(response.content, b'default')
+        self.assertIn('replica_missing', routers._unavailable_until)
+
+    def test_posts_pin_the_browser_to_the_primary(self):
+        response = self.middleware(self.factory.post('/'))
+        self.assertEqual(response.content, b'default')
+        self.assertNotIn('replica_missing', routers._unavailable_until)  # never tried
+
+        request = self.factory.get('/')
+        request.COOKIES['db_pin'] = response.cookies['db_pin'].value
+        self.middleware(request)
+        self.assertNotIn('replica_missing', routers._unavailable_until)
+
+
+# Run with DATABASE_REPLICA_URLS set (e.g. a second SQLite file); replicas mirror the test database
+@skipUnless(settings.DATABASE_REPLICAS, "No read replicas configured")
+class ReplicaReadTests(TransactionTestCase):
+    databases = '__all__'
+
+    def setUp(self):
+        routers._unavailable_until.clear()
+        cache.clear()
+        self.user = User.objects.create_user('user', password='pass')
+        self.task = Task.objects.create(title='Task', owner=self.user)
+        self.client.login(username='user', password='pass')
+        self.client.cookies.pop('db_pin', None)
+
+    def test_get_reads_from_replica_until_a_post(self):
+        replica = connections[settings.DATABASE_REPLICAS[0]]
+        with CaptureQueriesContext(replica) as replica_queries:
+            response = self.client.get(reverse('task_list'))
+        self.assertContains(response, 'Task')
+        self.assertTrue(replica_queries.captured_queries)
+
+        self.client.post(reverse('task_complete', args=[self.task.pk]))
+        with CaptureQueriesContext(replica) as replica_queries:
+            response = self.client.get(reverse('task_list'), {'status': 'completed'})
+        self.assertContains(response, 'Task')
+        self.assertFalse(replica_queries.captured_queries)
+
+
+class TaskEventTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user('owner', password='pass')
+        self.member = User.objects.create_user('member')
+        self.outsider = User.objects.create_user('outsider', password='pass')
+        self.group = Group.objects.create(name='Team', admin=self.user)
+        Membership.objects.create(user=self.member, group=self.group)
+
+    def events(self):
+        return list(TaskEvent.objects.order_by('id').values_list('kind', 'group_id', 'user_id'))
+
+    def test_task_changes_write_events_for_their_channels(self):
+        TaskEvent.objects.all().delete()
+        task = Task.objects.create(title='Task', owner=self.user, group=self.group)
+        personal = Task.objects.create(title='Mine', owner=self.user, assignee=self.member)
+        self.assertCountEqual(self.events(), [
+            ('task.created', self.group.pk, None),
+            ('task.created', None, self.user.pk),
+            ('task.created', None, self.member.pk),
+        ])
+
+        TaskEvent.objects.all().delete()
+        task.group = None
+        task.save()
+        self.assertCountEqual(self.events(), [('task.updated', None, self.user.pk), ('task.removed', self.group.pk, None)])
+
+        TaskEvent.objects.all().delete()
+        personal.delete()
+        self.assertCountEqual(self.events(), [('task.deleted', None, self.user.pk), ('task.deleted', None, self.member.pk)])
+
+    def test_bulk_paths_write_events(self):
+        tasks = [Task.objects.create(title=f'Task {i}', owner=self.user, group=self.group) for i in range(3)]
+        TaskEvent.objects.all().delete()
+        complete_tasks(self.user, [task.pk for task in tasks])
+        self.assertEqual(self.events(), [('task.completed', self.group.pk, None)] * 3)
+
+        TaskEvent.objects.all().delete()
+        update_group_members(self.group, [self.outsider.pk], [self.member.pk])
+        self.assertCountEqual(self.events(), [
+            ('member.joined', self.group.pk, None), ('member.joined', None, self.outsider.pk),
+            ('member.left', self.group.pk, None), ('member.left', None, self.member.pk),
+        ])
+
+    def test_wsgi_stream_replays_after_last_event_id(self):
+        self.client.login(username='owner', password='pass')
+        Task.objects.create(title='Before', owner=self.user, group=self.group)
+        last_id = TaskEvent.objects.latest('id').id
+        Task.objects.create(title='After', owner=self.user, group=self.group)
+        Task.objects.create(title='Elsewhere', owner=self.outsider)
+
+        response = self.client.get(reverse('task_events'), HTTP_LAST_EVENT_ID=str(last_id))
+        self.assertEqual(response['Content-Type'], 'text/event-stream')
+        body = response.content.decode()
+        self.assertTrue(body.startswith('retry: '))
+        self.assertIn('"title": "After"', body)
+        self.assertNotIn('Before', body)
+        self.assertNotIn('Elsewhere', body)
+
+        # Nothing pending: the reply only moves the client's Last-Event-ID forward
+        latest = TaskEvent.objects.latest('id').id
+        body = self.client.get(reverse('task_events'), HTTP_LAST_EVENT_ID=str(latest)).content.decode()
+        self.assertIn(f'id: {latest}\n\n', body)
+        self.assertNotIn('event:', body)
+
+    def test_group_stream_requires_membership(self):
+        self.client.login(username='outsider', password='pass')
+        self.assertEqual(self.client.get(reverse('group_task_events', args=[self.group.pk])).status_code, 404)
+        self.client.logout()
+        self.assertEqual(self.client.get(reverse('task_events')).status_code, 401)
+
+    def test_broker_fans_out_and_closes_slow_streams(self):
+        broker = EventBroker()
+        fast, slow, other = asyncio.Queue(), asyncio.Queue(1), asyncio.Queue()
+        broker.subscribers = {f'group:{self.group.pk}': {fast, slow}, f'user:{self.user.pk}': {other}}
+        events = [TaskEvent(id=i, kind='task.updated', group_id=self.group.pk, payload={}) for i in (1, 2)]
+        broker.dispatch(events)
+        self.assertEqual([fast.get_nowait().id, fast.get_nowait().id], [1, 2])
+        self.assertIs(slow.get_nowait(), OVERFLOW)
+        self.assertTrue(other.empty())
+
+    def test_prune_command(self):
+        Task.objects.create(title='Task', owner=self.user)
+        TaskEvent.objects.update(created_at=timezone.now() - timedelta(days=2))
+        Task.objects.create(title='Recent', owner=self.user)
+        call_command('prune_task_events', stdout=StringIO())
+        self.assertEqual([event.payload['title'] for event in TaskEvent.objects.all()], ['Recent'])
+
+    def test_scheduler_prunes_events(self):
+        Task.objects.create(title='Task', owner=self.user)
+        TaskEvent.objects.update(created_at=timezone.now() - timedelta(days=2))
+        Task.objects.create(title='Recent', owner=self.user)
+        OverdueSweepScheduler(interval=60).run_once()
+        self.assertEqual([event.payload['title'] for event in TaskEvent.objects.all()], ['Recent'])
+
+
+class TaskOutboxAtomicityTests(TransactionTestCase):
+    def test_task_row_and_outbox_commit_together(self):
+        user = User.objects.create_user('owner')
+        task = Task(title='Task', owner=user)
+        with mock.patch('tasks.signals.TaskEvent.objects.bulk_create', side_effect=DatabaseError):
+            with self.assertRaises(DatabaseError):
+                task.save()
+        self.assertFalse(Task.objects.exists())
+        self.assertEqual(find_counter_drift(), ({}, {}))
+
+
+class PerfToolingTests(TestCase):
+    def test_seed_perf_and_benchmark_views(self):
+        call_command('seed_perf', users=20, groups=4, tasks=200, large_groups=1, large_group_size=10, stdout=StringIO())
+        self.assertEqual(find_counter_drift(), ({}, {}))
+        self.assertEqual(find_visibility_drift(), (set(), set()))
+        with self.assertRaises(CommandError):
+            call_command('seed_perf', users=5, groups=1, tasks=1, stdout=StringIO())
+
+        task_count = Task.objects.count()
+        with tempfile.NamedTemporaryFile(suffix='.json') as report:
+            call_command('benchmark_views', requests=3, warmup=0, json=report.name, stdout=StringIO())
+            results = json.load(report)['results']
+        self.assertEqual(set(results), set(SCENARIOS))
+        self.assertEqual([name for name, summary in results.items() if summary['errors']], [])
+        self.assertTrue(all(summary['queries_mean'] > 0 for summary in results.values()))
+        # The POST scenarios are rolled back
+        self.assertEqual(Task.objects.count(), task_count)
+
+    def test_explain_task_queries_check(self):
+        # Below a few thousand tasks every seeded user sees a large share of them and a full scan is
+        # the cheaper task_list plan, so the check runs at a realistic size
+        out = StringIO()
+        call_command('explain_task_queries', seed_tasks=3000, check=True, stdout=out)
+        self.assertIn('[OK] calendar', out.getvalue())
+        self.assertEqual(Task.objects.count(), 0)  # the seeded rows are rolled back
+
+
+class TimeOrderedKeyTests(TestCase):
+    def test_uuid7_layout_and_ordering(self):
+        ids = [uuid7() for _ in range(10000)]
+        self.assertEqual({(value.version, value.variant) for value in ids}, {(7, uuid.RFC_4122)})
+        # Strictly increasing within the process, even for ids made in the same millisecond
+        self.assertEqual(ids, sorted(set(ids)))
+        self.assertAlmostEqual(ids[0].int >> 80, time.time() * 1000, delta=5000)
+
+    def test_new_rows_get_time_ordered_keys(self):
+        user = User.objects.create_user('owner', password='pass')
+        group = Group.objects.create(name='Team', admin=user)
+        first = Task.objects.create(title='First', owner=user, group=group)
+        second = Task.objects.create(title='Second', owner=user, group=group)
+        self.assertEqual((group.pk.version, first.pk.version), (7, 7))
+        self.assertLess(first.pk, second.pk)
+        # Keys stay plain UUIDs in URLs
+        self.client.login(username='owner', password='pass')
+        self.assertEqual(self.client.get(reverse('task_edit', args=[first.pk])).status_code, 200)
+
+    def test_benchmark_command(self):
+        with tempfile.NamedTemporaryFile(suffix='.json') as report:
+            call_command('benchmark_uuid_keys', rows=500, existing=200, batch_size=100, json=report.name, stdout=StringIO())
+            results = json.load(report)['results']
+        self.assertEqual(set(results), {'uuid4', 'uuid7'})
+        self.assertNotIn('benchmark_uuid7_keys', connection.introspection.table_names())
+
+
+class TaskArchiveTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user('owner', password='pass')
+        self.member = User.objects.create_user('member', password='pass')
+        self.outsider = User.objects.create_user('outsider', password='pass')
+        self.group = Group.objects.create(name='Team', admin=self.user)
+        Membership.objects.create(user=self.member, group=self.group)
+        self.old = Task.objects.create(title='Old done', owner=self.user, group=self.group, status='completed')
+        self.old_personal = Task.objects.create(title='Old personal', owner=self.user, status='completed')
+        self.recent = Task.objects.create(title='Recent done', owner=self.user, group=self.group, status='completed')
+        self.stale_open = Task.objects.create(title='Old open', owner=self.user, group=self.group)
+        Task.objects.exclude(pk=self.recent.pk).update(updated_at=timezone.now() - timedelta(days=100))
+
+    def test_archive_moves_old_completed_tasks_in_batches(self):
+        out = StringIO()
+        call_command('archive_completed_tasks', older_than_days=90, batch_size=1, stdout=out)
+        self.assertIn('Archived 2 task(s)', out.getvalue())
+        self.assertEqual(set(ArchivedTask.objects.values_list('id', flat=True)), {self.old.pk, self.old_personal.pk})
+        self.assertEqual(set(Task.objects.values_list('title', flat=True)), {'Recent done', 'Old open'})
+        self.assertEqual(ArchivedTask.objects.get(pk=self.old.pk).group, self.group)
+        # Counters and the visibility index only cover the hot table
+        self.assertEqual(find_counter_drift(), ({}, {}))
+        self.assertEqual(find_visibility_drift(), (set(), set()))
+        self.assertEqual(user_task_counts(self.user)['completed'], 1)
+        self.assertTrue(TaskEvent.objects.filter(kind='task.archived', group_id=self.group.pk).exists())
+        self.assertFalse(TaskEvent.objects.filter(kind='task.deleted').exists())  # the per-task handler is skipped
+
+    def test_archived_tasks_are_opt_in(self):
+        archive_completed_tasks(90)
+        self.client.login(username='member', password='pass')
+        response = self.client.get(reverse('task_list'), {'status': 'all'})
+        self.assertNotContains(response, 'Old done')
+        response = self.client.get(reverse('task_list'), {'status': 'archived'})
+        self.assertContains(response, 'Old done')
+        self.assertNotContains(response, 'Old personal')  # the owner's personal task
+        self.assertNotContains(response, reverse('task_export'))  # the export only covers current tasks
+        response = self.client.get(reverse('group_detail', args=[self.group.pk]), {'archived': '1'})
+        self.assertContains(response, 'Old done')
+        self.assertNotContains(response, 'Recent done')
+        results = self.client.get(reverse('api_task_list'), {'archived': '1', 'fields': 'title'}).json()['results']
+        self.assertEqual(results, [{'title': 'Old done'}])
+
+        self.client.login(username='outsider', password='pass')
+        self.assertNotContains(self.client.get(reverse('task_list'), {'status': 'archived'}), 'Old done')
+
+
+class TaskRecurrenceTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user('owner', password='pass')
+        self.member = User.objects.create_user('member', password='pass')
+        self.group = Group.objects.create(name='Team', admin=self.user)
+        Membership.objects.create(user=self.member, group=self.group)
+        self.monday = date(2026, 1, 5)
+
+    def rule(self, frequency, start, **kwargs):
+        return TaskRecurrence(title='Standup', owner=self.user, frequency=frequency, start_date=start, **kwargs)
+
+    def test_next_occurrence(self):
+        daily = self.rule('daily', self.monday, interval=3)
+        self.assertEqual(next_occurrence(daily, self.monday), date(2026, 1, 8))
+        self.assertEqual(next_occurrence(daily, date(2025, 12, 1)), self.monday)
+        # Every other week on Monday and Thursday
+        weekly = self.rule('weekly', self.monday, interval=2, weekdays='0,3')
+        self.assertEqual(next_occurrence(weekly, self.monday), date(2026, 1, 8))
+        self.assertEqual(next_occurrence(weekly, date(2026, 1, 8)), date(2026, 1, 19))
+        # The 31st falls back to the end of shorter months
+        monthly = self.rule('monthly', date(2026, 1, 31))
+        self.assertEqual(next_occurrence(monthly, date(2026, 1, 31)), date(2026, 2, 28))
+        self.assertEqual(next_occurrence(monthly, date(2026, 2, 28)), date(2026, 3, 31))
+        monthly.until = date(2026, 3, 30)
+        self.assertIsNone(next_occurrence(monthly, date(2026, 2, 28)))
+
+    def test_generator_fills_the_horizon_once(self):
+        today = date.today()
+        task = Task(title='Standup', owner=self.user, group=self.group, due_date=today)
+        rule = start_recurrence(task, 'daily')
+        horizon_days = settings.TASK_RECURRENCE_HORIZON_DAYS
+        self.assertEqual(rule.occurrences.count(), horizon_days + 1)
+        self.assertEqual(rule.next_date, today + timedelta(days=horizon_days + 1))
+
+        self.assertEqual(generate_recurring_tasks(), 0)
+        self.assertEqual(generate_recurring_tasks(today=today + timedelta(days=2), batch_size=1), 2)
+        self.assertEqual(generate_recurring_tasks(today=today + timedelta(days=2)), 0)
+        self.assertEqual(find_counter_drift(), ({}, {}))
+        self.assertEqual(find_visibility_drift(), (set(), set()))
+        self.assertEqual(TaskVisibility.objects.filter(user=self.member, task__recurrence=rule).count(), horizon_days + 3)
+        self.assertTrue(TaskEvent.objects.filter(kind='task.created', group_id=self.group.pk).exists())
+
+    def test_missed_occurrences_collapse_into_one(self):
+        today = date.today()
+        start = today - timedelta(days=45)
+        rule = start_recurrence(Task(title='Water plants', owner=self.user, due_date=start), 'daily', today=start)
+        # The generator did not run for a month: one overdue occurrence stands in for the missed ones
+        generate_recurring_tasks()
+        missed = rule.occurrences.filter(due_date__gt=start + timedelta(days=14), due_date__lt=today)
+        self.assertEqual(list(missed.values_list('due_date', 'status')), [(start + timedelta(days=15), 'overdue')])
+        self.assertEqual(rule.occurrences.filter(due_date__gte=today).count(), settings.TASK_RECURRENCE_HORIZON_DAYS + 1)
+
+    def test_create_and_stop_repeating_task(self):
+        self.client.login(username='owner', password='pass')
+        due = date.today() + timedelta(days=1)
+        response = self.client.post(reverse('task_create'), {
+            'title': 'Weekly report', 'due_date': due.isoformat(), 'status': 'ongoing',
+            'repeat-frequency': 'weekly', 'repeat-interval': '1',
+        })
+        self.assertRedirects(response, reverse('task_list'))
+        rule = TaskRecurrence.objects.get()
+        self.assertEqual(rule.weekday_set(), {due.weekday()})
+        self.assertEqual(
+            list(rule.occurrences.order_by('due_date').values_list('due_date', flat=True)),
+            [due + timedelta(weeks=week) for week in range((settings.TASK_RECURRENCE_HORIZON_DAYS - 1) // 7 + 1)]
+        )
+        self.assertContains(self.client.get(reverse('task_list')), 'fa-redo')
+
+        # A repeating task needs a due date to start from
+        response = self.client.post(reverse('task_create'), {'title': 'No date', 'status': 'ongoing', 'repeat-frequency': 'daily'})
+        self.assertEqual(response.status_code, 200)
+        self.assertFalse(Task.objects.filter(title='No date').exists())
+
+        self.client.login(username='member', password='pass')
+        self.assertEqual(self.client.post(reverse('task_recurrence_stop', args=[rule.pk])).status_code, 404)
+        self.client.login(username='owner', password='pass')
+        self.client.post(reverse('task_recurrence_stop', args=[rule.pk]))
+        self.assertFalse(TaskRecurrence.objects.exists())
+        self.assertEqual(Task.objects.filter(title='Weekly report', recurrence__isnull=True).count(), 2)
+
+
+class TaskCalendarTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user('owner', password='pass')
+        self.other = User.objects.create_user('other', password='pass')
+        self.group = Group.objects.create(name='Team', admin=self.user)
+        self.today = date.today()
+        self.due = Task.objects.create(title='Due today', owner=self.user, group=self.group, due_date=self.today)
+        self.later = Task.objects.create(title='Far away', owner=self.user, due_date=self.today + timedelta(days=400))
+        Task.objects.create(title='Not mine', owner=self.other, due_date=self.today)
+        caches[settings.FRAGMENT_CACHE_ALIAS].clear()
+
+    def test_windows_cover_whole_weeks(self):
+        self.assertEqual(calendar_window('week', date(2026, 10, 18)), (date(2026, 10, 12), date(2026, 10, 18)))
+        # October 2026 starts on a Thursday and ends on a Saturday
+        self.assertEqual(calendar_window('month', date(2026, 10, 18)), (date(2026, 9, 28), date(2026, 11, 1)))
+
+    def test_tasks_grouped_per_day_and_cached(self):
+        start, end = calendar_window('month', self.today)
+        days, truncated = tasks_by_day(self.user, start, end)
+        self.assertFalse(truncated)
+        self.assertEqual(len(days), (end - start).days + 1)
+        self.assertEqual([row['title'] for row in dict(days)[self.today]], ['Due today'])
+        with self.assertNumQueries(1):  # the version; the grouped days come from the cache
+            self.assertEqual(tasks_by_day(self.user, start, end), (days, truncated))
+        # Any change to a visible task moves the version
+        Task.objects.create(title='Also today', owner=self.user, due_date=self.today)
+        days, _ = tasks_by_day(self.user, start, end)
+        self.assertEqual(len(dict(days)[self.today]), 2)
+        with override_settings(TASK_CALENDAR_MAX_TASKS=1):
+            self.assertTrue(tasks_by_day(self.user, self.today, self.today, version='other')[1])
+
+    def test_calendar_page(self):
+        self.client.login(username='owner', password='pass')
+        response = self.client.get(reverse('task_calendar'), {'view': 'week'})
+        self.assertContains(response, 'Due today')
+        self.assertNotContains(response, 'Not mine')
+        self.assertNotContains(response, 'Far away')
+        self.assertContains(response, feed_token(self.user))
+        # The first response set the CSRF cookie, which is part of the validator
+        etag = self.client.get(reverse('task_calendar'), {'view': 'week'})['ETag']
+        response = self.client.get(reverse('task_calendar'), {'view': 'week'}, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+        response = self.client.get(reverse('task_calendar'), {'date': self.later.due_date.isoformat()})
+        self.assertContains(response, 'Far away')
+
+    def test_ics_feed_with_conditional_get(self):
+        url = reverse('task_calendar_feed', args=[feed_token(self.user)])
+        response = self.client.get(url)
+        self.assertEqual(response['Content-Type'], 'text/calendar; charset=utf-8')
+        body = response.content.decode()
+        self.assertTrue(body.startswith('BEGIN:VCALENDAR\r\n'))
+        self.assertIn(f'UID:{self.due.pk}@testserver\r\n', body)
+        self.assertIn(f'DTSTART;VALUE=DATE:{self.today:%Y%m%d}', body)
+        self.assertIn('CATEGORIES:Team', body)
+        self.assertNotIn('Not mine', body)
+        self.assertNotIn('Far away', body)
+
+        # An unchanged feed costs the token's user and the counter read (group versions are cached)
+        with self.assertNumQueries(2):
+            response = self.client.get(url, HTTP_IF_NONE_MATCH=response['ETag'])
+        self.assertEqual(response.status_code, 304)
+        self.due.status = 'completed'
+        self.due.save()
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=response['ETag'])
+        self.assertContains(response, 'SUMMARY:[Completed] Due today')
+
+        self.assertEqual(self.client.get(reverse('task_calendar_feed', args=['1:forged'])).status_code, 404)
+
+    def test_feed_address_can_be_reset(self):
+        url = reverse('task_calendar_feed', args=[feed_token(self.user)])
+        self.assertEqual(self.client.get(url).status_code, 200)
+        self.client.login(username='owner', password='pass')
+        response = self.client.post(reverse('task_calendar_feed_reset'))
+        self.assertRedirects(response, reverse('task_calendar'), fetch_redirect_response=False)
+        self.assertEqual(self.client.get(url).status_code, 404)
+        new_url = reverse('task_calendar_feed', args=[feed_token(self.user)])
+        self.assertNotEqual(new_url, url)
+        self.assertEqual(self.client.get(new_url).status_code, 200)
+        # A validly signed token without a key (the old format) is not accepted either
+        legacy = signing.Signer(salt=FEED_SALT).sign(str(self.user.pk))
+        self.assertEqual(self.client.get(reverse('task_calendar_feed', args=[legacy])).status_code, 404)
+
+    def test_long_ics_lines_are_folded(self):
+        line = 'SUMMARY:' + 'é' * 60
+        folded = ics_fold(line)
+        self.assertTrue(all(len(part.encode()) <= 75 for part in folded.split('\r\n')))
+        self.assertEqual(folded.replace('\r\n ', ''), line)
 
-# Create your tests here.
@@ -2,9 +2,15 @@
 
 from django.urls import path
 from .views import (
-    TaskListView, TaskCreateView, TaskUpdateView, TaskMarkCompleteView,
+    TaskListView, TaskCreateView, TaskUpdateView, TaskDeleteView, TaskMarkCompleteView, TaskBulkActionView, TaskExportView,
+    TaskImportView, TaskCalendarView, TaskCalendarFeedView, TaskCalendarFeedResetView,
     GroupListView, GroupCreateView, GroupDetailView, GroupUpdateView, GroupDeleteView,
-    GroupMemberManageView
+    GroupMemberManageView, TaskEventStreamView, GroupTaskEventStreamView, TaskRecurrenceStopView
+)
+from .api import (
+    TaskApiListView, TaskApiDetailView, TaskBatchCreateApiView, TaskBatchUpdateApiView, TaskBatchCompleteApiView,
+    GroupApiListView, GroupApiDetailView, GroupMembersApiView, FragmentCacheStatsApiView, DatabasePoolStatsApiView,
+    TaskOverviewApiView, GroupOverviewApiView, GroupDetailOverviewApiView
 )
 
 urlpatterns = [
@@ -14,8 +20,16 @@ urlpatterns = [
     # Add a create task link that takes group_id for context
     path('create/for_group/<uuid:group_id>/', TaskCreateView.as_view(), name='task_create_for_group'),
     path('<uuid:pk>/edit/', TaskUpdateView.as_view(), name='task_edit'),
-    # path('<uuid:pk>/delete/', TaskDeleteView.as_view(), name='task_delete'),
+    path('<uuid:pk>/delete/', TaskDeleteView.as_view(), name='task_delete'),
     path('<uuid:pk>/complete/', TaskMarkCompleteView.as_view(), name='task_complete'),
+    path('recurrences/<uuid:pk>/stop/', TaskRecurrenceStopView.as_view(), name='task_recurrence_stop'),
+    path('bulk/', TaskBulkActionView.as_view(), name='task_bulk_action'),
+    path('export/', TaskExportView.as_view(), name='task_export'),
+    path('import/', TaskImportView.as_view(), name='task_import'),
+    path('calendar/', TaskCalendarView.as_view(), name='task_calendar'),
+    path('calendar/feed/<str:token>.ics', TaskCalendarFeedView.as_view(), name='task_calendar_feed'),
+    path('calendar/feed/reset/', TaskCalendarFeedResetView.as_view(), name='task_calendar_feed_reset'),
+    path('events/', TaskEventStreamView.as_view(), name='task_events'),
 
     # Group URLs
     path('groups/', GroupListView.as_view(), name='group_list'),
@@ -24,4 +38,22 @@ urlpatterns = [
     path('groups/<uuid:pk>/edit/', GroupUpdateView.as_view(), name='group_edit'), # New edit view
     path('groups/<uuid:pk>/delete/', GroupDeleteView.as_view(), name='group_delete'), # New delete view
     path('groups/<uuid:pk>/members/', GroupMemberManageView.as_view(), name='group_members_manage'), # New member management
+    path('groups/<uuid:pk>/export/', TaskExportView.as_view(), name='group_task_export'),
+    path('groups/<uuid:pk>/events/', GroupTaskEventStreamView.as_view(), name='group_task_events'),
+
+    # JSON API
+    path('api/tasks/', TaskApiListView.as_view(), name='api_task_list'),
+    path('api/tasks/<uuid:pk>/', TaskApiDetailView.as_view(), name='api_task_detail'),
+    path('api/tasks/batch/create/', TaskBatchCreateApiView.as_view(), name='api_task_batch_create'),
+    path('api/tasks/batch/update/', TaskBatchUpdateApiView.as_view(), name='api_task_batch_update'),
+    path('api/tasks/batch/complete/', TaskBatchCompleteApiView.as_view(), name='api_task_batch_complete'),
+    path('api/groups/', GroupApiListView.as_view(), name='api_group_list'),
+    path('api/groups/<uuid:pk>/', GroupApiDetailView.as_view(), name='api_group_detail'),
+    path('api/groups/<uuid:pk>/members/', GroupMembersApiView.as_view(), name='api_group_members'),
+    # Async (ASGI) read endpoints
+    path('api/overview/tasks/', TaskOverviewApiView.as_view(), name='api_task_overview'),
+    path('api/overview/groups/', GroupOverviewApiView.as_view(), name='api_group_overview'),
+    path('api/overview/groups/<uuid:pk>/', GroupDetailOverviewApiView.as_view(), name='api_group_detail_overview'),
+    path('api/metrics/fragments/', FragmentCacheStatsApiView.as_view(), name='api_fragment_stats'),
+    path('api/metrics/db-pool/', DatabasePoolStatsApiView.as_view(), name='api_db_pool_stats'),
 ]
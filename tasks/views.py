@@ -1,29 +1,65 @@
 # tasks/views.py
 
+import io
+from datetime import date
+
 from django.shortcuts import render, redirect, get_object_or_404
-from django.views.generic import ListView, CreateView, UpdateView, DeleteView, View, DetailView
-from django.urls import reverse_lazy
+from django.views.generic import ListView, CreateView, UpdateView, DeleteView, View, DetailView, TemplateView
+from django.urls import reverse, reverse_lazy
 from django.contrib.auth.mixins import LoginRequiredMixin, UserPassesTestMixin
+from django.conf import settings
 from django.contrib import messages
-from tasks.models import Task
+from tasks.models import ArchivedTask, Task, TaskRecurrence, TaskVisibility
 from users.models import Group, Membership # Import our models
-from .forms import TaskForm, TaskStatusForm, GroupMemberForm # Import new GroupMemberForm
-from datetime import date # To handle overdue status
+from .forms import TaskForm, TaskStatusForm, GroupMemberForm, TaskBulkActionForm, TaskImportForm, TaskRecurrenceForm # Import new GroupMemberForm
+from .bulk import complete_tasks, reassign_tasks, move_tasks
+from .pagination import KeysetPaginator, KeysetPaginationMixin, keyset_page_urls
+from .membership import update_group_members
+from .export import EXPORT_FORMATS, aiter_export, export_queryset, iter_export
+from .recurrence import start_recurrence
+from .agenda import (
+    CALENDAR_MODES, calendar_window, feed_token, feed_window, ics_calendar, reset_feed_token, shift_anchor, tasks_by_day
+)
+from .importer import TaskImporter, read_rows
+from .counters import group_task_counter, user_task_counts
+from .fragments import annotate_group_versions, group_fragment_versions
+from .etags import task_list_etag, group_detail_etag, task_calendar_etag, calendar_feed_etag
+from .events import event_stream, format_event, latest_event_id, missed_events, user_channels
+from django.utils.decorators import method_decorator
+from django.views.decorators.cache import cache_control
+from django.views.decorators.http import condition
+from django.views.generic.edit import FormView
+from django.http import Http404, HttpResponse, StreamingHttpResponse
+from django.core.handlers.asgi import ASGIRequest
 from django.db import models # For Q objects
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+from django.contrib.auth import get_user_model
+
+User = get_user_model()
+
+# Archived tasks are listed most recently finished first
+ARCHIVED_ORDERING = [('updated_at', True), ('id', True)]
 
 # Mixin to ensure only task owner or group admin can modify/delete group tasks
 class TaskOwnerOrGroupAdminMixin(UserPassesTestMixin):
     def test_func(self):
         task = self.get_object()
         # Check if user is the task owner
-        if task.owner == self.request.user:
+        if task.owner_id == self.request.user.pk:
             return True
         # Check if task belongs to a group and user is group admin
-        if task.group and task.group.admin == self.request.user:
+        if task.group_id and task.group.admin_id == self.request.user.pk:
             return True
         # Check if task belongs to a group and user is a member (allowing deletion/edit for members is a choice)
         # For simplicity, keeping it owner/admin for modify/delete for now.
         return False
+
+    def get_object(self, queryset=None):
+        # test_func and the view both need the task; fetch it once per request
+        if not hasattr(self, '_task'):
+            self._task = super().get_object(queryset)
+        return self._task
     
     def handle_no_permission(self):
         messages.error(self.request, "You do not have permission to perform this action on this task.")
@@ -34,18 +70,26 @@ class TaskOwnerOrGroupAdminMixin(UserPassesTestMixin):
 class GroupAdminRequiredMixin(LoginRequiredMixin, UserPassesTestMixin):
     def test_func(self):
         group = self.get_object()
-        return self.request.user == group.admin
+        return group.admin_id == self.request.user.pk
+
+    def get_object(self, queryset=None):
+        # test_func and the view both need the group; fetch it once per request
+        if not hasattr(self, '_group'):
+            self._group = super().get_object(queryset)
+        return self._group
 
     def handle_no_permission(self):
         messages.error(self.request, "You do not have permission to perform this action.")
         return redirect(reverse_lazy('group_list')) # Redirect to group list if not admin
 
 # Base view for task lists
-class TaskListView(LoginRequiredMixin, ListView):
+# Browsers revalidate on every load and get a 304 when the ETag (tasks/etags.py) still matches
+@method_decorator([cache_control(private=True, no_cache=True), condition(etag_func=task_list_etag)], name='dispatch')
+class TaskListView(LoginRequiredMixin, KeysetPaginationMixin, ListView):
     model = Task
     template_name = 'tasks/task_list.html'
     context_object_name = 'tasks'
-    paginate_by = 10 # Optional: Add pagination
+    paginate_by = 10 # Cursor-based: pages are fetched by seeking past the last row, no COUNT/OFFSET
 
     def get_queryset(self):
         # Get tasks where the current user is the owner OR
@@ -55,35 +99,115 @@ class TaskListView(LoginRequiredMixin, ListView):
         # Filter by status (ongoing, completed, overdue) from URL parameter
         status_filter = self.request.GET.get('status')
 
-        # Start with all tasks the user is involved in
-        queryset = Task.objects.filter(
-            models.Q(owner=self.request.user) |
-            models.Q(assignee=self.request.user) |
-            models.Q(group__members__user=self.request.user) | # Tasks in groups the user is a member of
-            models.Q(group__admin=self.request.user) # Tasks in groups the user admins
-        ).distinct() # Use distinct to avoid duplicates if a task satisfies multiple Q conditions
-
-        # Apply status filter if present
-        if status_filter in ['ongoing', 'completed']:
-            queryset = queryset.filter(status=status_filter)
-        elif status_filter == 'overdue':
-            # Overdue tasks are ongoing tasks with a past due date
-            queryset = queryset.filter(status='ongoing', due_date__lt=date.today())
-        elif status_filter == 'all':
-            pass # No additional status filter
-        else: # Default to ongoing tasks (excluding overdue)
-            queryset = queryset.filter(status='ongoing').exclude(due_date__lt=date.today())
-
-        # Order tasks (e.g., by due date or creation date)
-        queryset = queryset.order_by('due_date', '-created_at')
+        # Opt-in cold path: completed tasks moved to the archive table (tasks/archive.py).
+        # The other tabs never read it.
+        if self.show_archived():
+            return ArchivedTask.objects.visible_to(self.request.user).select_related('assignee', 'group') \
+                .order_by('-updated_at', '-id')
+
+        # Start with all tasks the user is involved in.
+        # TaskVisibility holds exactly one row per (user, task), so no DISTINCT is needed.
+        # Expired tasks are moved to 'overdue' by the scheduled sweep (tasks/overdue.py),
+        # so every status tab is a plain status equality.
+        queryset = Task.objects.visible_to(self.request.user).with_status(status_filter) \
+            .select_related('assignee', 'group')
+
+        # Full-text search (?q=) stays within the visible tasks; results come best match first
+        if self.search_text():
+            return queryset.search(self.search_text()).order_by('-rank', '-created_at', '-id')
+
+        # Order tasks by due date, newest first within a day (same key the paginator seeks on)
+        queryset = queryset.order_by('due_date', '-created_at', '-id')
         return queryset
 
+    def search_text(self):
+        return self.request.GET.get('q', '').strip()
+
+    def show_archived(self):
+        return self.request.GET.get('status') == 'archived'
+
+    def get_keyset_ordering(self):
+        if self.show_archived():
+            return ARCHIVED_ORDERING
+        if self.search_text():
+            return [('rank', True), ('created_at', True), ('id', True)]
+        return super().get_keyset_ordering()
+
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
         # Pass the current filter status to the template for active tab indication
         context['current_status_filter'] = self.request.GET.get('status', 'ongoing')
+        context['search'] = self.search_text()
+        # Already read by the ETag check (tasks/etags.py)
+        context['status_counts'] = getattr(self.request, 'task_counts', None) or user_task_counts(self.request.user)
+        if self.show_archived():
+            return context
+        # Rows show the group name, so their cache keys include the group's fragment version
+        annotate_group_versions(context['tasks'])
+        context['bulk_form'] = TaskBulkActionForm(request_user=self.request.user)
         return context
 
+# Month/week calendar of the visible tasks, grouped per day by tasks/agenda.py.
+# ?view=month|week picks the layout and ?date= any day inside the page (default today).
+@method_decorator([cache_control(private=True, no_cache=True), condition(etag_func=task_calendar_etag)], name='dispatch')
+class TaskCalendarView(LoginRequiredMixin, TemplateView):
+    template_name = 'tasks/task_calendar.html'
+
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        today = date.today()
+        mode = self.request.GET.get('view')
+        if mode not in CALENDAR_MODES:
+            mode = 'month'
+        try:
+            anchor = date.fromisoformat(self.request.GET.get('date', ''))
+        except ValueError:
+            anchor = today
+        start, end = calendar_window(mode, anchor)
+        # Already read by the ETag check (tasks/etags.py)
+        days, truncated = tasks_by_day(self.request.user, start, end, getattr(self.request, 'calendar_version', None))
+        context.update({
+            'mode': mode,
+            'anchor': anchor,
+            'today': today,
+            'weeks': [days[offset:offset + 7] for offset in range(0, len(days), 7)],
+            'truncated': truncated,
+            'previous_date': shift_anchor(mode, anchor, -1),
+            'next_date': shift_anchor(mode, anchor, 1),
+            'feed_url': self.request.build_absolute_uri(reverse('task_calendar_feed', args=[feed_token(self.request.user)])),
+        })
+        return context
+
+
+# Issue a new feed URL; the old one stops working (e.g. after it was shared by mistake)
+class TaskCalendarFeedResetView(LoginRequiredMixin, View):
+    def post(self, request):
+        reset_feed_token(request.user)
+        messages.success(request, "Your calendar feed has a new address; the old one no longer works.")
+        return redirect('task_calendar')
+
+
+# iCalendar feed of the same data for calendar apps, addressed by a signed token instead of a
+# login. The window runs from TASK_CALENDAR_FEED_PAST_DAYS ago to TASK_CALENDAR_FEED_FUTURE_DAYS
+# ahead; polls that find nothing changed get a 304 from the ETag.
+@method_decorator([cache_control(private=True, no_cache=True), condition(etag_func=calendar_feed_etag)], name='dispatch')
+class TaskCalendarFeedView(View):
+    def get(self, request, token):
+        user = request.feed_user
+        if user is None:
+            raise Http404("Unknown calendar feed.")
+        days, _ = tasks_by_day(user, *feed_window(), request.calendar_version)
+        body = ics_calendar(
+            days,
+            name=f"Tasks ({user.username})",
+            host=request.get_host().split(':')[0],
+            url_for_task=lambda task_id: request.build_absolute_uri(reverse('task_edit', args=[task_id]))
+        )
+        response = HttpResponse(body, content_type='text/calendar; charset=utf-8')
+        response['Content-Disposition'] = 'inline; filename="tasks.ics"'
+        return response
+
+
 # View for creating a new task
 class TaskCreateView(LoginRequiredMixin, CreateView):
     model = Task
@@ -130,14 +254,39 @@ class TaskCreateView(LoginRequiredMixin, CreateView):
             else:
                 messages.warning(self.request, "Task created for group but no assignee selected, or you are not a member to self-assign. It is unassigned.")
 
-        task.save() # Now save the instance to the database
+        repeat_form = self.get_repeat_form()
+        if not repeat_form.is_valid() or not repeat_form.check_start(task.due_date):
+            return self.form_invalid(form)
+        if repeat_form.cleaned_data['frequency']:
+            # Saves the task as the first occurrence and creates the ones within the horizon
+            rule = start_recurrence(
+                task,
+                repeat_form.cleaned_data['frequency'],
+                interval=repeat_form.cleaned_data['interval'],
+                weekdays=repeat_form.cleaned_data['weekdays'],
+                until=repeat_form.cleaned_data['until']
+            )
+            messages.success(self.request, f'Repeating task created ({rule.describe()}).')
+        else:
+            task.save() # Now save the instance to the database
+            messages.success(self.request, 'Task created successfully!')
+        self.object = task
 
-        messages.success(self.request, 'Task created successfully!')
         # Redirect to group detail if created for a group, otherwise to task list
         if group_id:
             return redirect(reverse_lazy('group_detail', kwargs={'pk': group_id}))
         return redirect(self.get_success_url())
 
+    def get_repeat_form(self):
+        if not hasattr(self, 'repeat_form'):
+            self.repeat_form = TaskRecurrenceForm(self.request.POST or None, prefix='repeat')
+        return self.repeat_form
+
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        context['repeat_form'] = self.get_repeat_form()
+        return context
+
 
 # View for updating an existing task
 class TaskUpdateView(LoginRequiredMixin, TaskOwnerOrGroupAdminMixin, UpdateView):
@@ -152,6 +301,12 @@ class TaskUpdateView(LoginRequiredMixin, TaskOwnerOrGroupAdminMixin, UpdateView)
             return reverse_lazy('group_detail', kwargs={'pk': self.object.group.pk})
         return reverse_lazy('task_list')
 
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        # Occurrences of a repeating task show the schedule and a way to stop it
+        context['recurrence'] = self.object.recurrence
+        return context
+
     def get_form_kwargs(self):
         kwargs = super().get_form_kwargs()
         kwargs['request_user'] = self.request.user
@@ -189,21 +344,21 @@ class TaskMarkCompleteView(LoginRequiredMixin, View):
     def post(self, request, pk):
         task = get_object_or_404(Task, pk=pk)
 
-        # Check if the user is authorized to mark this task complete
-        is_owner = task.owner == request.user
-        is_assignee = (task.assignee == request.user and task.assignee is not None)
-        is_group_admin = task.group and task.group.admin == request.user
-        is_group_member = task.group and Membership.objects.filter(group=task.group, user=request.user).exists()
+        # Check if the user is authorized to mark this task complete: owner, assignee, or anyone
+        # the task's group makes it visible to (admin and members), all in the visibility index
+        is_owner = task.owner_id == request.user.pk
+        is_assignee = task.assignee_id == request.user.pk
+        is_group_member = task.group_id and TaskVisibility.objects.filter(task=task, user=request.user).exists()
 
-
-        if not (is_owner or is_assignee or is_group_admin or is_group_member):
+        if not (is_owner or is_assignee or is_group_member):
             messages.error(request, "You are not authorized to change the status of this task.")
             return redirect(request.META.get('HTTP_REFERER', reverse_lazy('task_list')))
 
         # Direct update of status
         if task.status != 'completed': # Only update if not already completed
             task.status = 'completed'
-            task.save()
+            # Only the status changes, so the signal keeps the visibility rows as they are
+            task.save(update_fields=['status', 'updated_at'])
             messages.success(request, f'Task "{task.title}" marked as completed!')
         else:
             messages.info(request, f'Task "{task.title}" is already completed.')
@@ -211,6 +366,121 @@ class TaskMarkCompleteView(LoginRequiredMixin, View):
         return redirect(request.META.get('HTTP_REFERER', reverse_lazy('task_list')))
 
 
+# Stop a repeating task: the rule is deleted, occurrences already created stay as normal tasks.
+# Allowed for the rule's owner and the group admin, like editing the tasks themselves.
+class TaskRecurrenceStopView(LoginRequiredMixin, View):
+    def post(self, request, pk):
+        rule = get_object_or_404(
+            TaskRecurrence.objects.filter(models.Q(owner=request.user) | models.Q(group__admin=request.user)), pk=pk
+        )
+        # Rows are cached by updated_at; touch them so the repeat marker disappears
+        rule.occurrences.update(updated_at=timezone.now())
+        rule.delete()
+        messages.success(request, f'"{rule.title}" no longer repeats.')
+        return redirect(reverse_lazy('group_detail', kwargs={'pk': rule.group_id}) if rule.group_id else reverse_lazy('task_list'))
+
+
+# Bulk actions (complete, reassign, move) on the tasks ticked in the task list or group detail page.
+# Each action authorizes the whole selection with one query and applies it with one UPDATE.
+class TaskBulkActionView(LoginRequiredMixin, View):
+    def post(self, request):
+        redirect_to = request.META.get('HTTP_REFERER', reverse_lazy('task_list'))
+        form = TaskBulkActionForm(data=request.POST, request_user=request.user)
+        if not form.is_valid():
+            for errors in form.errors.values():
+                for error in errors:
+                    messages.error(request, error)
+            return redirect(redirect_to)
+
+        action = form.cleaned_data['action']
+        task_ids = form.cleaned_data['tasks']
+        if action == 'complete':
+            report = complete_tasks(request.user, task_ids)
+            updated, skipped = report['completed'], report['not_found']
+            messages.success(request, f"{len(updated)} task(s) marked as completed.")
+            if report['already_completed']:
+                messages.info(request, f"{len(report['already_completed'])} task(s) were already completed.")
+        elif action == 'reassign':
+            assignee = form.cleaned_data['assignee']
+            report = reassign_tasks(request.user, task_ids, assignee)
+            updated, skipped = report['updated'], report['skipped']
+            messages.success(request, f"{len(updated)} task(s) assigned to {assignee.username if assignee else 'nobody'}.")
+        else:
+            group = form.cleaned_data['group']
+            report = move_tasks(request.user, task_ids, group)
+            updated, skipped = report['updated'], report['skipped']
+            messages.success(request, f"{len(updated)} task(s) moved to {group.name if group else 'personal tasks'}.")
+
+        if skipped:
+            messages.warning(request, f"{len(skipped)} task(s) were skipped because you are not allowed to change them.")
+        return redirect(redirect_to)
+
+
+# Streams the tasks of the task list (or of one group) as CSV or NDJSON.
+# ?status= takes the same values as the task list tabs, ?format= is 'csv' (default) or 'ndjson'.
+class TaskExportView(LoginRequiredMixin, View):
+    def get(self, request, pk=None):
+        export_format = request.GET.get('format', 'csv')
+        if export_format not in EXPORT_FORMATS:
+            messages.error(request, f"Unknown export format '{export_format}'.")
+            return redirect('task_list')
+        status = request.GET.get('status', 'ongoing')
+
+        if pk is None:
+            queryset = export_queryset(user=request.user, status=status)
+            filename = f"tasks-{status}.{export_format}"
+        else:
+            group = get_object_or_404(
+                Group.objects.filter(models.Q(admin=request.user) | models.Q(members__user=request.user)).distinct(),
+                pk=pk
+            )
+            queryset = export_queryset(group=group, status=status)
+            filename = f"group-{group.pk}-tasks-{status}.{export_format}"
+
+        # ASGI buffers sync iterators in full, so it gets an async one; WSGI would do the same to an async one
+        rows = aiter_export if isinstance(request, ASGIRequest) else iter_export
+        response = StreamingHttpResponse(rows(queryset, export_format), content_type=EXPORT_FORMATS[export_format])
+        response['Content-Disposition'] = f'attachment; filename="{filename}"'
+        return response
+
+
+# Upload a CSV/NDJSON file of tasks. Every imported task is owned by the uploader and may only
+# target groups they belong to; rows are read from the upload as a stream and inserted in batches.
+class TaskImportView(LoginRequiredMixin, FormView):
+    form_class = TaskImportForm
+    template_name = 'tasks/task_import.html'
+    success_url = reverse_lazy('task_list')
+    max_reported_errors = 10
+
+    def form_valid(self, form):
+        lines = io.TextIOWrapper(form.cleaned_data['file'].file, encoding='utf-8', newline='')
+        importer = TaskImporter(owner=self.request.user, restrict_to_owner=True)
+        # Decoding was checked by TaskImportForm, before any chunk is committed
+        report = importer.run(read_rows(lines, form.cleaned_data['format']))
+        messages.success(self.request, str(report))
+        for line, message in report.errors[:self.max_reported_errors]:
+            messages.warning(self.request, f"Line {line}: {message}")
+        if len(report.errors) > self.max_reported_errors:
+            messages.warning(self.request, f"...and {len(report.errors) - self.max_reported_errors} more rejected row(s).")
+        return super().form_valid(form)
+
+
+# View for deleting a task
+class TaskDeleteView(LoginRequiredMixin, TaskOwnerOrGroupAdminMixin, DeleteView):
+    model = Task
+    template_name = 'tasks/task_confirm_delete.html'
+    context_object_name = 'task'
+
+    def get_success_url(self):
+        if self.object.group_id:
+            return reverse_lazy('group_detail', kwargs={'pk': self.object.group_id})
+        return reverse_lazy('task_list')
+
+    def form_valid(self, form):
+        messages.success(self.request, f'Task "{self.object.title}" deleted successfully.')
+        return super().form_valid(form)
+
+
 # Group Management Views
 class GroupListView(LoginRequiredMixin, ListView):
     model = Group
@@ -218,10 +488,19 @@ class GroupListView(LoginRequiredMixin, ListView):
     context_object_name = 'groups'
 
     def get_queryset(self):
+        # Member count is a correlated subquery; task counts per status come from GroupTaskCounter,
+        # so each row renders without extra queries or a scan of the group's tasks
+        member_count = Membership.objects.filter(group=models.OuterRef('pk')).order_by().values('group') \
+            .annotate(count=models.Count('pk')).values('count')
         return Group.objects.filter(
             models.Q(admin=self.request.user) |
             models.Q(members__user=self.request.user)
-        ).distinct().order_by('name')
+        ).distinct().select_related('admin').annotate(
+            member_count=Coalesce(models.Subquery(member_count), 0),
+            ongoing_count=Coalesce('task_counter__ongoing', 0),
+            completed_count=Coalesce('task_counter__completed', 0),
+            overdue_count=Coalesce('task_counter__overdue', 0),
+        ).order_by('name')
 
 
 class GroupCreateView(LoginRequiredMixin, CreateView):
@@ -243,23 +522,39 @@ class GroupCreateView(LoginRequiredMixin, CreateView):
         return context
 
 
+@method_decorator([cache_control(private=True, no_cache=True), condition(etag_func=group_detail_etag)], name='dispatch')
 class GroupDetailView(LoginRequiredMixin, DetailView):
     model = Group
     template_name = 'groups/group_detail.html'
     context_object_name = 'group'
+    paginate_tasks_by = 10
 
     def get_queryset(self):
         return Group.objects.filter(
             models.Q(admin=self.request.user) |
             models.Q(members__user=self.request.user)
-        ).distinct()
+        ).distinct().select_related('admin')
 
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
-        group = self.get_object()
-        context['members'] = group.members.all().order_by('user__username')
-        context['tasks'] = group.tasks.all().order_by('due_date', '-created_at')
+        group = self.object
+        # Left lazy: it is only evaluated when the cached member block has to be re-rendered
+        context['members'] = group.members.select_related('user').order_by('user__username')
+        context['group_version'] = group_fragment_versions([group.pk])[group.pk]
+        # ?archived=1 lists the group's archived tasks instead of its current ones
+        context['show_archived'] = self.request.GET.get('archived') == '1'
+        if context['show_archived']:
+            paginator = KeysetPaginator(self.paginate_tasks_by, ordering=ARCHIVED_ORDERING)
+            tasks = group.archived_tasks.select_related('assignee')
+        else:
+            paginator = KeysetPaginator(self.paginate_tasks_by)
+            tasks = group.tasks.select_related('assignee')
+        page = paginator.paginate(tasks, after=self.request.GET.get('after'), before=self.request.GET.get('before'))
+        context['tasks'] = page.object_list
+        context['page_obj'] = page
+        context['task_counter'] = getattr(self.request, 'group_task_counter', None) or group_task_counter(group)
         context['is_admin'] = (self.request.user == group.admin)
+        context['bulk_form'] = TaskBulkActionForm(request_user=self.request.user, group=group)
         return context
 
 
@@ -303,6 +598,9 @@ class GroupMemberManageView(GroupAdminRequiredMixin, UpdateView):
     form_class = GroupMemberForm
     template_name = 'groups/group_member_manage.html'
     context_object_name = 'group'
+    paginate_by = 20
+    # Users are listed by username; id breaks ties so the keyset is unique
+    user_paginator_ordering = [('username', False), ('id', False)]
 
     def get_success_url(self):
         return reverse_lazy('group_detail', kwargs={'pk': self.object.pk})
@@ -313,31 +611,106 @@ class GroupMemberManageView(GroupAdminRequiredMixin, UpdateView):
         return form_class(
             data=self.request.POST if self.request.method == 'POST' else None,
             files=self.request.FILES if self.request.method == 'POST' else None,
-            group=self.get_object()
+            group=self.object
         )
 
     def form_valid(self, form):
-        group = self.get_object()
-        selected_members = form.cleaned_data['members']
-
-        if group.admin not in selected_members:
-            selected_members = list(selected_members) + [group.admin]
-
-        current_members = [m.user for m in group.members.exclude(user=group.admin)]
-
-        members_to_add = set(selected_members) - set(current_members)
-        for user_to_add in members_to_add:
-            if user_to_add != group.admin:
-                Membership.objects.get_or_create(group=group, user=user_to_add)
-
-        members_to_remove = set(current_members) - set(selected_members)
-        for user_to_remove in members_to_remove:
-            Membership.objects.filter(group=group, user=user_to_remove).delete()
-
-        messages.success(self.request, f'Members for group "{group.name}" updated successfully.')
+        group = self.object
+        added, removed = update_group_members(
+            group,
+            add_user_ids=[user.pk for user in form.cleaned_data['add']],
+            remove_user_ids=[user.pk for user in form.cleaned_data['remove']]
+        )
+        messages.success(
+            self.request,
+            f'Members for group "{group.name}" updated successfully ({added} added, {removed} removed).'
+        )
         return redirect(self.get_success_url())
 
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
-        context['page_title'] = f'Manage Members for "{self.object.name}"'
-        return context
\ No newline at end of file
+        group = self.object
+        paginator = KeysetPaginator(self.paginate_by, ordering=self.user_paginator_ordering)
+        search = self.request.GET.get('q', '').strip()
+
+        members_page = paginator.paginate(
+            User.objects.filter(group_memberships__group=group),
+            after=self.request.GET.get('members_after'),
+            before=self.request.GET.get('members_before')
+        )
+        candidates = User.objects.exclude(group_memberships__group=group).exclude(id=group.admin_id)
+        if search:
+            candidates = candidates.filter(username__startswith=search)
+        candidates_page = paginator.paginate(
+            candidates,
+            after=self.request.GET.get('candidates_after'),
+            before=self.request.GET.get('candidates_before')
+        )
+
+        context['page_title'] = f'Manage Members for "{group.name}"'
+        context['search'] = search
+        context['members_page'] = members_page
+        context['members_links'] = keyset_page_urls(self.request, members_page, 'members_after', 'members_before')
+        context['candidates_page'] = candidates_page
+        context['candidates_links'] = keyset_page_urls(self.request, candidates_page, 'candidates_after', 'candidates_before')
+        return context
+
+
+class TaskEventStreamView(View):
+    # Server-Sent Events for the task list: the user's own channel plus one per group they belong to.
+    # Under ASGI the response stays open and events arrive as they are committed. Under WSGI it
+    # returns what was missed and ends, and the browser reconnects after TASK_EVENTS_RETRY_MS, so
+    # an open page never holds a sync worker.
+    async def dispatch(self, request, *args, **kwargs):
+        request.user = await request.auser()
+        if not request.user.is_authenticated:
+            # EventSource can't follow the login redirect; a 401 makes it stop retrying
+            return HttpResponse(status=401)
+        return await super().dispatch(request, *args, **kwargs)
+
+    async def get(self, request, *args, **kwargs):
+        channels = await self.get_channels(**kwargs)
+        last_event_id, since = self.resume_point()
+        if isinstance(request, ASGIRequest):
+            response = StreamingHttpResponse(
+                event_stream(channels, request.user.pk, last_event_id, since), content_type='text/event-stream'
+            )
+            response['X-Accel-Buffering'] = 'no'  # nginx would otherwise hold events back
+        else:
+            events, complete = await missed_events(channels, last_event_id, since)
+            body = [f"retry: {settings.TASK_EVENTS_RETRY_MS}\n\n"] + [format_event(event) for event in events]
+            if not complete:
+                body.append("event: reset\ndata: {}\n\n")
+            elif not events:
+                # An id without data moves the browser's Last-Event-ID forward, so the next poll
+                # doesn't replay the same window again
+                body.append(f"id: {await latest_event_id()}\n\n")
+            response = HttpResponse(''.join(body), content_type='text/event-stream')
+        response['Cache-Control'] = 'no-cache'
+        return response
+
+    async def get_channels(self, **kwargs):
+        return await user_channels(self.request.user)
+
+    def resume_point(self):
+        # Last-Event-ID is sent by the browser when it reconnects; ?since= (epoch seconds) is the
+        # time the page was rendered, for the first connection
+        last_event_id = self.request.headers.get('Last-Event-ID') or self.request.GET.get('last_event_id')
+        try:
+            return int(last_event_id), None
+        except (TypeError, ValueError):
+            pass
+        try:
+            return None, float(self.request.GET['since'])
+        except (KeyError, ValueError):
+            return None, None
+
+
+class GroupTaskEventStreamView(TaskEventStreamView):
+    # Events for the group detail page. The user's own channel is included so the stream ends when
+    # they leave the group; the page ignores events for other groups.
+    async def get_channels(self, pk):
+        user = self.request.user
+        if not await Group.objects.filter(models.Q(admin=user) | models.Q(members__user=user), pk=pk).aexists():
+            raise Http404("No group found matching the query")
+        return [f'group:{pk}', f'user:{user.pk}']
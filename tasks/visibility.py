@@ -0,0 +1,157 @@
+# tasks/visibility.py
+
+from collections import Counter
+
+from django.db import models, transaction
+from tasks.models import Task, TaskVisibility
+from users.models import Group, Membership
+from .counters import apply_counter_deltas, visible_status_counts
+
+
+# A user can see a task if they own it, are assigned to it, or are a member/admin of its group.
+def visible_user_ids_for_task(task):
+    user_ids = {task.owner_id}
+    if task.assignee_id:
+        user_ids.add(task.assignee_id)
+    if task.group_id:
+        user_ids.update(Membership.objects.filter(group_id=task.group_id).values_list('user_id', flat=True))
+        user_ids.add(Group.objects.values_list('admin_id', flat=True).get(pk=task.group_id))
+    return user_ids
+
+
+def sync_task_visibility(task):
+    # Bring the index rows for a single task in line with its owner/assignee/group.
+    # Returns (previously visible user ids, now visible user ids) for the counters.
+    wanted = visible_user_ids_for_task(task)
+    existing = set(TaskVisibility.objects.filter(task=task).values_list('user_id', flat=True))
+
+    # Part of the caller's transaction when there is one (Task.save)
+    with transaction.atomic(savepoint=False):
+        if existing - wanted:
+            TaskVisibility.objects.filter(task=task, user_id__in=existing - wanted).delete()
+        TaskVisibility.objects.bulk_create(
+            [TaskVisibility(user_id=user_id, task=task) for user_id in wanted - existing],
+            ignore_conflicts=True
+        )
+    return existing, wanted
+
+
+def sync_user_group_visibility(user_id, group_id):
+    # Called when a user joins/leaves a group or gains/loses its admin role
+    is_member = Membership.objects.filter(user_id=user_id, group_id=group_id).exists()
+    is_admin = Group.objects.filter(pk=group_id, admin_id=user_id).exists()
+
+    with transaction.atomic():
+        if is_member or is_admin:
+            # Every task in the group becomes visible
+            already_visible = TaskVisibility.objects.filter(user_id=user_id, task__group_id=group_id).values('task_id')
+            missing = list(Task.objects.filter(group_id=group_id).exclude(id__in=already_visible).values_list('id', 'status'))
+            TaskVisibility.objects.bulk_create(
+                [TaskVisibility(user_id=user_id, task_id=task_id) for task_id, _ in missing],
+                ignore_conflicts=True
+            )
+            apply_counter_deltas(Counter((user_id, status) for _, status in missing))
+        else:
+            # Only tasks the user owns or is assigned to stay visible
+            hidden = TaskVisibility.objects.filter(user_id=user_id, task__group_id=group_id).exclude(
+                models.Q(task__owner_id=user_id) | models.Q(task__assignee_id=user_id)
+            )
+            apply_counter_deltas(visible_status_counts(hidden, sign=-1))
+            hidden.delete()
+
+
+def expected_visibility_pairs():
+    # The source of truth: the same four rules TaskListView used to OR together
+    pairs = set(Task.objects.values_list('owner_id', 'id'))
+    pairs.update(Task.objects.filter(assignee__isnull=False).values_list('assignee_id', 'id'))
+    pairs.update(Task.objects.filter(group__isnull=False).values_list('group__admin_id', 'id'))
+    pairs.update(
+        Task.objects.filter(group__members__isnull=False).values_list('group__members__user_id', 'id')
+    )
+    return pairs
+
+
+def find_visibility_drift():
+    # Returns (missing, stale) sets of (user_id, task_id) pairs
+    expected = expected_visibility_pairs()
+    actual = set(TaskVisibility.objects.values_list('user_id', 'task_id'))
+    return expected - actual, actual - expected
+
+
+def repair_visibility(missing, stale, batch_size=1000):
+    with transaction.atomic():
+        stale = list(stale)
+        for start in range(0, len(stale), batch_size):
+            condition = models.Q()
+            for user_id, task_id in stale[start:start + batch_size]:
+                condition |= models.Q(user_id=user_id, task_id=task_id)
+            TaskVisibility.objects.filter(condition).delete()
+        TaskVisibility.objects.bulk_create(
+            [TaskVisibility(user_id=user_id, task_id=task_id) for user_id, task_id in missing],
+            batch_size=batch_size,
+            ignore_conflicts=True
+        )
+
+
+def sync_group_members_visibility(group_id, added_user_ids, removed_user_ids, batch_size=1000):
+    # Set-based counterpart of sync_user_group_visibility for bulk membership changes
+    with transaction.atomic():
+        deltas = Counter()
+        if removed_user_ids:
+            hidden = TaskVisibility.objects.filter(user_id__in=removed_user_ids, task__group_id=group_id).exclude(
+                models.Q(task__owner_id=models.F('user_id')) |
+                models.Q(task__assignee_id=models.F('user_id')) |
+                models.Q(task__group__admin_id=models.F('user_id'))
+            )
+            deltas.update(visible_status_counts(hidden, sign=-1))
+            hidden.delete()
+        if added_user_ids:
+            tasks = list(Task.objects.filter(group_id=group_id).values_list('id', 'status'))
+            already_visible = set(
+                TaskVisibility.objects.filter(user_id__in=added_user_ids, task__group_id=group_id).values_list('user_id', 'task_id')
+            )
+            rows = [
+                (user_id, task_id, status)
+                for user_id in added_user_ids for task_id, status in tasks
+                if (user_id, task_id) not in already_visible
+            ]
+            TaskVisibility.objects.bulk_create(
+                [TaskVisibility(user_id=user_id, task_id=task_id) for user_id, task_id, _ in rows],
+                batch_size=batch_size,
+                ignore_conflicts=True
+            )
+            deltas.update((user_id, status) for user_id, _, status in rows)
+        apply_counter_deltas(deltas)
+
+
+def add_tasks_visibility(tasks, batch_size=1000):
+    # Index rows for freshly bulk-inserted tasks (bulk_create skips the post_save signal).
+    # Two lookups for the whole batch instead of per-task queries.
+    group_ids = {task.group_id for task in tasks if task.group_id}
+    members_by_group = {}
+    for group_id, user_id in Membership.objects.filter(group_id__in=group_ids).values_list('group_id', 'user_id'):
+        members_by_group.setdefault(group_id, set()).add(user_id)
+    for group_id, admin_id in Group.objects.filter(id__in=group_ids).values_list('id', 'admin_id'):
+        members_by_group.setdefault(group_id, set()).add(admin_id)
+
+    rows, deltas = [], Counter()
+    for task in tasks:
+        user_ids = {task.owner_id} | members_by_group.get(task.group_id, set())
+        if task.assignee_id:
+            user_ids.add(task.assignee_id)
+        rows.extend(TaskVisibility(user_id=user_id, task_id=task.pk) for user_id in user_ids)
+        deltas.update((user_id, task.status) for user_id in user_ids)
+    TaskVisibility.objects.bulk_create(rows, batch_size=batch_size, ignore_conflicts=True)
+    apply_counter_deltas(deltas)
+
+
+def resync_tasks_visibility(task_ids, batch_size=1000):
+    # Rebuild the index rows of tasks whose owner/assignee/group changed through a bulk UPDATE
+    with transaction.atomic():
+        rows = TaskVisibility.objects.filter(task_id__in=task_ids)
+        apply_counter_deltas(visible_status_counts(rows, sign=-1))
+        rows.delete()
+        add_tasks_visibility(
+            list(Task.objects.filter(id__in=task_ids).only('id', 'owner_id', 'assignee_id', 'group_id', 'status')),
+            batch_size=batch_size
+        )
@@ -0,0 +1,23 @@
+# Generated by Django 5.2.2 on 2026-10-18 03:26
+
+import task_management.ids
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('users', '0002_delete_task'),
+    ]
+
+    # uuid7 is applied by Django when a row is created, not by a database default, so only the
+    # migration state changes. Existing uuid4 keys are left alone: URLs and foreign keys stay valid.
+    operations = [
+        migrations.SeparateDatabaseAndState(state_operations=[
+            migrations.AlterField(
+                model_name='group',
+                name='id',
+                field=models.UUIDField(default=task_management.ids.uuid7, editable=False, primary_key=True, serialize=False),
+            ),
+        ]),
+    ]
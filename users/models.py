@@ -1,13 +1,13 @@
 from django.db import models
 from django.contrib.auth.models import AbstractUser # Use AbstractUser to extend Django's User
 from django.conf import settings # Import settings to reference AUTH_USER_MODEL
-import uuid # For generating unique IDs for groups and tasks
+from task_management.ids import uuid7 # Time-ordered UUIDs for groups and tasks
 
 
 # Define Group Model
 class Group(models.Model):
-    # Use UUID as primary key for robust unique identification
-    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    # Use UUID as primary key for robust unique identification; time-ordered so inserts stay local in the index
+    id = models.UUIDField(primary_key=True, default=uuid7, editable=False)
     name = models.CharField(max_length=255, unique=True, help_text="Name of the group")
     # Link to the user who created the group (admin)
     admin = models.ForeignKey(
@@ -26,6 +26,13 @@ class Group(models.Model):
     def __str__(self):
         return self.name
 
+# Membership rows are almost always shown with their user and group (see __str__ and Meta.ordering,
+# which already joins both tables), so load them in the same query.
+class MembershipManager(models.Manager):
+    def get_queryset(self):
+        return super().get_queryset().select_related('user', 'group')
+
+
 # Define Membership Model to link Users and Groups
 class Membership(models.Model):
     user = models.ForeignKey(
@@ -42,6 +49,8 @@ class Membership(models.Model):
     )
     date_joined = models.DateTimeField(auto_now_add=True)
 
+    objects = MembershipManager()
+
     class Meta:
         unique_together = ('user', 'group') # A user can only be a member of a group once
         verbose_name = "Membership"
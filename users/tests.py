@@ -1,3 +1,39 @@
+from unittest import mock
+
+from django.contrib.auth import get_user_model
 from django.test import TestCase
+from django.urls import reverse
+
+from users.models import Group, Membership
+from users.views import UserAutocompleteView
+
+User = get_user_model()
+
+
+class UserAutocompleteTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user('alice', password='pass')
+        for name in ['alex', 'alfred', 'bob', 'albert', 'alvin']:
+            User.objects.create_user(name)
+        self.client.login(username='alice', password='pass')
+        self.url = reverse('user_autocomplete')
+
+    def test_prefix_search_is_paginated_by_username(self):
+        with mock.patch.object(UserAutocompleteView, 'page_size', 2):
+            first = self.client.get(self.url, {'q': 'al'}).json()
+            second = self.client.get(self.url, {'q': 'al', 'after': first['next']}).json()
+            third = self.client.get(self.url, {'q': 'al', 'after': second['next']}).json()
+        usernames = [u['username'] for page in (first, second, third) for u in page['results']]
+        self.assertEqual(usernames, ['albert', 'alex', 'alfred', 'alice', 'alvin'])
+        self.assertIsNone(third['next'])
+
+    def test_group_filter_requires_membership(self):
+        owner = User.objects.get(username='bob')
+        group = Group.objects.create(name='Team', admin=owner)
+        Membership.objects.create(user=owner, group=group)
+        self.assertEqual(self.client.get(self.url, {'group': group.pk}).status_code, 404)
+        self.assertEqual(self.client.get(self.url, {'group': 'nope'}).status_code, 400)
 
-# Create your tests here.
+        Membership.objects.create(user=self.user, group=group)
+        results = self.client.get(self.url, {'group': group.pk}).json()['results']
+        self.assertEqual([u['username'] for u in results], ['alice', 'bob'])
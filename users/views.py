@@ -1,13 +1,21 @@
 # users/views.py
 
+import uuid
+
 from django.shortcuts import render, redirect
 from django.contrib.auth.views import LoginView, LogoutView
-from django.views.generic import CreateView, TemplateView
+from django.contrib.auth.mixins import LoginRequiredMixin
+from django.db import models
+from django.http import JsonResponse
+from django.views.generic import CreateView, TemplateView, View
 from django.contrib.auth.forms import PasswordResetForm
-from django.contrib.auth import login
+from django.contrib.auth import login, get_user_model
 from django.urls import reverse_lazy
 from .forms import UserRegisterForm, UserLoginForm # Import our custom forms
 from django.contrib import messages # For displaying messages to the user
+from .models import Group
+
+User = get_user_model()
 
 # Class-based view for user registration
 class RegisterView(CreateView):
@@ -66,3 +74,40 @@ class ForgotPasswordView(TemplateView):
         else:
             messages.error(request, 'Please enter a valid email address.')
             return render(request, self.template_name, {'form': form})
+
+
+# JSON endpoint backing the assignee picker: prefix search on username, keyset-paginated by username.
+# ?q=<prefix>&after=<last username seen>[&group=<uuid> to restrict to that group's members]
+class UserAutocompleteView(LoginRequiredMixin, View):
+    page_size = 20
+
+    def get(self, request):
+        users = User.objects.filter(is_active=True).order_by('username')
+
+        prefix = request.GET.get('q', '').strip()
+        if prefix:
+            users = users.filter(username__startswith=prefix) # Case-sensitive so the username index can be used
+        after = request.GET.get('after')
+        if after:
+            users = users.filter(username__gt=after)
+
+        group_id = request.GET.get('group')
+        if group_id:
+            try:
+                group_id = uuid.UUID(group_id)
+            except ValueError:
+                return JsonResponse({'error': 'Invalid group.'}, status=400)
+            # Only members/admins of a group may list its members
+            if not Group.objects.filter(
+                models.Q(admin=request.user) | models.Q(members__user=request.user), pk=group_id
+            ).exists():
+                return JsonResponse({'error': 'Group not found.'}, status=404)
+            users = users.filter(group_memberships__group_id=group_id)
+
+        rows = list(users.values('id', 'username')[:self.page_size + 1])
+        has_more = len(rows) > self.page_size
+        rows = rows[:self.page_size]
+        return JsonResponse({
+            'results': rows,
+            'next': rows[-1]['username'] if has_more else None,
+        })